@@ -107,6 +107,11 @@ def create_app():
     register_error_handlers(user_system)
 
     with user_system.app_context():
+        # MysqlConfig与SQLAlchemy共用engine的连接池，每个worker只保留一个有上限的连接池
+        from apps.extensions import db
+        from apps.models.operation_mysql import pool_registry
+        pool_registry.bind_engine(db.engine)
+
         # 验证数据库连接池
         from apps.utils.db_utils import get_connection_pool_status, test_database_connection
         if os.getenv('FLASK_CONFIG') == 'production':
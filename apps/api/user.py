@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
+import os
 import pytz
 from flask import Blueprint, jsonify, request
 from flask_login import login_required
@@ -10,6 +11,12 @@ from apps.utils.db_utils import get_connection_pool_status, test_database_connec
 from apps.extensions import db
 from apps.models.user import UserManager
 from apps.models.decorators import admin_required
+from apps.models.logger_manager import LoggerManager
+from apps.models.operation_mysql import pool_registry
+from apps.models.sql_stats import sql_stats
+from apps.models.lookup_cache import lookup_cache
+from apps.models.topology_cache import get_topology_cache
+from apps.ops_game.job_engine import get_job_manager
 from apps.config import ZONE_TIME
 
 api = Blueprint('api', __name__)
@@ -33,11 +40,64 @@ def get_db_status():
     return api_response(
         data={
             'connection_pool': status,
+            'mysql_pools': pool_registry.stats(),
             'connection_ok': connection_ok,
             'database_url': db.engine.url.drivername + '://' + db.engine.url.host
         }
     )
 
+@api.route('/system/log/status', methods=['GET'])
+@login_required
+@admin_required
+def get_log_status():
+    """获取日志写入状态（异步模式下的队列深度、丢弃数）"""
+    return api_response(data=LoggerManager().stats())
+
+@api.route('/system/sql/stats', methods=['GET'])
+@login_required
+@admin_required
+def get_sql_stats():
+    """
+    获取SQL语句指纹汇总（按总耗时倒序，?limit=N）
+    默认返回处理本次请求的worker进程的统计（每个进程单独统计，不含其他worker和作业执行进程）；
+    ?job_id= 返回该作业执行进程结束时保存的统计
+    """
+    limit = request.args.get('limit', 50, type=int)
+    job_manager = get_job_manager()
+    job_id = request.args.get('job_id')
+    if job_id:
+        statements = job_manager.get_sql_stats(job_id)
+        if statements is None:
+            return api_response(success=False, message=f'作业没有保存SQL统计: {job_id}', status_code=404)
+        return api_response(data={'scope': 'job', 'job_id': job_id, 'statements': statements[:limit]})
+    return api_response(data={
+        'scope': 'worker',
+        'pid': os.getpid(),
+        'statements': sql_stats.get_stats(limit=limit),
+        'jobs': job_manager.list_sql_stats_jobs()
+    })
+
+@api.route('/system/cache/stats', methods=['GET'])
+@login_required
+@admin_required
+def get_cache_stats():
+    """获取配置查询缓存和区服拓扑共享缓存的命中统计"""
+    topology_cache = get_topology_cache()
+    return api_response(data={
+        'lookup': lookup_cache.stats(),
+        'topology': topology_cache.stats() if topology_cache is not None else None
+    })
+
+
+@api.route('/system/cache/invalidate', methods=['POST'])
+@login_required
+@admin_required
+def invalidate_cache():
+    """失效配置查询缓存（直接修改数据库表后使用，table为空时清空全部）"""
+    table = (request.get_json(silent=True) or {}).get('table') or None
+    lookup_cache.invalidate(table)
+    return api_response(message=f"已失效缓存：{table or '全部'}")
+
 # API通用响应格式
 def api_response(success=True, data=None, message=None, status_code=200):
     response = {
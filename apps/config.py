@@ -16,8 +16,21 @@ APP_VERSION = '1.0.0'
 # 日志配置
 LOG_DIR = os.path.join(bash_script_dir, 'logs')
 LOG_BACKUP_COUNT = 30  # 保留最近30天的日志
+# 异步批量日志（日志记录放入队列，由单独的写线程按条数/时间批量写入文件，调用线程不再阻塞在磁盘写入上）
+LOG_ASYNC_CONFIG = {
+    'enabled': os.environ.get('OPS_LOG_ASYNC', '0') == '1',           # 是否启用异步批量日志
+    'queue_size': int(os.environ.get('OPS_LOG_QUEUE_SIZE', 10000)),  # 队列上限，队列满时丢弃日志并计数
+    'batch_size': 500,      # 单次批量写入的最大条数
+    'flush_interval': 0.5,  # 日志最长缓冲时间（秒）
+}
 # 最大线程数
 MAX_WORKERS = 10
+# 游戏服操作任务调度并发限制
+SCHEDULER_LIMITS = {
+    'max_total': int(os.environ.get('OPS_MAX_TOTAL_TASKS', MAX_WORKERS)),    # 全局最大并发任务数
+    'max_per_host': int(os.environ.get('OPS_MAX_PER_HOST', 3)),             # 单台主机最大并发任务数
+    'max_per_channel': int(os.environ.get('OPS_MAX_PER_CHANNEL', 5)),       # 单个渠道最大并发任务数
+}
 # 时区配置
 ZONE_TIME = 'Asia/Shanghai'
 
@@ -42,7 +55,8 @@ MYSQL_CONFIG = {
     'db_name': db_name,
     'port': 3306,
     'game_list_table': 'game_server_list',
-    'operation_game_list': 'operation_game_list',
+    'operation_list': 'operation_list',
+    'operation_list_range': 'operation_list_range',
     'server_list': 'server_list',
     'channel_list': 'channel_list',
     'reload_url_list': 'reload_url_list',
@@ -50,6 +64,48 @@ MYSQL_CONFIG = {
     'game_type_list': 'game_type_list',
 }
 
+# 配置查询缓存（channel_list/reload_url_list等很少变更的查询，读穿透+TTL+LRU，管理页面写入时主动失效）
+# 启用区服拓扑共享缓存时查询结果同时保存在其Redis中，作业执行进程和各worker共用、一起失效；
+# 未启用时只缓存在进程内，作业执行进程每次从空缓存开始
+LOOKUP_CACHE_CONFIG = {
+    'ttl': int(os.environ.get('OPS_LOOKUP_CACHE_TTL', 300)),  # 缓存有效期（秒）
+    'maxsize': 1024,            # 最多缓存的条目数
+    'key_prefix': 'ops_game:lookup',  # 共享层的Redis键前缀
+}
+
+# 区服拓扑共享缓存（Redis中按版本保存渠道->类型->区服->主机的拓扑快照，多个worker共用；
+# 区服/服务器变更时递增版本号。资产管理列表的记录总数也保存在该Redis中，新增/删除时INCRBY调整。
+# redis_url配置为memory://时使用进程内替身，便于本地测试）
+TOPOLOGY_CACHE_CONFIG = {
+    'enabled': os.environ.get('OPS_TOPOLOGY_CACHE', '0') == '1',       # 是否启用
+    'redis_url': os.environ.get('OPS_TOPOLOGY_REDIS_URL', redis_url),  # 默认与限流共用Redis
+    'key_prefix': 'ops_game:topology',  # Redis键前缀
+    'ttl': 3600,                # 快照过期时间（秒）
+    'socket_timeout': 1,        # Redis读写超时（秒），超时直接查询数据库
+}
+
+# SQL执行统计配置（每条语句计时，慢查询全部记录，普通查询按比例抽样记录日志）
+SQL_STATS_CONFIG = {
+    'slow_threshold': float(os.environ.get('OPS_SLOW_QUERY_MS', 500)) / 1000,  # 慢查询阈值（秒）
+    'sample_rate': float(os.environ.get('OPS_SQL_LOG_SAMPLE', 0.01)),         # 普通查询日志抽样比例（0~1）
+    'samples': 1000,            # 每个语句指纹保留的最近耗时样本数（计算p50/p99）
+    'max_fingerprints': 500,    # 最多统计的语句指纹数
+}
+
+# MySQL连接池配置（PooledDB，每个进程每个DSN共享一个连接池；业务库绑定SQLAlchemy engine后改用engine的连接池）
+MYSQL_POOL_CONFIG = {
+    'maxconnections': int(os.environ.get('OPS_MYSQL_POOL_SIZE', 10)),  # 最大连接数
+    'mincached': 2,     # 初始空闲连接数
+    'maxcached': 5,     # 最大空闲连接数
+    'maxshared': 3,     # 最大共享连接数
+    'blocking': True,   # 连接数达到上限时等待
+}
+
+# 操作列表配置（每个发起人各自的操作列表，区服按区间存储，每次写入生成新版本）
+OPERATION_LIST_CONFIG = {
+    'keep_versions': 10,        # 每个列表保留的历史版本数
+}
+
 OPERATION_PARAMETER = {
     'status': '检查游戏服状态',
     'stop': '停服',
@@ -61,6 +117,28 @@ OPERATION_PARAMETER = {
     'initial': '部署'
 }
 
+# 单个任务（脚本子进程）超时配置，超时后终止整个进程组（含ssh等子进程）
+TASK_TIMEOUT_CONFIG = {
+    'default': int(os.environ.get('OPS_TASK_TIMEOUT', 1800)),  # 未单独配置的操作的超时时间（秒）
+    'timeouts': {   # 按操作类型配置的超时时间（秒）
+        'status': 120,
+        'stop': 600,
+        'start': 900,
+        'reload': 600,
+        'update': 1800,
+        'battle': 1800,
+        'rsync': 1800,
+        'initial': 3600,
+    },
+    'kill_grace': 5,    # 发送SIGTERM后等待进程退出的时间（秒），超过则SIGKILL
+}
+
+# 起停服的服务类型依赖顺序（渠道内前一类型全部完成且探测就绪后才处理下一类型，渠道之间互不等待）
+OPERATION_ORDER = {
+    'stop_game': ['Central', 'Play', 'Global', 'Game'],
+    'start_game': ['Central', 'Game', 'Play', 'Global'],
+}
+
 # SSH 配置（请根据实际情况修改）
 CLIENT_INFO = {
     'ip': os.environ.get('CLIENT_IP'),
@@ -80,6 +158,68 @@ CLIENT_UPDATE_CMD = {
     'indexIos_tishen': 'rsync -av /data/client/web/zhengshi/indexIos_tishen.html' + CLIENT_DIR,
 }
 
+# 自适应并发配置（根据任务耗时和失败率动态调整全局并发数）
+ADAPTIVE_CONCURRENCY = {
+    'min_limit': 2,             # 最小并发数
+    'max_limit': int(os.environ.get('OPS_ADAPTIVE_MAX_TASKS', 50)),  # 最大并发数
+    'window': 10,               # 统计窗口（完成的任务数）
+    'failure_threshold': 0.2,   # 失败率阈值，超过则并发减半
+    'latency_tolerance': 1.5,   # 耗时中位数超过基准的倍数，超过则并发-1
+}
+
+# 就绪探测配置（起停服/热更各阶段探测 game_server_list.http_port，替代固定等待）
+READINESS_PROBE = {
+    'mode': 'tcp',          # 探测方式: tcp(端口可连接) | http(端口有HTTP响应)
+    'deadline': 120,        # 单阶段最长等待时间（秒）
+    'interval': 1,          # 轮询间隔（秒）
+    'connect_timeout': 2,   # 单次探测超时（秒）
+    'min_wait': 5,          # 分组中有未配置http_port（如Game区服为0）无法探测的服务时，至少等待的时间（秒）
+    'sync_wait': 1,         # 热更前等待代码同步到区服的时间（秒）
+    # 热更状态接口返回内容中表示热更完成的标识，为空时不轮询状态接口，热更请求后固定等待 status_wait 秒
+    'status_marker': os.environ.get('OPS_RELOAD_STATUS_MARKER', ''),
+    'status_wait': 5,
+}
+
+# 脚本执行引擎: thread(每个任务一个线程逐行读取输出) | multiplexed(单线程多路复用读取所有任务的输出，
+# 任务不占用线程，适合大量区服并发，需配合调大 OPS_MAX_TOTAL_TASKS)
+EXECUTION_ENGINE = os.environ.get('OPS_EXECUTION_ENGINE', 'thread')
+
+# 按主机批量执行配置（同一主机上的区服任务复用一个SSH主连接，并行数受 SCHEDULER_LIMITS['max_per_host'] 限制）
+HOST_BATCH_CONFIG = {
+    'control_dir': os.path.join(bash_script_dir, 'logs', 'ssh_control'),  # SSH ControlMaster套接字目录
+    'control_persist': 60,  # 主连接空闲保持时间（秒）
+}
+
+# 操作作业存储配置（作业独立于SSE请求运行，输出持久化到本地SQLite，断线后可按Last-Event-ID续传）
+JOB_STORE_CONFIG = {
+    'db_path': os.path.join(bash_script_dir, 'logs', 'jobs.db'),  # SQLite文件路径
+    'flush_size': 200,          # 输出事件批量写入条数
+    'flush_interval': 0.2,      # 输出事件最长缓冲时间（秒）
+    'poll_interval': 0.5,       # SSE读取新事件的轮询间隔（秒）
+    'keepalive': 15,            # SSE无新事件时的心跳间隔（秒）
+    'retention_days': 7,        # 作业记录保留天数
+    'spool_dir': os.path.join(bash_script_dir, 'logs', 'jobs'),  # 任务输出日志目录（每个作业一个子目录，每个任务一个文件）
+    'tail_bytes': 65536,        # 查看任务日志末尾时默认返回的字节数
+    'reap_interval': 5,         # 每个进程检查作业执行进程是否已退出的最小间隔（秒）
+    # 作业执行方式: process(独立会话的子进程执行，gunicorn worker回收/重启不影响作业) | thread(worker内线程执行)
+    'runner': os.environ.get('OPS_JOB_RUNNER', 'process'),
+}
+
+# 输出队列配置（每个作业一个有界队列，读取过慢时脚本输出行按策略丢弃/合并，状态消息始终保留）
+OUTPUT_QUEUE_CONFIG = {
+    'maxsize': int(os.environ.get('OPS_OUTPUT_QUEUE_SIZE', 10000)),  # 队列中输出行的上限
+    'policy': os.environ.get('OPS_OUTPUT_QUEUE_POLICY', 'summarize'),  # summarize | drop | block
+    'block_timeout': 1.0,   # block策略的最长等待时间（秒）
+}
+
+# SSE输出合并配置（一个SSE事件携带多条输出 {"status": "batch", "items": [...]}，减少序列化、系统调用和页面重排）
+SSE_BATCH_CONFIG = {
+    'enabled': os.environ.get('OPS_SSE_BATCH', '1') == '1',
+    'window': 0.1,          # 合并窗口（秒）：未攒满时等待该时间再读取下一批
+    'max_items': 200,       # 单个SSE事件最多携带的输出条数
+    'summary_interval': 2,  # 摘要模式（stream=summary）下进度汇总的推送间隔（秒）
+}
+
 # 本地脚本白名单
 EXECUTOR_SCRIPTS = {
     'default_script': os.path.join(bash_script_dir, 'apps', 'scripts', 'operation_game.sh'),
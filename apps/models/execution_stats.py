@@ -15,6 +15,8 @@ class ExecutionStats:
         self.task_stats = {}  # 格式: {task_id: {'executions': int, 'failures': int}}
         # 命令执行统计
         self.cmd_stats = {'executions': 0, 'failures': 0}
+        # 运行指标（如规划耗时），格式: {metric_name: value}
+        self.metrics = {}
 
     def reset(self):
         """重置所有统计数据（线程安全）"""
@@ -23,6 +25,12 @@ class ExecutionStats:
             self.total_failures = 0
             self.task_stats = {}
             self.cmd_stats = {'executions': 0, 'failures': 0}
+            self.metrics = {}
+
+    def set_metric(self, name, value):
+        """记录运行指标（覆盖同名指标）"""
+        with self.lock:
+            self.metrics[name] = value
 
     def increment_execution(self, task_id=None, is_command=False):
         """增加执行次数"""
@@ -53,7 +61,8 @@ class ExecutionStats:
                 "total_executions": self.total_executions,
                 "total_failures": self.total_failures,
                 "task_stats": self.task_stats.copy(),
-                "cmd_stats": self.cmd_stats.copy()
+                "cmd_stats": self.cmd_stats.copy(),
+                "metrics": self.metrics.copy()
             }
 
 # 全局单例统计实例
@@ -1,84 +1,273 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
+import os
 import time
 import json
+import signal
 import threading
-from queue import Queue
+import subprocess
+from concurrent.futures import Future
 
 # 导入统计管理器
 from apps.models.execution_stats import stats_manager
+from apps.models.process_multiplexer import get_multiplexer
+from apps.models.output_queue import BoundedOutputQueue
 
 
 class ExecutorScript:
-    def __init__(self):
-        self.output_queue = Queue()  # 线程安全队列
+    def __init__(self, kill_grace=5, queue_config=None):
+        """
+        :param kill_grace: 终止进程组时SIGTERM后等待的秒数，超过则SIGKILL
+        :param queue_config: 输出队列配置（OUTPUT_QUEUE_CONFIG），None使用默认值
+        """
+        self.output_queue = BoundedOutputQueue(**(queue_config or {}))  # 线程安全的有界输出队列
         self.lock = threading.Lock()  # 保证线程安全
+        self.kill_grace = kill_grace
+        self.processes = {}  # 运行中的子进程 {task_id: Popen}
+        self.cancelled = threading.Event()  # 取消标记，置位后不再启动新任务
 
-    def executor_shell(self, logger, script, parameter, info, executor_scripts, task_id):
-        """执行脚本并实时将输出写入队列（逻辑不变，增加日志）"""
+    def _terminate(self, process, reason):
+        """
+        终止子进程所在的整个进程组（bash及其启动的ssh/rsync等），SIGTERM后超时未退出则SIGKILL
+        :param reason: 终止原因（timeout | cancelled）
+        """
+        if process.poll() is not None:
+            return
+        process.kill_reason = reason
         try:
-            # 1. 记录任务开始，增加执行次数
-            stats_manager.increment_execution(task_id=task_id, is_command=False)
-            # 1. 发送任务开始信息
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+
+        def force_kill():
+            try:
+                process.wait(timeout=self.kill_grace)
+            except subprocess.TimeoutExpired:
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+        threading.Thread(target=force_kill, daemon=True).start()
+
+    def cancel(self, logger):
+        """取消执行：终止所有运行中的子进程，尚未开始的任务直接标记为取消"""
+        with self.lock:
+            self.cancelled.set()
+            processes = dict(self.processes)
+        logger.info(f"取消执行，终止{len(processes)}个运行中的任务进程")
+        for process in processes.values():
+            self._terminate(process, 'cancelled')
+        return len(processes)
+
+    def _report_cancelled(self, logger, task_id, info):
+        """任务在取消后才轮到执行：不启动进程，直接标记为取消"""
+        stats_manager.increment_execution(task_id=task_id, is_command=False)
+        stats_manager.increment_failure(task_id=task_id, is_command=False)
+        self.output_queue.put({
+            "task_id": task_id,
+            "status": "cancelled",
+            "message": f"任务已取消（未执行）：{info}"
+        })
+        logger.info(f"任务[{task_id}]已取消，不再执行")
+
+    def _start_process(self, logger, script, parameter, info, executor_scripts, task_id, env, timeout, text):
+        """
+        推送任务开始信息并启动脚本子进程（独立进程组），登记到运行中进程并启动超时计时器
+        :param text: True为文本行缓冲模式（线程逐行读取），False为二进制模式（多路复用读取）
+        :return: (process, timer)
+        """
+        # 1. 记录任务开始，增加执行次数
+        stats_manager.increment_execution(task_id=task_id, is_command=False)
+        # 1. 发送任务开始信息
+        self.output_queue.put({
+            "task_id": task_id,
+            "status": "start",
+            "message": info
+        })
+        logger.info(f"任务[{task_id}]已加入队列，开始执行")
+
+        # 2. 执行脚本（用subprocess实时捕获输出）
+        script_file = executor_scripts.get(script, executor_scripts[f'default_script'])
+        cmd = f"bash {script_file} {parameter}"  # 脚本路径+参数
+        start_time = time.strftime("%Y-%m-%d %H:%M:%S")  # 记录开始时间
+        logger.info(f"[命令开始] 时间: {start_time} | 命令: {cmd}")
+        process = subprocess.Popen(
+            cmd,
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=text,
+            bufsize=1 if text else 0,  # 文本模式行缓冲，实时输出
+            env={**os.environ, **env} if env else None,
+            start_new_session=True  # 独立进程组，超时/取消时连同子进程一起终止
+        )
+        process.kill_reason = None
+        with self.lock:
+            self.processes[task_id] = process
+            if self.cancelled.is_set():
+                self._terminate(process, 'cancelled')
+        timer = None
+        if timeout:
+            timer = threading.Timer(timeout, self._terminate, args=(process, 'timeout'))
+            timer.daemon = True
+            timer.start()
+        return process, timer
+
+    def _put_line(self, task_id, line):
+        self.output_queue.put({
+            "task_id": task_id,
+            "status": "running",
+            "message": line
+        })
+
+    def _untrack(self, task_id, timer):
+        """任务进程结束：取消超时计时器，从运行中进程注销"""
+        if timer:
+            timer.cancel()
+        with self.lock:
+            self.processes.pop(task_id, None)
+
+    def _finish_process(self, logger, task_id, process, timeout):
+        """
+        任务进程结束后推送结果并更新失败统计
+        :return: 脚本返回码
+        """
+        # 4. 任务完成后判断结果，更新失败统计
+        if process.kill_reason:
+            stats_manager.increment_failure(task_id=task_id, is_command=False)
+            message = f"任务超时（超过{timeout}秒），已终止" if process.kill_reason == 'timeout' \
+                else "任务已取消，已终止"
             self.output_queue.put({
                 "task_id": task_id,
-                "status": "start",
-                "message": info
+                "status": process.kill_reason,
+                "returncode": process.returncode,
+                "message": f"{message}（返回码：{process.returncode}）"
             })
-            logger.info(f"任务[{task_id}]已加入队列，开始执行")
-
-            # 2. 执行脚本（用subprocess实时捕获输出）
-            import subprocess
-            script_file = executor_scripts.get(script, executor_scripts[f'default_script'])
-            cmd = f"bash {script_file} {parameter}"  # 脚本路径+参数
-            start_time = time.strftime("%Y-%m-%d %H:%M:%S")  # 记录开始时间
-            logger.info(f"[命令开始] 时间: {start_time} | 命令: {cmd}")
-            process = subprocess.Popen(
-                cmd,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1  # 行缓冲，实时输出
-            )
-
-            # 3. 实时读取输出并写入队列
-            for line in process.stdout:
-                self.output_queue.put({
-                    "task_id": task_id,
-                    "status": "running",
-                    "message": line.strip()
-                })
-
-            # 4. 任务完成后判断结果，更新失败统计
-            process.wait()
-            if process.returncode == 0:
-                self.output_queue.put({
-                    "task_id": task_id,
-                    "status": "success",
-                    "message": f"任务完成（返回码：{process.returncode}）"
-                })
-            else:
-                # 脚本执行失败，增加失败次数
-                stats_manager.increment_failure(task_id=task_id, is_command=False)
-                self.output_queue.put({
-                    "task_id": task_id,
-                    "status": "failed",
-                    "message": f"任务失败（返回码：{process.returncode}）"
-                })
-            logger.info(f"任务[{task_id}]执行完毕，返回码：{process.returncode}")
+            logger.warning(f"任务[{task_id}]{message}，返回码：{process.returncode}")
+            return process.returncode
 
-        except Exception as e:
-            # 执行异常，增加失败次数
+        if process.returncode == 0:
+            self.output_queue.put({
+                "task_id": task_id,
+                "status": "success",
+                "returncode": process.returncode,
+                "message": f"任务完成（返回码：{process.returncode}）"
+            })
+        else:
+            # 脚本执行失败，增加失败次数
             stats_manager.increment_failure(task_id=task_id, is_command=False)
-            error_msg = f"执行异常：{str(e)}"
             self.output_queue.put({
                 "task_id": task_id,
-                "status": "error",
-                "message": error_msg
+                "status": "failed",
+                "returncode": process.returncode,
+                "message": f"任务失败（返回码：{process.returncode}）"
             })
-            logger.error(f"任务[{task_id}]异常：{error_msg}")
+        logger.info(f"任务[{task_id}]执行完毕，返回码：{process.returncode}")
+        return process.returncode
+
+    def _report_exception(self, logger, task_id, e):
+        # 执行异常，增加失败次数
+        stats_manager.increment_failure(task_id=task_id, is_command=False)
+        error_msg = f"执行异常：{str(e)}"
+        self.output_queue.put({
+            "task_id": task_id,
+            "status": "error",
+            "message": error_msg
+        })
+        logger.error(f"任务[{task_id}]异常：{error_msg}")
+
+    def executor_shell(self, logger, script, parameter, info, executor_scripts, task_id, env=None, timeout=None):
+        """
+        执行脚本并实时将输出写入队列
+        :param env: 额外的环境变量（如按主机批量执行时的SSH主连接配置）
+        :param timeout: 超时时间（秒），超时后终止进程组，None为不限制
+        :return: 脚本返回码，执行异常或已取消时返回None
+        """
+        if self.cancelled.is_set():
+            self._report_cancelled(logger, task_id, info)
+            return None
+
+        try:
+            process, timer = self._start_process(logger, script, parameter, info, executor_scripts,
+                                                 task_id, env, timeout, text=True)
+            # 3. 实时读取输出并写入队列
+            try:
+                for line in process.stdout:
+                    self._put_line(task_id, line.strip())
+                process.wait()
+            finally:
+                self._untrack(task_id, timer)
+            return self._finish_process(logger, task_id, process, timeout)
+
+        except Exception as e:
+            self._report_exception(logger, task_id, e)
+            return None
+
+    def executor_shell_async(self, logger, script, parameter, info, executor_scripts, task_id, env=None,
+                             timeout=None):
+        """
+        异步执行脚本：启动子进程后立即返回，输出由ProcessMultiplexer在单个线程中读取
+        参数与 executor_shell 一致
+        :return: Future，结果为脚本返回码（执行异常或已取消时为None）
+        """
+        future = Future()
+        if self.cancelled.is_set():
+            self._report_cancelled(logger, task_id, info)
+            future.set_result(None)
+            return future
+
+        try:
+            process, timer = self._start_process(logger, script, parameter, info, executor_scripts,
+                                                 task_id, env, timeout, text=False)
+        except Exception as e:
+            self._report_exception(logger, task_id, e)
+            future.set_result(None)
+            return future
+
+        def on_exit(returncode):
+            self._untrack(task_id, timer)
+            try:
+                future.set_result(self._finish_process(logger, task_id, process, timeout))
+            except Exception as e:
+                self._report_exception(logger, task_id, e)
+                future.set_result(None)
+
+        get_multiplexer(logger).add(process, lambda line: self._put_line(task_id, line), on_exit)
+        return future
+
+    @staticmethod
+    def host_batch_env(batch_config):
+        """
+        按主机批量执行的SSH主连接（ControlMaster）环境变量，同一主机上的区服任务通过它复用一个SSH连接
+        :param batch_config: 批量执行配置（HOST_BATCH_CONFIG）
+        :return: (env, control_path)
+        """
+        os.makedirs(batch_config['control_dir'], mode=0o700, exist_ok=True)
+        # %C 为本地主机/远程主机/端口/用户的哈希，避免套接字路径过长，不同主机各自一个套接字
+        control_path = os.path.join(batch_config['control_dir'], '%C')
+        env = {
+            'SSH_CONTROL_PATH': control_path,
+            'SSH_CONTROL_PERSIST': str(batch_config['control_persist'])
+        }
+        return env, control_path
+
+    def close_host_master(self, logger, game_ip, control_path):
+        """关闭主机的SSH主连接（后台线程执行，不阻塞调用方，如多路复用读取线程）"""
+        def close():
+            try:
+                subprocess.run(
+                    ['ssh', '-p22', '-o', f'ControlPath={control_path}', '-O', 'exit', f'root@{game_ip}'],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    timeout=10
+                )
+            except Exception as e:
+                logger.warning(f"关闭主机[{game_ip}]SSH主连接失败：{str(e)}")
+            logger.info(f"主机[{game_ip}]批量执行完毕")
+
+        threading.Thread(target=close, daemon=True).start()
 
     def get_output_generator(self, logger):
         """生成SSE格式的输出流（修复语法错误，增加日志）"""
@@ -86,7 +275,7 @@ class ExecutorScript:
         while True:
             try:
                 item = self.output_queue.get()  # 阻塞等待队列数据
-                logger.info(f"从队列获取数据：{item}")
+                logger.debug(f"从队列获取数据：{item}")
 
                 if item is None:  # 收到终止信号
                     logger.info("收到终止信号，输出所有任务完成信息")
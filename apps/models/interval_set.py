@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+from bisect import bisect_right
+
+
+class IntervalSet:
+    """
+    整数区间集合（不可变）：内部保存升序、互不重叠且不相邻的闭区间 [(起始, 结束)]，
+    用于区服选择，集合运算、偏移、格式化的开销只与区间数有关，与区服数量无关
+    字符串格式与区服参数一致：如 "1_3,6,9,12_13"
+    """
+    __slots__ = ('_ranges',)
+
+    def __init__(self, ranges=()):
+        """
+        :param ranges: 闭区间列表 [(起始, 结束)]，可以无序、重叠（起始大于结束的区间忽略）
+        """
+        merged = []
+        for start, end in sorted((int(start), int(end)) for start, end in ranges if int(start) <= int(end)):
+            if merged and start <= merged[-1][1] + 1:
+                if end > merged[-1][1]:
+                    merged[-1][1] = end
+            else:
+                merged.append([start, end])
+        self._ranges = tuple((start, end) for start, end in merged)
+
+    @classmethod
+    def from_values(cls, values):
+        """由区服编号列表生成（去重、合并连续编号）"""
+        return cls((value, value) for value in values)
+
+    @classmethod
+    def parse(cls, text):
+        """
+        解析区服字符串（如 "1,3,4_5,7,8_10,20"），无法解析的项忽略
+        :return: IntervalSet
+        """
+        ranges = []
+        for item in (text or '').split(','):
+            item = item.strip()
+            if not item:
+                continue
+            try:
+                if '_' in item:
+                    start, end = map(int, item.split('_', 1))
+                    ranges.append((start, end))
+                else:
+                    ranges.append((int(item), int(item)))
+            except ValueError:
+                continue
+        return cls(ranges)
+
+    @classmethod
+    def of(cls, value):
+        """将区间集合、区服字符串或区服编号列表统一转换为IntervalSet"""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            return cls.parse(value)
+        return cls.from_values(value)
+
+    @property
+    def ranges(self):
+        """闭区间元组 ((起始, 结束), ...)"""
+        return self._ranges
+
+    def union(self, other):
+        return IntervalSet(self._ranges + IntervalSet.of(other)._ranges)
+
+    def intersection(self, other):
+        result = []
+        left, right = self._ranges, IntervalSet.of(other)._ranges
+        i = j = 0
+        while i < len(left) and j < len(right):
+            start = max(left[i][0], right[j][0])
+            end = min(left[i][1], right[j][1])
+            if start <= end:
+                result.append((start, end))
+            if left[i][1] < right[j][1]:
+                i += 1
+            else:
+                j += 1
+        return IntervalSet(result)
+
+    def difference(self, other):
+        result = []
+        removes = IntervalSet.of(other)._ranges
+        j = 0
+        for start, end in self._ranges:
+            # 跳过完全在当前区间之前的待删除区间
+            while j < len(removes) and removes[j][1] < start:
+                j += 1
+            k = j
+            while k < len(removes) and removes[k][0] <= end:
+                if removes[k][0] > start:
+                    result.append((start, removes[k][0] - 1))
+                start = removes[k][1] + 1
+                k += 1
+            if start <= end:
+                result.append((start, end))
+        return IntervalSet(result)
+
+    def shift(self, offset):
+        """整体偏移（如区服编号加上渠道初始ID得到zone_id）"""
+        return IntervalSet((start + offset, end + offset) for start, end in self._ranges)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def __iter__(self):
+        for start, end in self._ranges:
+            yield from range(start, end + 1)
+
+    def __len__(self):
+        return sum(end - start + 1 for start, end in self._ranges)
+
+    def __bool__(self):
+        return bool(self._ranges)
+
+    def __contains__(self, value):
+        index = bisect_right(self._ranges, (value, float('inf'))) - 1
+        return index >= 0 and self._ranges[index][0] <= value <= self._ranges[index][1]
+
+    def __eq__(self, other):
+        return isinstance(other, IntervalSet) and self._ranges == other._ranges
+
+    def __hash__(self):
+        return hash(self._ranges)
+
+    def __str__(self):
+        return ','.join(str(start) if start == end else f"{start}_{end}" for start, end in self._ranges)
+
+    def __repr__(self):
+        return f"IntervalSet('{self}')"
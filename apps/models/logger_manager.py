@@ -2,10 +2,126 @@
 # -*- coding: UTF-8 -*-
 
 import os
+import time
+import atexit
 import logging
+import threading
+from queue import Queue, Full, Empty
 from logging.handlers import TimedRotatingFileHandler
 from apps import config
 
+
+class BatchingQueueHandler(logging.Handler):
+    """
+    异步批量日志处理器：emit只把日志记录放入有界队列（不阻塞调用线程），
+    由单个写线程按条数或时间批量格式化并一次写入目标文件处理器，队列满时丢弃并计数
+    写线程在当前进程第一次写日志时启动：gunicorn preload_app 时处理器在master中创建，
+    fork出的worker重建队列和锁（fork时可能被其他线程持有），并在worker中启动自己的写线程
+    """
+    def __init__(self, target, queue_size=10000, batch_size=500, flush_interval=0.5):
+        """
+        :param target: 实际写文件的处理器（TimedRotatingFileHandler）
+        :param queue_size: 队列上限
+        :param batch_size: 单次批量写入的最大条数
+        :param flush_interval: 日志最长缓冲时间（秒）
+        """
+        super().__init__()
+        self.target = target
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """初始化（或fork后在子进程中重建）队列、锁和计数，写线程延迟到第一次写日志时启动"""
+        self.queue = Queue(maxsize=self.queue_size)
+        self.stats_lock = threading.Lock()
+        self.start_lock = threading.Lock()
+        self.dropped = 0   # 队列满被丢弃的日志数
+        self.written = 0   # 已写入的日志数
+        self.batches = 0   # 批量写入次数
+        self.stopped = threading.Event()
+        self.writer = None
+        self.writer_pid = None
+
+    def _ensure_writer(self):
+        """确保当前进程的写线程已启动"""
+        if self.writer_pid == os.getpid():
+            return
+        with self.start_lock:
+            if self.writer_pid != os.getpid():
+                self.writer = threading.Thread(target=self._write_loop, name='log-writer', daemon=True)
+                self.writer.start()
+                self.writer_pid = os.getpid()
+
+    def emit(self, record):
+        self._ensure_writer()
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            with self.stats_lock:
+                self.dropped += 1
+
+    def _write_loop(self):
+        while not (self.stopped.is_set() and self.queue.empty()):
+            try:
+                records = [self.queue.get(timeout=self.flush_interval)]
+            except Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while len(records) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    records.append(self.queue.get(timeout=remaining))
+                except Empty:
+                    break
+            self._write_batch(records)
+
+    def _write_batch(self, records):
+        """格式化一批日志，一次写入并刷新（按第一条日志的时间判断是否轮转）"""
+        handler = self.target
+        handler.acquire()
+        try:
+            if handler.shouldRollover(records[0]):
+                handler.doRollover()
+            if handler.stream is None:
+                handler.stream = handler._open()
+            handler.stream.write(''.join(handler.format(record) + handler.terminator for record in records))
+            handler.flush()
+            with self.stats_lock:
+                self.written += len(records)
+                self.batches += 1
+        except Exception:
+            handler.handleError(records[0])
+        finally:
+            handler.release()
+
+    def close(self):
+        """停止写线程（写完队列中剩余的日志）并关闭目标处理器"""
+        self.stopped.set()
+        if self.writer is not None and self.writer_pid == os.getpid():
+            self.writer.join(timeout=max(self.flush_interval * 4, 2))
+        self.target.close()
+        super().close()
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                'mode': 'async',
+                'pid': os.getpid(),
+                'writer_alive': self.writer is not None and self.writer_pid == os.getpid() and self.writer.is_alive(),
+                'queue_depth': self.queue.qsize(),
+                'queue_size': self.queue.maxsize,
+                'dropped': self.dropped,
+                'written': self.written,
+                'batches': self.batches
+            }
+
+
 class LoggerManager:
     _instance = None
     _logger = None
@@ -39,11 +155,30 @@ class LoggerManager:
         )
         handler.setFormatter(formatter)
 
+        # 异步批量模式：调用线程只入队，由写线程批量写文件
+        async_config = config.LOG_ASYNC_CONFIG
+        if async_config['enabled']:
+            handler = BatchingQueueHandler(
+                handler,
+                queue_size=async_config['queue_size'],
+                batch_size=async_config['batch_size'],
+                flush_interval=async_config['flush_interval']
+            )
+            # 进程退出前写完队列中的日志
+            atexit.register(handler.close)
+        self._handler = handler
+
         # 配置 logger
         self._logger = logging.getLogger('app_logger')
         self._logger.setLevel(logging.INFO)
         self._logger.addHandler(handler)
 
+    def stats(self):
+        """日志写入状态（异步模式下包含队列深度和丢弃数）"""
+        if isinstance(self._handler, BatchingQueueHandler):
+            return self._handler.stats()
+        return {'mode': 'sync'}
+
     def info(self, message):
         self._logger.info(message)
 
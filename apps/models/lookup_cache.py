@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import json
+import time
+import threading
+from collections import OrderedDict
+
+import redis
+
+from apps.config import LOOKUP_CACHE_CONFIG
+from apps.models.logger_manager import LoggerManager
+
+
+class LookupCache:
+    """
+    读穿透缓存（线程安全）：带TTL过期和容量上限（LRU淘汰），用于渠道、热更URL等很少变更的配置查询
+    键的第一个元素为表名，写入该表后按表名失效
+    启用区服拓扑共享缓存（TOPOLOGY_CACHE_CONFIG）时增加Redis共享层：查询结果按全局版本号保存在Redis中，
+    作业执行进程启动后直接读取其他进程已加载的结果，任一进程失效缓存时递增版本号，所有进程下次读取时重新加载；
+    未启用时缓存只在当前进程内，其他worker依赖TTL过期，每个作业执行进程都从空缓存开始（对作业规划无加速作用）
+    """
+    def __init__(self, ttl=300, maxsize=1024, key_prefix='ops_game:lookup'):
+        """
+        :param ttl: 缓存有效期（秒）
+        :param maxsize: 最多缓存的条目数，超过后淘汰最久未使用的条目
+        :param key_prefix: 共享层的Redis键前缀
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.key_prefix = key_prefix
+        self.logger = LoggerManager()
+        self.lock = threading.Lock()
+        self.items = OrderedDict()  # 格式: {key: (过期时间, 值, 共享层版本号)}
+        self.hits = 0
+        self.shared_hits = 0   # 从Redis共享层读取的次数
+        self.misses = 0        # 查询数据库的次数
+        self.evictions = 0
+        self.invalidations = 0
+        self.errors = 0        # Redis异常次数（异常时按进程内缓存处理）
+
+    @property
+    def version_key(self):
+        return f"{self.key_prefix}:version"
+
+    @staticmethod
+    def _shared_client():
+        """共享层的Redis客户端（与区服拓扑共享缓存共用，未启用时返回None）"""
+        from apps.models.topology_cache import get_topology_cache
+        cache = get_topology_cache()
+        return cache.client if cache is not None else None
+
+    def is_shared(self):
+        return self._shared_client() is not None
+
+    def _shared_version(self, client):
+        """共享层当前版本号（不存在时初始化为1），Redis异常返回None"""
+        try:
+            value = client.get(self.version_key)
+            if value is None:
+                client.set(self.version_key, 1, nx=True)
+                value = client.get(self.version_key)
+            return int(value)
+        except redis.RedisError as e:
+            self.errors += 1
+            self.logger.warning(f"读取配置查询共享缓存版本失败：{str(e)}")
+            return None
+
+    def get_or_load(self, key, loader):
+        """
+        读取缓存，未命中或已过期时依次读取Redis共享层、调用loader加载并缓存
+        loader返回空值（如查询失败返回的空列表）时不缓存，避免把数据库异常缓存到过期
+        :param key: 缓存键，格式: (表名, 查询名, 参数...)
+        """
+        client = self._shared_client()
+        version = self._shared_version(client) if client is not None else None
+        now = time.monotonic()
+        with self.lock:
+            item = self.items.get(key)
+            if item is not None and item[0] > now and item[2] == version:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return item[1]
+
+        value = None
+        if version is not None:
+            snapshot_key, field = f"{self.key_prefix}:v{version}", json.dumps(key, default=str)
+            try:
+                data = client.hmget(snapshot_key, [field])[0]
+                if data is not None:
+                    value = json.loads(data)
+            except redis.RedisError as e:
+                self.errors += 1
+                self.logger.warning(f"读取配置查询共享缓存失败：{str(e)}")
+
+        if value is not None:
+            with self.lock:
+                self.shared_hits += 1
+        else:
+            with self.lock:
+                self.misses += 1
+            value = loader()
+            if value and version is not None:
+                try:
+                    client.hset(snapshot_key, mapping={field: json.dumps(value, ensure_ascii=False, default=str)})
+                    client.expire(snapshot_key, self.ttl)
+                except redis.RedisError as e:
+                    self.errors += 1
+                    self.logger.warning(f"写入配置查询共享缓存失败：{str(e)}")
+
+        if value:
+            with self.lock:
+                self.items[key] = (time.monotonic() + self.ttl, value, version)
+                self.items.move_to_end(key)
+                while len(self.items) > self.maxsize:
+                    self.items.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def adjust(self, key, delta):
+        """
+        就地调整已缓存的计数（如新增/删除记录后更新总数），未缓存或已过期时不处理，下次读取重新加载
+        :param key: 缓存键
+        :param delta: 增量
+        """
+        with self.lock:
+            item = self.items.get(key)
+            if item is not None and item[0] > time.monotonic():
+                self.items[key] = (item[0], item[1] + delta, item[2])
+
+    def invalidate(self, table=None):
+        """
+        失效缓存（启用共享层时递增版本号，所有进程的缓存一起失效）
+        :param table: 表名，None表示清空全部
+        """
+        with self.lock:
+            if table is None:
+                self.items.clear()
+            else:
+                for key in [key for key in self.items if key[0] == table]:
+                    del self.items[key]
+            self.invalidations += 1
+
+        client = self._shared_client()
+        if client is not None:
+            try:
+                client.incr(self.version_key)
+            except redis.RedisError as e:
+                self.errors += 1
+                self.logger.warning(f"配置查询共享缓存版本更新失败：{str(e)}")
+
+    def stats(self):
+        shared = self.is_shared()
+        with self.lock:
+            total = self.hits + self.shared_hits + self.misses
+            return {
+                'shared': shared,
+                'size': len(self.items),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.shared_hits) / total, 3) if total else 0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'errors': self.errors
+            }
+
+
+# 全局配置查询缓存实例
+lookup_cache = LookupCache(ttl=LOOKUP_CACHE_CONFIG['ttl'], maxsize=LOOKUP_CACHE_CONFIG['maxsize'],
+                           key_prefix=LOOKUP_CACHE_CONFIG['key_prefix'])
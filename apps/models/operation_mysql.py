@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
+import time
+import random
+import threading
+
 import pymysql
 from dbutils.pooled_db import PooledDB
 
 from apps.models.logger_manager import LoggerManager
-from apps.config import MYSQL_CONFIG
+from apps.models.sql_stats import sql_stats
+from apps.config import Config, MYSQL_CONFIG, MYSQL_POOL_CONFIG, SQL_STATS_CONFIG
 
 db_user = MYSQL_CONFIG['user']
 db_password = MYSQL_CONFIG['passwd']
@@ -14,24 +19,173 @@ db_port = MYSQL_CONFIG['port']
 db_name = MYSQL_CONFIG['db_name']
 
 
+class _PooledConnection:
+    """连接池连接的代理：close时归还连接并更新借出计数（重复close只计一次）"""
+    def __init__(self, pool, conn, cursorclass=None):
+        """
+        :param cursorclass: 默认游标类型（SQLAlchemy原始连接的游标默认为元组游标，需指定DictCursor）
+        """
+        self._pool = pool
+        self._conn = conn
+        self._cursorclass = cursorclass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, cursorclass=None):
+        cursorclass = cursorclass or self._cursorclass
+        return self._conn.cursor(cursorclass) if cursorclass else self._conn.cursor()
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            try:
+                conn.close()
+            finally:
+                self._pool._release()
+
+    def __del__(self):
+        self.close()
+
+
+class SharedMysqlPool:
+    """
+    单个DSN的共享连接池：首次获取连接时才创建PooledDB，并统计借出数、等待次数和等待耗时
+    绑定SQLAlchemy engine后改为从engine的连接池借出原始连接（沿用其pre_ping/recycle），不再创建PooledDB
+    """
+    def __init__(self, dsn, pool_config):
+        self.dsn = dsn
+        self.pool_config = pool_config
+        self.pool = None
+        self.engine = None
+        self.lock = threading.Lock()
+        self.checked_out = 0       # 当前借出的连接数
+        self.peak_checked_out = 0  # 借出连接数的最高值
+        self.acquired = 0          # 累计获取连接次数
+        self.waits = 0             # 连接数达到上限、需要等待的次数
+        self.wait_time = 0.0       # 累计等待耗时（秒）
+        self.failures = 0          # 获取连接失败次数
+
+    def bind_engine(self, engine):
+        """改由SQLAlchemy engine提供连接，已创建的PooledDB关闭"""
+        with self.lock:
+            self.engine = engine
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.close()
+
+    def max_connections(self):
+        if self.engine is not None:
+            # engine按 SQLALCHEMY_ENGINE_OPTIONS 创建（Flask应用及作业执行进程均如此）
+            options = Config.SQLALCHEMY_ENGINE_OPTIONS
+            return options['pool_size'] + options['max_overflow']
+        return self.pool_config['maxconnections']
+
+    def pool_checked_out(self):
+        """
+        连接池当前借出的连接数：engine的连接池同时供ORM使用，以连接池自身的计数为准；
+        PooledDB只由本对象借出，即本对象的借出计数
+        """
+        if self.engine is not None:
+            return self.engine.pool.checkedout()
+        return self.checked_out
+
+    def _get_pool(self):
+        with self.lock:
+            if self.engine is not None:
+                return None
+            if self.pool is None:
+                self.pool = PooledDB(
+                    creator=pymysql,
+                    cursorclass=pymysql.cursors.DictCursor,
+                    **self.pool_config,
+                    **self.dsn
+                )
+            return self.pool
+
+    def connection(self):
+        """获取连接（用完close归还连接池）"""
+        pool = self._get_pool()
+        with self.lock:
+            must_wait = self.pool_checked_out() >= self.max_connections()
+        start = time.monotonic()
+        try:
+            conn = pool.connection() if pool is not None else self.engine.raw_connection()
+        except Exception:
+            with self.lock:
+                self.failures += 1
+            raise
+        elapsed = time.monotonic() - start
+        with self.lock:
+            self.acquired += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+            if must_wait:
+                self.waits += 1
+                self.wait_time += elapsed
+        return _PooledConnection(self, conn, None if pool is not None else pymysql.cursors.DictCursor)
+
+    def _release(self):
+        with self.lock:
+            self.checked_out -= 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                'dsn': f"{self.dsn['user']}@{self.dsn['host']}:{self.dsn['port']}/{self.dsn['database']}",
+                'backend': 'sqlalchemy' if self.engine is not None else 'pooleddb',
+                'created': self.pool is not None or self.engine is not None,
+                'max_connections': self.max_connections(),
+                'checked_out': self.checked_out,
+                'pool_checked_out': self.pool_checked_out(),
+                'peak_checked_out': self.peak_checked_out,
+                'acquired': self.acquired,
+                'waits': self.waits,
+                'wait_time': round(self.wait_time, 3),
+                'failures': self.failures
+            }
+
+
+class MysqlPoolRegistry:
+    """MySQL连接池注册表：每个进程内同一DSN只创建一个连接池，供所有MysqlConfig实例共享"""
+    def __init__(self, pool_config=None):
+        self.pool_config = pool_config or MYSQL_POOL_CONFIG
+        self.pools = {}
+        self.lock = threading.Lock()
+
+    def get(self, host, port, user, password, database, charset):
+        key = (host, port, user, password, database, charset)
+        with self.lock:
+            pool = self.pools.get(key)
+            if pool is None:
+                dsn = {'host': host, 'port': port, 'user': user, 'password': password,
+                       'database': database, 'charset': charset}
+                pool = self.pools[key] = SharedMysqlPool(dsn, self.pool_config)
+            return pool
+
+    def bind_engine(self, engine, host=db_host, port=db_port, user=db_user, password=db_password,
+                    database=db_name, charset='utf8mb4'):
+        """
+        将DSN（默认为业务库）绑定到SQLAlchemy engine，MysqlConfig与ORM共用engine的连接池
+        """
+        self.get(host, port, user, password, database, charset).bind_engine(engine)
+
+    def stats(self):
+        """所有连接池的统计信息"""
+        with self.lock:
+            pools = list(self.pools.values())
+        return [pool.stats() for pool in pools]
+
+
+# 全局连接池注册表
+pool_registry = MysqlPoolRegistry()
+
+
 class MysqlConfig:
     def __init__(self, host=db_host, port=db_port, user=db_user, password=db_password, database=db_name, charset='utf8mb4'):
         self.logger = LoggerManager()
-        self.pool = PooledDB(
-            creator=pymysql,
-            maxconnections=10,
-            mincached=2,
-            maxcached=5,
-            maxshared=3,
-            blocking=True,
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database,
-            charset=charset,
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        # 同一DSN共享进程内的连接池，实例化不再新建连接
+        self.pool = pool_registry.get(host, port, user, password, database, charset)
 
     def connect_pool(self):
         """获取连接池中的连接"""
@@ -41,6 +195,20 @@ class MysqlConfig:
             self.logger.error(f"[FAIL]获取数据库连接失败：{e}")
             return None
 
+    def _record_statement(self, kind, sql, params, elapsed, rows, error=None):
+        """
+        记录语句耗时：慢查询和失败全部写日志，普通语句按抽样比例写日志，均计入指纹统计
+        :param kind: 查询 | 更新
+        """
+        slow = elapsed >= SQL_STATS_CONFIG['slow_threshold']
+        sql_stats.record(sql, elapsed, rows=rows, error=error is not None, slow=slow)
+        if error is not None:
+            self.logger.error(f"[FAIL]{kind}执行失败：{error}. 耗时: {elapsed * 1000:.1f}ms. SQL: {sql}, Params: {params}")
+        elif slow:
+            self.logger.warning(f"[SLOW]慢{kind}. 耗时: {elapsed * 1000:.1f}ms, 行数: {rows}. SQL: {sql}, Params: {params}")
+        elif random.random() < SQL_STATS_CONFIG['sample_rate']:
+            self.logger.info(f"[SUCCESS]{kind}成功. 耗时: {elapsed * 1000:.1f}ms, 行数: {rows}. SQL: {sql}, Params: {params}")
+
     def execute_query(self, sql, params=None):
         """
         执行查询操作（参数化SQL）
@@ -52,15 +220,16 @@ class MysqlConfig:
         if not conn:
             return []
 
+        start = time.monotonic()
         try:
             with conn.cursor() as cursor:
                 # 执行参数化查询，避免SQL注入
                 cursor.execute(sql, params or ())
                 result = cursor.fetchall()
-                self.logger.info(f"[SUCCESS]查询成功. SQL: {sql}, Params: {params}")
+                self._record_statement('查询', sql, params, time.monotonic() - start, len(result))
                 return result
         except Exception as e:
-            self.logger.error(f"[FAIL]查询执行失败：{e}. SQL: {sql}, Params: {params}")
+            self._record_statement('查询', sql, params, time.monotonic() - start, 0, error=e)
             return []
         finally:
             if 'cursor' in locals():
@@ -80,17 +249,18 @@ class MysqlConfig:
         if not conn:
             return 0
 
+        start = time.monotonic()
         try:
             with conn.cursor() as cursor:
                 # 执行参数化更新
                 affected_rows = cursor.execute(sql, params or ())
                 conn.commit()
-                self.logger.info(f"[SUCCESS]更新成功. 受影响行数: {affected_rows}. SQL: {sql}, Params: {params}")
+                self._record_statement('更新', sql, params, time.monotonic() - start, affected_rows)
                 return affected_rows
         except Exception as e:
             if conn:
                 conn.rollback()
-            self.logger.error(f"[FAIL]更新操作失败：{e}. SQL: {sql}, Params: {params}")
+            self._record_statement('更新', sql, params, time.monotonic() - start, 0, error=e)
             return 0
         finally:
             if 'cursor' in locals():
@@ -99,6 +269,67 @@ class MysqlConfig:
                 # 连接返回连接池，而不是关闭MySQL的连接
                 conn.close()
 
+    def execute_transaction(self, statements):
+        """
+        在同一事务中执行多条增删改语句（全部成功才提交）
+        :param statements: 语句列表 [(sql, params)] 或 [(sql, params, 预期受影响行数)]，
+                           受影响行数与预期不符时回滚（用于版本号比对更新）
+        :return: 各语句受影响的行数列表，失败（已回滚）时返回None
+        """
+        conn = self.connect_pool()
+        if not conn:
+            return None
+
+        affected = []
+        try:
+            with conn.cursor() as cursor:
+                for statement in statements:
+                    sql, params = statement[:2]
+                    expected = statement[2] if len(statement) > 2 else None
+                    start = time.monotonic()
+                    try:
+                        affected_rows = cursor.execute(sql, params or ())
+                    except Exception as e:
+                        self._record_statement('更新', sql, params, time.monotonic() - start, 0, error=e)
+                        raise
+                    self._record_statement('更新', sql, params, time.monotonic() - start, affected_rows)
+                    if expected is not None and affected_rows != expected:
+                        raise RuntimeError(f"受影响行数{affected_rows}与预期{expected}不符. SQL: {sql}")
+                    affected.append(affected_rows)
+            conn.commit()
+            return affected
+        except Exception as e:
+            conn.rollback()
+            self.logger.error(f"[FAIL]事务执行失败，已回滚：{e}")
+            return None
+        finally:
+            # 连接返回连接池，而不是关闭MySQL的连接
+            conn.close()
+
+    def insert_get_id(self, sql, params=None):
+        """
+        插入一行并返回自增ID
+        :return: 自增ID，失败返回None
+        """
+        conn = self.connect_pool()
+        if not conn:
+            return None
+
+        start = time.monotonic()
+        try:
+            with conn.cursor() as cursor:
+                affected_rows = cursor.execute(sql, params or ())
+                conn.commit()
+                self._record_statement('更新', sql, params, time.monotonic() - start, affected_rows)
+                return cursor.lastrowid
+        except Exception as e:
+            conn.rollback()
+            self._record_statement('更新', sql, params, time.monotonic() - start, 0, error=e)
+            return None
+        finally:
+            # 连接返回连接池，而不是关闭MySQL的连接
+            conn.close()
+
     def insert_data(self, sql, params=None):
         """
         插入数据（参数化SQL）
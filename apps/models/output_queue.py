@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import time
+import threading
+from queue import Empty
+from collections import deque, OrderedDict
+
+
+class BoundedOutputQueue:
+    """
+    有界输出队列（线程安全，接口与queue.Queue的put/get/empty/qsize一致）
+    只限制脚本输出行（running/output），队列满时按策略丢弃或合并为“省略N行”摘要；
+    start/success/failed/error 等状态消息及终止信号(None)始终入队，保证前端能收到任务结果
+    """
+    # 可丢弃的输出行状态
+    DROPPABLE_STATUS = ('running', 'output')
+
+    def __init__(self, maxsize=10000, policy='summarize', block_timeout=1.0):
+        """
+        :param maxsize: 队列中输出行的上限
+        :param policy: 队列满时的处理策略
+                       summarize: 丢弃输出行，并在该任务的下一条消息前补一条“省略N行输出”
+                       drop: 直接丢弃输出行（仅计数）
+                       block: 等待读取方消费，超过block_timeout仍满则按summarize处理
+        :param block_timeout: block策略的最长等待时间（秒）
+        """
+        self.maxsize = maxsize
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.items = deque()
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        self.elided = OrderedDict()  # 待补发摘要的省略行数 {task_id: 行数}
+        self.high_water = 0          # 队列长度的最高水位
+        self.elided_total = 0        # 累计省略的输出行数
+
+    def _droppable(self, item):
+        return isinstance(item, dict) and item.get('status') in self.DROPPABLE_STATUS
+
+    def put(self, item, block=True, timeout=None):
+        with self.lock:
+            if self._droppable(item) and len(self.items) >= self.maxsize:
+                if self.policy == 'block':
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self.items) >= self.maxsize:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or not self.not_full.wait(remaining):
+                            break
+                if len(self.items) >= self.maxsize:
+                    task_id = item.get('task_id')
+                    self.elided[task_id] = self.elided.get(task_id, 0) + 1
+                    self.elided_total += 1
+                    return
+
+            if item is None:
+                # 终止前补发所有未发出的摘要
+                for task_id in list(self.elided):
+                    self._append_summary(task_id)
+            elif isinstance(item, dict) and item.get('task_id') in self.elided:
+                self._append_summary(item['task_id'])
+            self._append(item)
+
+    def _append_summary(self, task_id):
+        count = self.elided.pop(task_id)
+        if self.policy == 'drop':
+            return
+        self._append({
+            "task_id": task_id,
+            "status": "running",
+            "message": f"……读取过慢，省略{count}行输出……"
+        })
+
+    def _append(self, item):
+        self.items.append(item)
+        self.high_water = max(self.high_water, len(self.items))
+        self.not_empty.notify()
+
+    def get(self, block=True, timeout=None):
+        with self.lock:
+            if not block:
+                if not self.items:
+                    raise Empty
+            elif timeout is None:
+                while not self.items:
+                    self.not_empty.wait()
+            else:
+                deadline = time.monotonic() + timeout
+                while not self.items:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Empty
+                    self.not_empty.wait(remaining)
+            item = self.items.popleft()
+            self.not_full.notify()
+            return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def empty(self):
+        with self.lock:
+            return not self.items
+
+    def qsize(self):
+        with self.lock:
+            return len(self.items)
+
+    def stats(self):
+        """队列统计：上限、策略、最高水位、累计省略行数"""
+        with self.lock:
+            return {
+                'maxsize': self.maxsize,
+                'policy': self.policy,
+                'high_water': self.high_water,
+                'elided': self.elided_total
+            }
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import os
+import codecs
+import selectors
+import threading
+from collections import deque
+
+
+class _ProcessEntry:
+    """多路复用读取中的子进程"""
+    def __init__(self, process, on_line, on_exit):
+        self.process = process
+        self.on_line = on_line
+        self.on_exit = on_exit
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.partial = ''
+
+
+class ProcessMultiplexer:
+    """
+    子进程输出多路复用读取（单线程）
+    所有子进程的stdout管道注册到同一个selector，由一个事件循环线程读取并按行回调，
+    任务不再各占一个线程阻塞在管道读取上
+    """
+    def __init__(self, logger, poll_interval=0.5, read_size=65536):
+        """
+        :param poll_interval: 事件循环检查已关闭管道的进程是否退出的间隔（秒）
+        :param read_size: 单次读取的最大字节数
+        """
+        self.logger = logger
+        self.poll_interval = poll_interval
+        self.read_size = read_size
+        self.selector = selectors.DefaultSelector()
+        self.lock = threading.Lock()
+        self.pending = deque()  # 等待注册的进程（只在事件循环线程中操作selector）
+        self.exiting = []       # 管道已关闭、等待进程退出的进程
+        self.thread = None
+        self.wakeup_r, self.wakeup_w = os.pipe()
+        os.set_blocking(self.wakeup_r, False)
+        os.set_blocking(self.wakeup_w, False)
+        self.selector.register(self.wakeup_r, selectors.EVENT_READ, None)
+
+    def add(self, process, on_line, on_exit):
+        """
+        注册子进程（stdout需为二进制管道）
+        :param on_line: 每行输出的回调 on_line(line)
+        :param on_exit: 进程退出且输出读取完毕后的回调 on_exit(returncode)
+        """
+        os.set_blocking(process.stdout.fileno(), False)
+        with self.lock:
+            self.pending.append(_ProcessEntry(process, on_line, on_exit))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name='process-multiplexer', daemon=True)
+                self.thread.start()
+        self._wakeup()
+
+    def active_count(self):
+        """读取中的进程数"""
+        with self.lock:
+            return len(self.selector.get_map()) - 1 + len(self.pending) + len(self.exiting)
+
+    def _wakeup(self):
+        try:
+            os.write(self.wakeup_w, b'\0')
+        except BlockingIOError:
+            pass  # 管道已满说明事件循环尚未处理之前的唤醒，无需重复唤醒
+
+    def _loop(self):
+        while True:
+            timeout = self.poll_interval if self.exiting else None
+            for key, _ in self.selector.select(timeout):
+                if key.data is None:
+                    self._drain_wakeup()
+                else:
+                    self._read(key.fileobj, key.data)
+            self._register_pending()
+            self._reap()
+
+    def _drain_wakeup(self):
+        try:
+            while os.read(self.wakeup_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _register_pending(self):
+        with self.lock:
+            entries = list(self.pending)
+            self.pending.clear()
+        for entry in entries:
+            self.selector.register(entry.process.stdout, selectors.EVENT_READ, entry)
+
+    def _read(self, stdout, entry):
+        try:
+            data = os.read(stdout.fileno(), self.read_size)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self.logger.error(f"读取子进程({entry.process.pid})输出失败：{str(e)}")
+            data = b''
+
+        if data:
+            text = entry.partial + entry.decoder.decode(data)
+            *lines, entry.partial = text.split('\n')
+            for line in lines:
+                self._callback(entry.on_line, line.strip())
+            return
+
+        # 管道关闭：输出剩余内容，等待进程退出
+        text = entry.partial + entry.decoder.decode(b'', final=True)
+        if text.strip():
+            self._callback(entry.on_line, text.strip())
+        with self.lock:
+            self.selector.unregister(stdout)
+            self.exiting.append(entry)
+        stdout.close()
+
+    def _reap(self):
+        if not self.exiting:
+            return
+        with self.lock:
+            finished = [entry for entry in self.exiting if entry.process.poll() is not None]
+            self.exiting = [entry for entry in self.exiting if entry not in finished]
+        for entry in finished:
+            self._callback(entry.on_exit, entry.process.returncode)
+
+    def _callback(self, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            self.logger.error(f"子进程输出回调异常：{str(e)}")
+
+
+# 全局多路复用实例（首次使用时创建事件循环线程）
+_multiplexer = None
+_multiplexer_lock = threading.Lock()
+
+
+def get_multiplexer(logger):
+    global _multiplexer
+    with _multiplexer_lock:
+        if _multiplexer is None:
+            _multiplexer = ProcessMultiplexer(logger)
+        return _multiplexer
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import re
+import threading
+from collections import deque
+
+from apps.config import SQL_STATS_CONFIG
+
+
+class SqlStats:
+    """SQL执行统计（线程安全）：按语句指纹汇总执行次数、耗时分位数和行数"""
+    # 指纹归一化：字符串/数字字面量、占位符替换为?，IN列表合并，空白压缩
+    _STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+    _NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+    _PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+    _IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+    _SPACE = re.compile(r"\s+")
+
+    def __init__(self, samples=1000, max_fingerprints=500):
+        """
+        :param samples: 每个指纹保留的最近耗时样本数（用于计算分位数）
+        :param max_fingerprints: 最多统计的指纹数，超过后归入“其他”
+        """
+        self.lock = threading.Lock()
+        self.samples = samples
+        self.max_fingerprints = max_fingerprints
+        self.statements = {}  # 格式: {fingerprint: {'count', 'errors', 'slow', 'rows', 'total_time', 'max_time', 'times'}}
+
+    @classmethod
+    def fingerprint(cls, sql):
+        """SQL语句指纹（去掉参数值，同一语句模板归为一类）"""
+        sql = cls._STRING.sub('?', sql)
+        sql = cls._PLACEHOLDER.sub('?', sql)
+        sql = cls._NUMBER.sub('?', sql)
+        sql = cls._IN_LIST.sub('(?+)', sql)
+        return cls._SPACE.sub(' ', sql).strip().rstrip(';')
+
+    def record(self, sql, elapsed, rows=0, error=False, slow=False):
+        """
+        记录一次SQL执行
+        :param elapsed: 耗时（秒）
+        :param rows: 返回行数/受影响行数
+        """
+        key = self.fingerprint(sql)
+        with self.lock:
+            stat = self.statements.get(key)
+            if stat is None:
+                if len(self.statements) >= self.max_fingerprints:
+                    key = '其他'
+                    stat = self.statements.get(key)
+                if stat is None:
+                    stat = self.statements[key] = {
+                        'count': 0, 'errors': 0, 'slow': 0, 'rows': 0,
+                        'total_time': 0.0, 'max_time': 0.0, 'times': deque(maxlen=self.samples)
+                    }
+            stat['count'] += 1
+            stat['errors'] += 1 if error else 0
+            stat['slow'] += 1 if slow else 0
+            stat['rows'] += rows or 0
+            stat['total_time'] += elapsed
+            stat['max_time'] = max(stat['max_time'], elapsed)
+            stat['times'].append(elapsed)
+
+    @staticmethod
+    def _percentile(sorted_times, percent):
+        index = min(len(sorted_times) - 1, int(len(sorted_times) * percent / 100))
+        return sorted_times[index]
+
+    def get_stats(self, limit=50):
+        """
+        获取按总耗时倒序的指纹汇总（耗时单位：毫秒）
+        :param limit: 返回的指纹数
+        """
+        with self.lock:
+            items = [(key, dict(stat, times=sorted(stat['times']))) for key, stat in self.statements.items()]
+        items.sort(key=lambda item: item[1]['total_time'], reverse=True)
+        result = []
+        for key, stat in items[:limit]:
+            times = stat['times']
+            result.append({
+                'fingerprint': key,
+                'count': stat['count'],
+                'errors': stat['errors'],
+                'slow': stat['slow'],
+                'rows': stat['rows'],
+                'avg_rows': round(stat['rows'] / stat['count'], 1),
+                'total_ms': round(stat['total_time'] * 1000, 1),
+                'p50_ms': round(self._percentile(times, 50) * 1000, 2),
+                'p99_ms': round(self._percentile(times, 99) * 1000, 2),
+                'max_ms': round(stat['max_time'] * 1000, 2)
+            })
+        return result
+
+    def reset(self):
+        """重置统计数据"""
+        with self.lock:
+            self.statements = {}
+
+
+# 全局单例SQL统计实例
+sql_stats = SqlStats(samples=SQL_STATS_CONFIG['samples'], max_fingerprints=SQL_STATS_CONFIG['max_fingerprints'])
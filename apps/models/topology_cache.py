@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import json
+import time
+import threading
+from collections import defaultdict
+
+import redis
+
+from apps.config import TOPOLOGY_CACHE_CONFIG, LOOKUP_CACHE_CONFIG
+from apps.models.lookup_cache import lookup_cache
+from apps.models.logger_manager import LoggerManager
+
+
+class InProcessRedis:
+    """
+    进程内的Redis替身（redis_url配置为memory://时使用），只实现拓扑缓存用到的命令，
+    用于本地开发和测试，不跨进程共享
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}
+        self.expires = {}
+
+    def _alive(self, key):
+        expire_at = self.expires.get(key)
+        if expire_at is not None and expire_at <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def get(self, key):
+        with self.lock:
+            return self.data.get(key) if self._alive(key) else None
+
+    def set(self, key, value, nx=False):
+        with self.lock:
+            if nx and self._alive(key):
+                return None
+            self.data[key] = str(value)
+            self.expires.pop(key, None)
+            return True
+
+    def incr(self, key):
+        return self.incrby(key, 1)
+
+    def incrby(self, key, amount):
+        with self.lock:
+            value = int(self.data.get(key, 0) if self._alive(key) else 0) + amount
+            self.data[key] = str(value)
+            return value
+
+    def delete(self, key):
+        with self.lock:
+            self.expires.pop(key, None)
+            return int(self.data.pop(key, None) is not None)
+
+    def hmget(self, key, fields):
+        with self.lock:
+            values = self.data.get(key, {}) if self._alive(key) else {}
+            return [values.get(field) for field in fields]
+
+    def hset(self, key, mapping):
+        with self.lock:
+            if not self._alive(key):
+                self.data[key] = {}
+            self.data[key].update(mapping)
+            return len(mapping)
+
+    def expire(self, key, seconds):
+        with self.lock:
+            if not self._alive(key):
+                return False
+            self.expires[key] = time.monotonic() + seconds
+            return True
+
+
+class TopologyCache:
+    """
+    跨worker共享的区服拓扑缓存（二级缓存）：
+    Redis中保存版本号和按版本划分的拓扑快照（每个渠道一个哈希字段，内容为该渠道的区服及主机信息），
+    进程内缓存当前版本已读取的渠道；写入区服/服务器表后递增版本号，各worker发现版本变化后从Redis重新读取，
+    Redis中也没有的渠道才查询MySQL并回填到当前版本的快照
+    """
+    def __init__(self, client, key_prefix='ops_game:topology', ttl=3600):
+        """
+        :param client: Redis客户端（或InProcessRedis）
+        :param key_prefix: Redis键前缀
+        :param ttl: 快照的过期时间（秒），旧版本快照到期自动清理
+        """
+        self.client = client
+        self.key_prefix = key_prefix
+        self.ttl = ttl
+        self.logger = LoggerManager()
+        self.lock = threading.Lock()
+        self.local_version = None
+        self.local = {}        # 当前版本已读取的渠道拓扑 {渠道: [区服信息]}
+        self.local_hits = 0    # 进程内缓存命中的渠道数
+        self.redis_hits = 0    # 从Redis快照读取的渠道数
+        self.loads = 0         # 从MySQL加载的渠道数
+        self.errors = 0        # Redis异常次数（异常时直接查询MySQL）
+
+    @property
+    def version_key(self):
+        return f"{self.key_prefix}:version"
+
+    def _snapshot_key(self, version):
+        return f"{self.key_prefix}:snapshot:{version}"
+
+    def version(self):
+        """当前拓扑版本号（不存在时初始化为1）"""
+        value = self.client.get(self.version_key)
+        if value is None:
+            self.client.set(self.version_key, 1, nx=True)
+            value = self.client.get(self.version_key)
+        return int(value)
+
+    def bump(self):
+        """拓扑数据已变更：递增版本号，所有worker下次读取时改用新版本的快照"""
+        try:
+            version = self.client.incr(self.version_key)
+            self.logger.info(f"区服拓扑缓存版本更新为{version}")
+        except redis.RedisError as e:
+            self.errors += 1
+            self.logger.warning(f"区服拓扑缓存版本更新失败：{str(e)}")
+        with self.lock:
+            self.local_version = None
+            self.local = {}
+
+    def get_channels(self, channels, loader):
+        """
+        获取渠道的区服拓扑
+        :param channels: 渠道列表
+        :param loader: 从MySQL加载的函数 loader(渠道列表) -> 区服信息列表（含channel_name，按id排序）
+        :return: 区服信息列表（按渠道顺序拼接，渠道内保持loader的顺序）
+        """
+        try:
+            version = self.version()
+        except redis.RedisError as e:
+            self.errors += 1
+            self.logger.warning(f"读取区服拓扑缓存失败，直接查询数据库：{str(e)}")
+            return loader(channels)
+
+        with self.lock:
+            if self.local_version != version:
+                self.local_version = version
+                self.local = {}
+            found = {channel: self.local[channel] for channel in channels if channel in self.local}
+            self.local_hits += len(found)
+
+        missing = [channel for channel in channels if channel not in found]
+        if missing:
+            snapshot_key = self._snapshot_key(version)
+            try:
+                for channel, value in zip(missing, self.client.hmget(snapshot_key, missing)):
+                    if value is not None:
+                        found[channel] = json.loads(value)
+                        self.redis_hits += 1
+            except redis.RedisError as e:
+                self.errors += 1
+                self.logger.warning(f"读取区服拓扑快照失败：{str(e)}")
+
+            unloaded = [channel for channel in missing if channel not in found]
+            if unloaded:
+                rows_by_channel = defaultdict(list)
+                for row in loader(unloaded):
+                    rows_by_channel[row['channel_name']].append(row)
+                loaded = {channel: rows_by_channel.get(channel, []) for channel in unloaded}
+                found.update(loaded)
+                self.loads += len(unloaded)
+                # 查询失败时loader返回空列表，空渠道不回填缓存，下次重新查询
+                snapshot = {channel: json.dumps(rows, ensure_ascii=False, default=str)
+                            for channel, rows in loaded.items() if rows}
+                if snapshot:
+                    try:
+                        self.client.hset(snapshot_key, mapping=snapshot)
+                        self.client.expire(snapshot_key, self.ttl)
+                    except redis.RedisError as e:
+                        self.errors += 1
+                        self.logger.warning(f"写入区服拓扑快照失败：{str(e)}")
+
+            with self.lock:
+                if self.local_version == version:
+                    self.local.update({channel: found[channel] for channel in missing if found[channel]})
+
+        return [row for channel in channels for row in found[channel]]
+
+    def _count_key(self, table):
+        return f"{self.key_prefix}:count:{table}"
+
+    def get_count(self, table, loader, ttl):
+        """
+        表记录总数：所有worker共用Redis中的计数，不存在时调用loader统计并写入
+        :param loader: 统计函数 loader() -> 记录数
+        :param ttl: 计数的过期时间（秒），到期后重新统计（兜底直接改库等未经过adjust_count的变更）
+        """
+        key = self._count_key(table)
+        try:
+            value = self.client.get(key)
+        except redis.RedisError as e:
+            self.errors += 1
+            self.logger.warning(f"读取{table}记录数缓存失败，直接查询数据库：{str(e)}")
+            return loader()
+        if value is not None:
+            return int(value)
+
+        count = loader()
+        try:
+            # 统计期间其他worker已写入计数时保留已有值
+            if self.client.set(key, count, nx=True):
+                self.client.expire(key, ttl)
+        except redis.RedisError as e:
+            self.errors += 1
+            self.logger.warning(f"写入{table}记录数缓存失败：{str(e)}")
+        return count
+
+    def adjust_count(self, table, delta):
+        """
+        新增/删除记录后用INCRBY原子调整计数，所有worker立即读到新值
+        计数不存在（未统计或已过期）时INCRBY会从0新建出等于delta的值，此时删除该键，由下次读取重新统计
+        """
+        key = self._count_key(table)
+        try:
+            if self.client.incrby(key, delta) == delta:
+                self.client.delete(key)
+        except redis.RedisError as e:
+            self.errors += 1
+            self.logger.warning(f"调整{table}记录数缓存失败：{str(e)}")
+
+    def stats(self):
+        return {
+            'version': self.local_version,
+            'local_hits': self.local_hits,
+            'redis_hits': self.redis_hits,
+            'loads': self.loads,
+            'errors': self.errors
+        }
+
+
+# 全局拓扑缓存实例（未启用时为None，首次使用时创建）
+_topology_cache = None
+_topology_cache_lock = threading.Lock()
+
+
+def get_topology_cache():
+    global _topology_cache
+    if not TOPOLOGY_CACHE_CONFIG['enabled']:
+        return None
+    with _topology_cache_lock:
+        if _topology_cache is None:
+            url = TOPOLOGY_CACHE_CONFIG['redis_url']
+            if url.startswith('memory://'):
+                client = InProcessRedis()
+            else:
+                client = redis.Redis.from_url(url, socket_timeout=TOPOLOGY_CACHE_CONFIG['socket_timeout'],
+                                              decode_responses=True)
+            _topology_cache = TopologyCache(client, TOPOLOGY_CACHE_CONFIG['key_prefix'], TOPOLOGY_CACHE_CONFIG['ttl'])
+        return _topology_cache
+
+
+def invalidate_topology():
+    """区服/服务器数据变更后调用（未启用拓扑缓存时不做处理）"""
+    cache = get_topology_cache()
+    if cache is not None:
+        cache.bump()
+
+
+def get_table_count(table, loader):
+    """表记录总数（启用共享缓存时各worker共用Redis中的计数，未启用时缓存在进程内，其他worker依赖TTL过期）"""
+    cache = get_topology_cache()
+    if cache is None:
+        return lookup_cache.get_or_load((table, 'count'), loader)
+    return cache.get_count(table, loader, LOOKUP_CACHE_CONFIG['ttl'])
+
+
+def adjust_table_count(table, delta):
+    """新增/删除记录后调整表记录总数缓存"""
+    cache = get_topology_cache()
+    if cache is None:
+        lookup_cache.adjust((table, 'count'), delta)
+    else:
+        cache.adjust_count(table, delta)
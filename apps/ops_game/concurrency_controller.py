@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import math
+import time
+import threading
+from statistics import median
+
+
+class AdaptiveConcurrency:
+    """
+    自适应并发控制器（线程安全，加性增/乘性减）
+    每个统计窗口内：任务耗时平稳且失败率低时并发+1；耗时明显上升时并发-1；
+    超时或失败（返回码非0）达到阈值时立即减半，不等待窗口结束
+    """
+    def __init__(self, initial, min_limit, max_limit, window=10, failure_threshold=0.2,
+                 latency_tolerance=1.5, on_change=None):
+        """
+        :param initial: 初始并发数
+        :param min_limit: 最小并发数
+        :param max_limit: 最大并发数
+        :param window: 统计窗口（完成的任务数）
+        :param failure_threshold: 失败率阈值（超过则减半）
+        :param latency_tolerance: 耗时容忍倍数（窗口耗时中位数超过基准耗时的倍数则降低并发）
+        :param on_change: 并发调整回调 on_change(change)
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = max(min_limit, min(initial, max_limit))
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.latency_tolerance = latency_tolerance
+        self.on_change = on_change
+        self.lock = threading.Lock()
+        self.durations = []   # 当前窗口内的任务耗时
+        self.failures = 0     # 当前窗口内的失败（含超时）次数
+        self.baseline = None  # 基准耗时（窗口耗时中位数的滑动平均）
+        self.changes = []     # 调整记录
+
+    def record(self, duration, failed):
+        """
+        记录一个任务的执行结果
+        :param duration: 任务耗时（秒）
+        :param failed: 是否失败（返回码非0或执行异常；超时被终止的任务返回码非0，同样计为失败）
+        """
+        with self.lock:
+            change = self._evaluate(duration, failed)
+        # 回调在释放锁之后执行，回调中可以安全调用snapshot()
+        if change and self.on_change:
+            self.on_change(change)
+
+    def _evaluate(self, duration, failed):
+        """在持锁状态下更新窗口统计，返回本次的调整记录（无调整返回None）"""
+        self.durations.append(duration)
+        if failed:
+            self.failures += 1
+
+        # 失败达到阈值时立即降低并发
+        if self.failures >= max(1, math.ceil(self.window * self.failure_threshold)):
+            change = self._adjust(max(self.min_limit, self.limit // 2),
+                                  f"失败/超时任务达到{self.failures}个，并发减半")
+            self._reset_window()
+            return change
+
+        if len(self.durations) < self.window:
+            return None
+
+        window_median = median(self.durations)
+        if self.baseline is not None and window_median > self.baseline * self.latency_tolerance:
+            change = self._adjust(max(self.min_limit, self.limit - 1),
+                                  f"任务耗时中位数{window_median:.1f}秒，超过基准{self.baseline:.1f}秒的"
+                                  f"{self.latency_tolerance}倍，并发-1")
+        else:
+            self.baseline = window_median if self.baseline is None \
+                else self.baseline * 0.8 + window_median * 0.2
+            change = self._adjust(min(self.max_limit, self.limit + 1),
+                                  f"任务耗时平稳（中位数{window_median:.1f}秒）且失败率低，并发+1")
+        self._reset_window()
+        return change
+
+    def _reset_window(self):
+        self.durations = []
+        self.failures = 0
+
+    def _adjust(self, new_limit, reason):
+        if new_limit == self.limit:
+            return None
+        change = {
+            'time': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'from': self.limit,
+            'to': new_limit,
+            'reason': reason
+        }
+        self.limit = new_limit
+        self.changes.append(change)
+        return change
+
+    def snapshot(self):
+        """获取当前并发数及调整记录（副本）"""
+        with self.lock:
+            return {
+                'current': self.limit,
+                'min': self.min_limit,
+                'max': self.max_limit,
+                'changes': list(self.changes)
+            }
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
-import json
 
 from apps.models.operation_mysql import MysqlConfig
+from apps.models.lookup_cache import lookup_cache
+from apps.models.topology_cache import get_topology_cache, invalidate_topology, adjust_table_count
 from apps.config import MYSQL_CONFIG
 from apps.models.logger_manager import LoggerManager
 
@@ -17,30 +18,24 @@ channel_list = MYSQL_CONFIG['channel_list']
 reload_url_list = MYSQL_CONFIG['reload_url_list']
 server_list = MYSQL_CONFIG['server_list']
 mysql_list = MYSQL_CONFIG['mysql_list']
-operation_game_list = MYSQL_CONFIG['operation_game_list']
 
 
 class GameDBUtil:
     """游戏数据库操作工具类"""
-    @staticmethod
-    def query_game_list() -> str:
-        """查询当前操作游戏列表"""
-        sql = f"SELECT operation_game_list FROM {operation_game_list} WHERE id=1;"
-        game_list = db_manager.execute_query(sql)
-        return game_list[0]['operation_game_list'] if game_list else ""
-
     @staticmethod
     def get_external_switch(channel):
         """获取渠道的内外网开关状态"""
         sql = f"SELECT `external_switch` FROM `{channel_list}` WHERE `channel_name` = %s"
-        result = db_manager.execute_query(sql, (channel,))
+        result = lookup_cache.get_or_load(
+            (channel_list, 'external_switch', channel), lambda: db_manager.execute_query(sql, (channel,)))
         return result[0]['external_switch'] if result else 0
 
     @staticmethod
     def get_channel_initial_id(channel):
         """获取渠道的游戏服初始zone_id"""
         sql = f"SELECT `initial_id` FROM `{channel_list}` WHERE `channel_name` = %s"
-        result = db_manager.execute_query(sql, (channel,))
+        result = lookup_cache.get_or_load(
+            (channel_list, 'initial_id', channel), lambda: db_manager.execute_query(sql, (channel,)))
         return result[0]['initial_id']
 
     @staticmethod
@@ -72,9 +67,58 @@ class GameDBUtil:
     def get_reload_url(reload_type):
         """获取热更相关URL"""
         sql = f'SELECT reload_url FROM {reload_url_list} WHERE reload_type=%s'
-        result = db_manager.execute_query(sql, (reload_type,))
+        result = lookup_cache.get_or_load(
+            (reload_url_list, 'reload_url', reload_type), lambda: db_manager.execute_query(sql, (reload_type,)))
         return result[0]['reload_url'] if result else ''
 
+    @staticmethod
+    def get_channels_info(channels):
+        """批量获取渠道的内外网开关和初始zone_id（按渠道名索引）"""
+        if not channels:
+            return {}
+        placeholders = ', '.join(['%s'] * len(channels))
+        sql = (f"SELECT `channel_name`, `external_switch`, `initial_id` FROM `{channel_list}` "
+               f"WHERE `channel_name` IN ({placeholders}) ORDER BY `id`")
+        result = lookup_cache.get_or_load(
+            (channel_list, 'channels_info', tuple(channels)), lambda: db_manager.execute_query(sql, tuple(channels)))
+        channels_info = {}
+        for row in result:
+            channels_info.setdefault(row['channel_name'], row)
+        return channels_info
+
+    @staticmethod
+    def get_reload_url_map():
+        """一次性获取所有热更URL（按热更类型索引）"""
+        sql = f'SELECT reload_type, reload_url FROM {reload_url_list} ORDER BY id'
+        result = lookup_cache.get_or_load((reload_url_list, 'reload_url_map'), lambda: db_manager.execute_query(sql))
+        reload_urls = {}
+        for row in result:
+            reload_urls.setdefault(row['reload_type'], row['reload_url'])
+        return reload_urls
+
+    @staticmethod
+    def get_channels_game_servers(channels):
+        """
+        批量获取渠道下的所有区服信息，关联server_list获取服务器外网IP
+        启用拓扑共享缓存时优先读取Redis中当前版本的快照
+        """
+        if not channels:
+            return []
+        cache = get_topology_cache()
+        if cache is not None:
+            return cache.get_channels(list(channels), GameDBUtil._query_channels_game_servers)
+        return GameDBUtil._query_channels_game_servers(channels)
+
+    @staticmethod
+    def _query_channels_game_servers(channels):
+        """从数据库查询渠道下的所有区服信息（按区服id排序）"""
+        placeholders = ', '.join(['%s'] * len(channels))
+        sql = (f"SELECT g.id, g.channel_name, g.server_type, g.game_nu, g.server_dir, g.intranet_ip, "
+               f"g.external_ip, g.http_port, s.external_ip AS server_external_ip "
+               f"FROM {game_list_table} g LEFT JOIN {server_list_table} s ON s.intranet_ip = g.intranet_ip "
+               f"WHERE g.channel_name IN ({placeholders}) ORDER BY g.id, s.id")
+        return db_manager.execute_query(sql, tuple(channels))
+
     @staticmethod
     def get_server_list(channel, server_type=None, other_type=None):
         """获取服务器列表"""
@@ -99,7 +143,8 @@ class GameDBUtil:
     def get_http_port(channel, field):
         """获取区服http端口列表"""
         sql = f'SELECT {field} FROM {channel_list} WHERE `channel_name`=%s'
-        result = db_manager.execute_query(sql, (channel,))
+        result = lookup_cache.get_or_load(
+            (channel_list, 'http_port', channel, field), lambda: db_manager.execute_query(sql, (channel,)))
         return result[0][field] if result else None
 
     @staticmethod
@@ -109,23 +154,8 @@ class GameDBUtil:
                f"`external_ip`, `intranet_ip`, `server_db_ip`, `server_db_name`, `game_status`, `http_port`) "
                f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)")
         result = db_manager.insert_data(sql, params)
+        if result:
+            invalidate_topology()
+            # 游戏服管理列表的总数缓存
+            adjust_table_count(game_list_table, result)
         return result
-
-    @staticmethod
-    def write_operation_game_list(filter_list):
-        """处理查询结果并写入操作游戏列表"""
-        try:
-            # 清空并写入新数据（使用参数化更新避免SQL语法错误）
-            clear_sql = f"UPDATE operation_game_list SET {operation_game_list} = '' WHERE id = 1;"
-            db_manager.execute_update(clear_sql)
-
-            # 写入新数据（JSON序列化）
-            filter_json = json.dumps(filter_list)
-            update_sql = f"UPDATE operation_game_list SET {operation_game_list} = %s WHERE id = 1;"
-            status = db_manager.execute_update(update_sql, (filter_json,))
-
-            return filter_list if status == 1 else 0
-
-        except Exception as e:
-            logger.error(f"写入操作游戏列表失败：{str(e)}")
-            return 0
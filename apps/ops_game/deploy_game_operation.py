@@ -1,13 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
+from apps.models.interval_set import IntervalSet
 from apps.models.logger_manager import LoggerManager
 from apps.ops_game.db_utils import GameDBUtil
+from apps.ops_game.operation_list_store import operation_list_store
 
 
 class AddGameApp:
-    def __init__(self, channel_name, game_type, max_game, init_number):
+    def __init__(self, channel_name, game_type, max_game, init_number, owner=None):
         self.logger = LoggerManager()
+        # 发起人：部署完成后新区服写入其操作列表
+        self.owner = owner
+        self.operation_list = None
         self.channel_name = channel_name
         self.game_type = game_type
         self.max_game = max_game
@@ -39,7 +44,8 @@ class AddGameApp:
             return 'error', '获取不到最大区服'
 
         # 生成要装服的操作列表
-        filter_list = {self.channel_name: {self.game_type: [self.max_game + i for i in range(1, self.init_number + 1)]}}
+        game_nus = IntervalSet([(self.max_game + 1, self.max_game + self.init_number)])
+        filter_list = {self.channel_name: {self.game_type: game_nus}}
 
         # 先获取服务器列表，后续用于Game部署
         server_list_info = GameDBUtil.get_server_list(self.channel_name, server_type='Game')
@@ -150,8 +156,8 @@ class AddGameApp:
             if n >= init_number:
                 message = f'该渠道({self.channel_name})下的区服类型({self.game_type})部署了{n}个区服完成'
                 self.logger.info(message)
-                write_status = GameDBUtil.write_operation_game_list(filter_list)
-                if write_status == 0:
+                self.operation_list = operation_list_store.save(self.owner, filter_list)
+                if self.operation_list is None:
                     return 'error', '列表信息写入到操作列表中失败'
                 return 'success', message
             n += 1
@@ -1,128 +1,44 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
+import time
 from typing import Tuple, List, Dict, Optional
 
 from apps.config import MYSQL_CONFIG
-from apps.ops_game.db_utils import GameDBUtil
+from apps.models.interval_set import IntervalSet
+from apps.ops_game.operation_list_store import OperationList, operation_list_store
 from apps.models.operation_mysql import MysqlConfig
 from apps.models.logger_manager import LoggerManager
 
 
-def parse_game_nu(game_nu_str: Optional[str], return_full_list: bool = False
-                  ) -> Tuple[List[Tuple[int, int]], List[int]] | List[int]:
+def parse_game_nu(game_nu_str: Optional[str]) -> IntervalSet:
     """
-    解析区服字符串（支持混合格式）
+    解析区服字符串（支持混合格式，不展开区间）
     :param game_nu_str: 区服字符串（如1,3,4_5,7,8_10,20）
-    :param return_full_list: 是否返回完整的区服列表
-    :return: 若return_full_list=True，返回排序后的完整区服列表；否则返回(ranges, singles)
+    :return: 区服区间集合（重叠、相邻的区间已合并）
     """
-    ranges = []
-    singles = []
-
-    if not game_nu_str:
-        return [] if return_full_list else (ranges, singles)
-
-    # 清理输入
-    cleaned_str = game_nu_str.strip().strip(',')
-    items = [item.strip() for item in cleaned_str.split(',') if item.strip()]
-
-    for item in items:
-        if '_' in item:
-            try:
-                start, end = map(int, item.split('_', 1))
-                if start <= end:
-                    ranges.append((start, end))
-            except (ValueError, IndexError):
-                continue
-        else:
-            try:
-                singles.append(int(item))
-            except ValueError:
-                continue
-
-    # 若需要返回完整列表：合并范围+单个区服并排序
-    if return_full_list:
-        full_list = singles.copy()
-        for start, end in ranges:
-            full_list.extend(range(start, end + 1))
-        # 去重+升序排序
-        return sorted(list(set(full_list)))
-    return ranges, singles
+    return IntervalSet.parse(game_nu_str)
 
 
 def format_game_nu(game_nu_list, initial_id=0):
     """
-    将区服列表格式化为紧凑字符串（如[1,2,3,6,9,12,13] → "1_3,6,9,12_13"）
+    将区服格式化为紧凑字符串（如[1,2,3,6,9,12,13] → "1_3,6,9,12_13"）
     并为每个区服数字加上渠道初始ID，生成全局唯一的zone_id
-    :param game_nu_list: 热更的区服相对编号列表
+    :param game_nu_list: 热更的区服相对编号（IntervalSet或区服列表）
     :param initial_id: 渠道的游戏服初始id（偏移量）
     :return: 返回热更的游戏服zone_id的格式化紧凑字符串
     """
-    if not game_nu_list:
-        return ""
-
-    # 排序并去重：先处理原始区服编号
-    sorted_nus = sorted(list(set(game_nu_list)))
-    # 为每个区服编号加上初始ID，得到全局zone_id
-    zone_ids = [nu + initial_id for nu in sorted_nus]
-
-    ranges = []
-    # 用加过偏移的zone_id初始化
-    current_start = zone_ids[0]
-    current_end = zone_ids[0]
-
-    # 遍历加过偏移的zone_id列表，合并连续范围
-    for nu in zone_ids[1:]:
-        if nu == current_end + 1:
-            current_end = nu
-        else:
-            # 结束当前范围
-            if current_start == current_end:
-                ranges.append(str(current_start))
-            else:
-                ranges.append(f"{current_start}_{current_end}")
-            current_start = nu
-            current_end = nu
-
-    # 处理最后一个范围
-    if current_start == current_end:
-        ranges.append(str(current_start))
-    else:
-        ranges.append(f"{current_start}_{current_end}")
-
-    return ",".join(ranges)
+    return str(IntervalSet.of(game_nu_list).shift(initial_id))
 
 
 class GameListFilter:
     def __init__(self):
         self.logger = LoggerManager()
         self.db_manager = MysqlConfig()
-        self.db_manager.connect_pool()
         self.game_list_table = MYSQL_CONFIG['game_list_table']
         self.channel_list = MYSQL_CONFIG['channel_list']
         self.game_type_list = MYSQL_CONFIG['game_type_list']
 
-    # 把查询到的 要操作游戏服列表 写入到数据库中
-    def write_operation_game_list(self, sql, params=None):
-        """
-        处理查询结果并写入操作游戏列表
-        :param sql: 查询SQL语句
-        :param params: SQL参数（用于参数化查询）
-        :return: 处理后的游戏列表或0（失败时）
-        """
-        # 执行参数化查询（params为None时兼容原逻辑）
-        game_data = self.db_manager.execute_query(sql, params) if params else self.db_manager.execute_query(sql)
-        filter_list = {}
-        for game in game_data:
-            channel_name = game['channel_name']
-            server_type = game['server_type']
-            game_nu = game['game_nu']
-            # 构建过滤后的游戏列表（使用setdefault方法）
-            filter_list.setdefault(channel_name, {}).setdefault(server_type, []).append(game_nu)
-
-        return GameDBUtil.write_operation_game_list(filter_list)
-
     def _build_game_query_sql(self,
                               channel_name: Optional[list | str] = None,
                               server_type: Optional[list | str] = None,
@@ -172,16 +88,18 @@ class GameListFilter:
                 base_sql += " AND server_type = %s"
                 params.append(server_type)
 
-        # 3. 处理区服条件（多范围+单区服混合）
-        ranges, singles = parse_game_nu(game_nu)
+        # 3. 处理区服条件（多范围+单区服混合，重叠/相邻的区间已合并，条件数与区间数一致）
+        game_nus = parse_game_nu(game_nu)
+        singles = [start for start, end in game_nus.ranges if start == end]
         # 存储区服相关的SQL条件片段
         game_conditions = []
 
         # 处理范围条件（BETWEEN）
-        for start, end in ranges:
-            game_conditions.append("game_nu BETWEEN %s AND %s")
-            # 添加范围参数
-            params.extend([start, end])
+        for start, end in game_nus.ranges:
+            if start != end:
+                game_conditions.append("game_nu BETWEEN %s AND %s")
+                # 添加范围参数
+                params.extend([start, end])
 
         # 处理单个区服条件（IN）
         if singles:
@@ -202,16 +120,37 @@ class GameListFilter:
                       channel_name: Optional[str | list] = None,
                       server_type: Optional[str | list] = None,
                       game_nu: Optional[str] = None,
-                      update_mode: Optional[str] = None) -> Tuple[List[Dict], Dict or int]:
-        """统一查询入口，新增update_mode参数"""
+                      update_mode: Optional[str] = None,
+                      owner: Optional[str] = None) -> Tuple[List[str], Optional[OperationList], Dict]:
+        """
+        统一查询入口：选择SQL只执行一次，一次遍历同时生成展示行和 渠道->类型->区服区间 列表，并写入发起人的操作列表
+        :param owner: 发起人（写入其最近的操作列表，生成新版本）
+        :return: (展示行列表, 写入的操作列表（无匹配或写入失败为None）, 统计信息{rows: 扫描行数, elapsed: 耗时秒})
+        """
+        start_time = time.perf_counter()
         try:
             sql, params = self._build_game_query_sql(channel_name, server_type, game_nu, update_mode)
-            result = self.db_manager.execute_query(sql, params)
-            filter_list = self.write_operation_game_list(sql, params) if result else {}
-            return result, filter_list
+            results = []
+            # 结果按 渠道/类型/区服 排序，遍历时直接合并为连续区间 [[起始, 结束]]
+            ranges = {}
+            for game in self.db_manager.execute_query(sql, params):
+                results.append(f"{game['channel_name']} - {game['server_type']} - {game['game_nu']}")
+                game_ranges = ranges.setdefault(game['channel_name'], {}).setdefault(game['server_type'], [])
+                game_nu = int(game['game_nu'])
+                if game_ranges and game_nu <= game_ranges[-1][1] + 1:
+                    game_ranges[-1][1] = max(game_ranges[-1][1], game_nu)
+                else:
+                    game_ranges.append([game_nu, game_nu])
+            filter_list = {channel: {game_type: IntervalSet(game_ranges) for game_type, game_ranges in types.items()}
+                           for channel, types in ranges.items()}
+
+            operation_list = operation_list_store.save(owner, filter_list) if filter_list else None
+            stats = {'rows': len(results), 'elapsed': round(time.perf_counter() - start_time, 3)}
+            self.logger.info(f"生成操作列表：扫描{stats['rows']}行，耗时{stats['elapsed']}秒")
+            return results, operation_list, stats
         except Exception as e:
             self.logger.error(f"查询游戏服失败：{str(e)}")
-            return [], 0
+            return [], None, {'rows': 0, 'elapsed': round(time.perf_counter() - start_time, 3)}
 
     def get_distinct_channels(self) -> List[str]:
         """获取游戏服列表下的所有不重复的渠道名称"""
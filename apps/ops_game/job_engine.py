@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+import subprocess
+from queue import Empty
+
+from apps.config import JOB_STORE_CONFIG, SSE_BATCH_CONFIG, OUTPUT_QUEUE_CONFIG
+from apps.models.logger_manager import LoggerManager
+from apps.models.output_queue import BoundedOutputQueue
+from apps.ops_game.operation_game_app import OperationGameApp
+from apps.ops_game.task_planner import OperationPlan
+from apps.ops_game.task_utils import OperationTask
+from apps.ops_game.task_log_spool import TaskLogSpool
+from apps.ops_game.job_store import JobStore, JOB_RUNNING, JOB_FINISHED, JOB_FAILED, JOB_TERMINAL_STATUS
+
+# 项目根目录（执行进程以 python -m apps.ops_game.job_runner 启动，需能从该目录导入apps）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class JobManager:
+    """
+    操作作业管理：每次操作分配作业ID，在独立的执行进程（或后台线程）中独立于HTTP请求运行，
+    输出事件和任务状态持久化到JobStore，客户端断线或worker重启后可按Last-Event-ID重新接入
+    """
+    def __init__(self, config=None, batch_config=None, queue_config=None):
+        self.config = config or JOB_STORE_CONFIG
+        self.batch_config = batch_config or SSE_BATCH_CONFIG
+        self.queue_config = queue_config or OUTPUT_QUEUE_CONFIG
+        self.logger = LoggerManager()
+        self.store = JobStore(self.config['db_path'], self.config.get('reap_interval', 0))
+        self.spool = TaskLogSpool(self.config['spool_dir'])
+
+    def start_job(self, script, rsync_mode=None, batch_mode=None, concurrency_mode=None, owner=None,
+                  parent_job_id=None, list_id=None):
+        """
+        启动作业（非阻塞）
+        :param list_id: 操作列表ID，为None时使用发起人最近的操作列表
+        :param parent_job_id: 恢复执行时的原作业ID（只执行原作业中失败或未完成的任务），为None时按当前操作列表规划
+        :return: 作业ID
+        """
+        job_id = time.strftime("%Y%m%d%H%M%S") + '-' + uuid.uuid4().hex[:8]
+        options = {'rsync_mode': rsync_mode, 'batch_mode': batch_mode, 'concurrency_mode': concurrency_mode,
+                   'list_id': list_id}
+        self.store.create_job(job_id, script, options, owner, parent_job_id)
+        self.logger.info(f"创建作业[{job_id}]，脚本参数：{script}，选项：{options}，发起人：{owner}"
+                         + (f"，恢复自作业[{parent_job_id}]" if parent_job_id else ""))
+
+        try:
+            self.spool.remove(self.store.purge(self.config['retention_days']))
+        except Exception as e:
+            self.logger.warning(f"清理过期作业失败：{str(e)}")
+
+        if self.config['runner'] == 'process':
+            try:
+                self._spawn_runner(job_id)
+            except Exception as e:
+                self.fail_job(job_id, f"启动作业执行进程失败：{str(e)}")
+        else:
+            # 非守护线程：worker正常退出时等待作业执行完毕（worker超时被强制结束时作业中断）
+            threading.Thread(target=self.run_job, args=(job_id,), daemon=False).start()
+        return job_id
+
+    def _spawn_runner(self, job_id):
+        """
+        在独立会话的子进程中执行作业：gunicorn回收worker（max_requests）或重启时只结束worker进程，
+        执行进程不在worker的进程组内，作业继续执行；执行进程退出后由mark_interrupted按进程号判断是否中断
+        """
+        os.makedirs(self.config['spool_dir'], mode=0o755, exist_ok=True)
+        # 沿用worker的工作目录和环境变量（配置中的路径基于工作目录），项目根目录加入PYTHONPATH
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get('PYTHONPATH')])))
+        with open(os.path.join(self.config['spool_dir'], 'job_runner.log'), 'ab') as stderr:
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'apps.ops_game.job_runner', job_id],
+                env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=stderr,
+                close_fds=True, start_new_session=True
+            )
+        self.store.set_pid(job_id, process.pid)
+        self.logger.info(f"作业[{job_id}]已交给执行进程({process.pid})")
+        # 回收结束的执行进程，避免僵尸进程被当作仍在运行（worker先退出时由init接管回收）
+        threading.Thread(target=process.wait, daemon=True).start()
+
+    def run_job(self, job_id):
+        """
+        按作业记录中的脚本参数和选项执行作业（阻塞到作业结束），在执行进程或后台线程中调用
+        恢复执行的作业从原作业重新读取失败或未完成的任务
+        """
+        job = self.store.get_job(job_id)
+        if job is None:
+            self.logger.error(f"作业不存在: {job_id}")
+            return
+        options = job['options']
+        resume_plan = None
+        if job['parent_job_id']:
+            resume_plan = self._retry_plan(job['parent_job_id'])
+            if resume_plan is None:
+                self.fail_job(job_id, f"原作业[{job['parent_job_id']}]没有失败或未完成的任务")
+                return
+
+        app = OperationGameApp(
+            batch_mode=options.get('batch_mode'),
+            concurrency_mode=options.get('concurrency_mode'),
+            checkpoint=lambda tasks, plan: self.store.save_plan(
+                job_id, tasks, plan.reload_list_tasks, plan.reload_status_task)
+        )
+        generator = app.operation_game(script=job['script'], rsync_mode=options.get('rsync_mode'),
+                                       resume_plan=resume_plan, owner=job['owner'], list_id=options.get('list_id'))
+        self._run_job(job_id, app, generator)
+
+    def fail_job(self, job_id, message):
+        """作业未能开始执行时，追加错误和结束事件并标记为失败"""
+        self.logger.error(f"作业[{job_id}]执行失败：{message}")
+        last_seq = self.store.get_job(job_id)['last_seq']
+        events = [{"status": "error", "message": message}, {"status": "completed", "message": "作业执行失败"}]
+        self.store.append_events(job_id, [(last_seq + i, json.dumps(event, ensure_ascii=False), event)
+                                          for i, event in enumerate(events, start=1)])
+        self.store.finish_job(job_id, JOB_FAILED)
+
+    def cancel_job(self, job_id):
+        """
+        请求取消作业（写入取消标记，由作业所在进程的监视线程执行取消，可跨worker调用）
+        :return: 是否已设置取消标记（作业不存在或已结束返回False）
+        """
+        requested = self.store.request_cancel(job_id)
+        if requested:
+            self.logger.info(f"请求取消作业[{job_id}]")
+        return requested
+
+    def _watch_cancel(self, job_id, app, done):
+        """轮询取消标记，发现后取消作业的执行"""
+        while not done.wait(self.config['poll_interval']):
+            try:
+                if self.store.cancel_requested(job_id):
+                    self.logger.info(f"作业[{job_id}]收到取消请求")
+                    app.cancel()
+                    return
+            except Exception as e:
+                self.logger.error(f"作业[{job_id}]检查取消标记失败：{str(e)}")
+
+    def retry_job(self, job_id, owner=None, batch_mode=None, concurrency_mode=None):
+        """
+        只重试作业中失败或未完成的任务（沿用原作业的脚本参数和任务参数）
+        :return: (新作业ID, 错误信息)
+        """
+        job = self.store.get_job(job_id)
+        if job is None:
+            return None, f"作业不存在: {job_id}"
+        if job['status'] == JOB_RUNNING:
+            return None, f"作业[{job_id}]仍在执行中，无法重试"
+
+        if self._retry_plan(job_id) is None:
+            return None, f"作业[{job_id}]没有失败或未完成的任务"
+
+        options = job['options']
+        new_job_id = self.start_job(
+            script=job['script'],
+            rsync_mode=options.get('rsync_mode'),
+            batch_mode=batch_mode if batch_mode is not None else options.get('batch_mode'),
+            concurrency_mode=concurrency_mode if concurrency_mode is not None else options.get('concurrency_mode'),
+            owner=owner,
+            parent_job_id=job_id,
+            list_id=options.get('list_id')
+        )
+        return new_job_id, None
+
+    def _retry_plan(self, job_id):
+        """
+        由作业中失败或未完成的任务生成恢复执行的操作计划
+        :return: OperationPlan，没有需要重试的任务时返回None
+        """
+        rows, reload_plan = self.store.get_retry_plan(job_id)
+        if not rows:
+            return None
+
+        plan = OperationPlan()
+        plan.tasks = [OperationTask(*(row[field] for field in OperationTask._fields)) for row in rows]
+        for channel, urls in reload_plan['reload_list_tasks'].items():
+            plan.reload_list_tasks[channel].update(urls)
+        for channel, urls in reload_plan['reload_status_task'].items():
+            plan.reload_status_task[channel].update(urls)
+        return plan
+
+    def _run_job(self, job_id, app, generator):
+        """
+        消费操作输出：每条输出先逐条写入任务日志（完整输出），再放入有界队列由写入线程批量写入存储；
+        存储写入跟不上时队列按OUTPUT_QUEUE_CONFIG的策略丢弃/合并输出行，只影响实时输出，任务日志中仍是完整输出
+        """
+        events = BoundedOutputQueue(**self.queue_config)
+        writer = threading.Thread(target=self._write_events, args=(job_id, events), daemon=False)
+        writer.start()
+        done = threading.Event()
+        threading.Thread(target=self._watch_cancel, args=(job_id, app, done), daemon=True).start()
+        log_writer = self.spool.open_writer(job_id)
+        log_failed = False
+
+        status = JOB_FINISHED
+        events.put({"status": "job", "job_id": job_id, "message": f"作业[{job_id}]已创建"})
+        try:
+            for message in generator:
+                event = self._to_event(self._parse_sse(message))
+                try:
+                    log_writer.write(event)
+                except Exception as e:
+                    if not log_failed:
+                        log_failed = True
+                        self.logger.error(f"作业[{job_id}]任务日志写入失败：{str(e)}")
+                events.put(event)
+        except Exception as e:
+            status = JOB_FAILED
+            self.logger.error(f"作业[{job_id}]执行异常：{str(e)}")
+            events.put({"status": "error", "message": f"作业执行异常：{str(e)}"})
+            events.put({"status": "completed", "message": "作业执行异常结束"})
+        finally:
+            done.set()
+            log_writer.close()
+            events.put(None)
+            writer.join()
+            elided = events.stats()['elided']
+            if elided:
+                self.logger.warning(f"作业[{job_id}]输出写入过慢，实时输出省略{elided}行（任务日志中为完整输出）")
+            self.store.finish_job(job_id, status)
+            self.logger.info(f"作业[{job_id}]结束，状态：{status}")
+
+    def _write_events(self, job_id, events):
+        """按条数或时间批量写入事件（任务日志已在输出线程中写入），减少SQLite事务次数"""
+        seq = 0
+        buffer = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = events.get(timeout=timeout)
+            except Empty:
+                item = Empty
+
+            if item is not Empty and item is not None:
+                seq += 1
+                buffer.append((seq, json.dumps(item, ensure_ascii=False), item))
+                if deadline is None:
+                    deadline = time.monotonic() + self.config['flush_interval']
+
+            if buffer and (item is Empty or item is None or len(buffer) >= self.config['flush_size']):
+                try:
+                    self.store.append_events(job_id, buffer)
+                except Exception as e:
+                    self.logger.error(f"作业[{job_id}]输出写入失败：{str(e)}")
+                buffer = []
+                deadline = None
+
+            if item is None:
+                break
+
+    def stream(self, job_id, last_event_id=0, mode=None):
+        """
+        生成作业的SSE输出流：先回放last_event_id之后的事件，再轮询新事件，作业结束且事件读完后退出
+        每条SSE事件带 id 字段（合并输出时为该批最后一条的seq），EventSource 重连时会通过 Last-Event-ID 请求头回传
+        :param mode: 输出模式，'summary' 为摘要模式（定时推送进度汇总，只推送失败任务的完整输出），默认全量输出
+        """
+        if mode == 'summary':
+            yield from self._stream_summary(job_id, last_event_id)
+            return
+
+        batch = self.batch_config['enabled']
+        limit = self.batch_config['max_items'] if batch else 500
+        last_seq = last_event_id
+        idle_since = time.monotonic()
+        while True:
+            # 先取状态再读事件，保证作业结束前写入的事件都能读到
+            status = self.store.get_status(job_id)
+            if status is None:
+                yield f"data: {json.dumps({'status': 'error', 'message': f'作业不存在: {job_id}'}, ensure_ascii=False)}\n\n"
+                return
+
+            rows = self.store.read_events(job_id, last_seq, limit)
+            if rows:
+                last_seq = rows[-1][0]
+                idle_since = time.monotonic()
+                if batch and len(rows) > 1:
+                    # 存储的事件已是JSON文本，直接拼接，无需重新序列化
+                    yield f"id: {last_seq}\ndata: {{\"status\": \"batch\", \"items\": [{', '.join(data for _, data in rows)}]}}\n\n"
+                else:
+                    for seq, data in rows:
+                        yield f"id: {seq}\ndata: {data}\n\n"
+                # 未攒满一批时等待合并窗口，让后续输出合并到下一个SSE事件
+                if batch and len(rows) < limit and status not in JOB_TERMINAL_STATUS:
+                    time.sleep(self.batch_config['window'])
+                continue
+            if status in JOB_TERMINAL_STATUS:
+                return
+            # 检查作业进程是否已退出（如worker被回收），是则标记中断
+            self.store.mark_interrupted()
+            if time.monotonic() - idle_since >= self.config['keepalive']:
+                idle_since = time.monotonic()
+                yield ": keepalive\n\n"
+            time.sleep(self.config['poll_interval'])
+
+    def _stream_summary(self, job_id, last_event_id=0):
+        """摘要模式输出流：进度汇总 + 非任务消息 + 失败任务的完整输出"""
+        interval = self.batch_config['summary_interval']
+        limit = self.batch_config['max_items']
+        last_seq = last_event_id
+        next_summary = 0.0
+        while True:
+            status = self.store.get_status(job_id)
+            if status is None:
+                yield f"data: {json.dumps({'status': 'error', 'message': f'作业不存在: {job_id}'}, ensure_ascii=False)}\n\n"
+                return
+
+            rows = self.store.read_summary_events(job_id, last_seq, limit)
+            items = []
+            final = False
+            for seq, data, task_id, event_status in rows:
+                if task_id:
+                    # 失败任务：补发该任务截至失败时的完整输出
+                    items.extend(task_data for _, task_data in self.store.read_task_events(job_id, task_id, seq))
+                else:
+                    items.append(data)
+                    final = final or event_status in ('statistics', 'completed')
+                last_seq = seq
+
+            # 到达推送间隔、或即将推送统计/完成消息时，先推送最新的进度汇总
+            if final or time.monotonic() >= next_summary:
+                next_summary = time.monotonic() + interval
+                summary = json.dumps({'status': 'summary', 'data': self._progress_summary(job_id)}, ensure_ascii=False)
+                items.insert(0, summary)
+
+            if items:
+                yield f"id: {last_seq}\ndata: {{\"status\": \"batch\", \"items\": [{', '.join(items)}]}}\n\n"
+            if len(rows) >= limit:
+                continue
+            if status in JOB_TERMINAL_STATUS and not rows:
+                return
+            # 检查作业进程是否已退出（如worker被回收），是则标记中断
+            self.store.mark_interrupted()
+            time.sleep(self.config['poll_interval'])
+
+    def _progress_summary(self, job_id):
+        """
+        汇总作业进度：按渠道、区服类型统计排队/执行中/成功/失败的任务数，以及吞吐量和预计剩余时间
+        """
+        progress, created_at = self.store.task_progress(job_id)
+        groups = []
+        totals = {'queued': 0, 'running': 0, 'succeeded': 0, 'failed': 0}
+        for (channel, game_type), counts in sorted(progress.items(), key=lambda kv: (str(kv[0][0]), str(kv[0][1]))):
+            group = {
+                'channel': channel or '-',
+                'game_type': game_type or '-',
+                'queued': counts.get('pending', 0),
+                'running': counts.get('start', 0) + counts.get('running', 0),
+                'succeeded': counts.get('success', 0),
+                'failed': sum(counts.get(s, 0) for s in ('failed', 'error', 'timeout', 'cancelled')),
+            }
+            for key in totals:
+                totals[key] += group[key]
+            groups.append(group)
+
+        elapsed = time.time() - created_at if created_at else 0
+        finished = totals['succeeded'] + totals['failed']
+        throughput = finished / elapsed if elapsed > 0 else 0
+        remaining = totals['queued'] + totals['running']
+        return {
+            'groups': groups,
+            'totals': totals,
+            'elapsed': round(elapsed, 1),
+            'throughput': round(throughput * 60, 2),  # 每分钟完成的任务数
+            'eta': round(remaining / throughput) if throughput > 0 and remaining else None  # 预计剩余秒数
+        }
+
+    def get_task_events(self, job_id, task_id):
+        """获取单个任务的完整输出（摘要模式下按需查看）"""
+        return [self._load(data) for _, data in self.store.read_task_events(job_id, task_id)]
+
+    def get_task_log(self, job_id, task_id):
+        """
+        获取任务日志文件路径
+        :return: 文件路径，作业不存在或任务没有输出时返回None
+        """
+        if self.store.get_status(job_id) is None:
+            return None
+        path = self.spool.path(job_id, task_id)
+        return path if os.path.isfile(path) else None
+
+    def get_job(self, job_id):
+        return self.store.get_job(job_id)
+
+    def list_jobs(self, limit=50):
+        return self.store.list_jobs(limit)
+
+    def get_sql_stats(self, job_id):
+        return self.store.get_sql_stats(job_id)
+
+    def list_sql_stats_jobs(self, limit=20):
+        return self.store.list_sql_stats_jobs(limit)
+
+    @staticmethod
+    def _parse_sse(message):
+        """将SSE格式的 'data: {...}\\n\\n' 还原为事件内容"""
+        data = message.strip()
+        if data.startswith('data:'):
+            data = data[len('data:'):].strip()
+        return data
+
+    @classmethod
+    def _to_event(cls, data):
+        """事件内容转为dict（有界队列按状态判断可丢弃的输出行）"""
+        event = cls._load(data)
+        if not isinstance(event, dict):
+            # 非法JSON（如消息中含未转义的引号）转为普通消息，保证存储的事件都能被合并输出和解析
+            event = {"status": "info", "message": data}
+        return event
+
+    @staticmethod
+    def _load(data):
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+
+# 全局作业管理实例（首次使用时创建，避免导入时创建SQLite文件）
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+作业执行进程：由 JobManager 以独立会话启动，按作业记录执行一个作业，执行完毕后退出
+
+用法（由 JobManager 调用，沿用worker的工作目录和环境变量）：
+    python -m apps.ops_game.job_runner <作业ID>
+"""
+
+import sys
+
+from sqlalchemy import create_engine
+
+from apps.config import Config, SQL_STATS_CONFIG
+from apps.models.operation_mysql import pool_registry
+from apps.models.sql_stats import sql_stats
+from apps.ops_game.job_engine import get_job_manager
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("用法: python -m apps.ops_game.job_runner <作业ID>")
+        return 1
+
+    job_id = sys.argv[1]
+    # 执行进程不创建Flask应用：按应用相同的URI和连接池参数创建engine并绑定，
+    # MysqlConfig与worker一样只使用一个有上限的连接池，不再另建PooledDB
+    pool_registry.bind_engine(create_engine(Config.SQLALCHEMY_DATABASE_URI, **Config.SQLALCHEMY_ENGINE_OPTIONS))
+    job_manager = get_job_manager()
+    try:
+        job_manager.run_job(job_id)
+    except Exception as e:
+        # 作业开始执行前的异常（执行过程中的异常已由 _run_job 记录并结束作业）
+        job_manager.fail_job(job_id, f"作业执行进程异常：{str(e)}")
+        return 1
+    finally:
+        # 本进程只执行这一个作业，SQL统计即该作业的统计，退出前保存到作业记录
+        try:
+            job_manager.store.save_sql_stats(job_id, sql_stats.get_stats(limit=SQL_STATS_CONFIG['max_fingerprints']))
+        except Exception as e:
+            job_manager.logger.error(f"作业[{job_id}]保存SQL统计失败：{str(e)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from contextlib import closing
+
+
+# 作业状态
+JOB_RUNNING = 'running'
+JOB_FINISHED = 'finished'
+JOB_FAILED = 'failed'
+JOB_INTERRUPTED = 'interrupted'
+JOB_TERMINAL_STATUS = (JOB_FINISHED, JOB_FAILED, JOB_INTERRUPTED)
+
+# 任务最终状态（出现后不再被running覆盖）
+TASK_FINAL_STATUS = ('success', 'failed', 'error', 'timeout', 'cancelled')
+
+
+class JobStore:
+    """
+    作业存储（SQLite WAL模式，支持多个gunicorn worker进程同时读写）
+    jobs: 作业信息；job_events: 作业输出事件（按seq递增）；
+    job_tasks: 作业内各任务的检查点（任务参数、最新状态、返回码），用于只重试失败/未完成的任务
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id      TEXT PRIMARY KEY,
+            script      TEXT NOT NULL,
+            options     TEXT NOT NULL DEFAULT '{}',
+            owner       TEXT,
+            host        TEXT,
+            pid         INTEGER,
+            status      TEXT NOT NULL,
+            created_at  REAL NOT NULL,
+            finished_at REAL,
+            parent_job_id TEXT,
+            plan        TEXT,
+            cancel_requested INTEGER NOT NULL DEFAULT 0,
+            sql_stats   TEXT
+        );
+        CREATE TABLE IF NOT EXISTS job_events (
+            job_id  TEXT NOT NULL,
+            seq     INTEGER NOT NULL,
+            data    TEXT NOT NULL,
+            task_id TEXT,
+            status  TEXT,
+            PRIMARY KEY (job_id, seq)
+        );
+        CREATE TABLE IF NOT EXISTS job_tasks (
+            job_id     TEXT NOT NULL,
+            task_id    TEXT NOT NULL,
+            status     TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            script     TEXT,
+            parameter  TEXT,
+            info       TEXT,
+            game_type  TEXT,
+            channel    TEXT,
+            game_ip    TEXT,
+            http_port  INTEGER,
+            returncode INTEGER,
+            PRIMARY KEY (job_id, task_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at);
+    """
+    # 依赖补齐列的索引（在补齐列之后创建）
+    INDEXES = """
+        CREATE INDEX IF NOT EXISTS idx_job_events_task ON job_events (job_id, task_id, seq);
+    """
+    # 旧版本数据库缺少的列（启动时自动补齐）
+    COLUMNS = {
+        'jobs': {'parent_job_id': 'TEXT', 'plan': 'TEXT', 'cancel_requested': 'INTEGER NOT NULL DEFAULT 0',
+                 'sql_stats': 'TEXT'},
+        'job_events': {'task_id': 'TEXT', 'status': 'TEXT'},
+        'job_tasks': {'script': 'TEXT', 'parameter': 'TEXT', 'info': 'TEXT', 'game_type': 'TEXT',
+                      'channel': 'TEXT', 'game_ip': 'TEXT', 'http_port': 'INTEGER', 'returncode': 'INTEGER'},
+    }
+
+    def __init__(self, db_path, reap_interval=0):
+        """
+        :param db_path: SQLite文件路径
+        :param reap_interval: mark_interrupted 的最小执行间隔（秒），SSE轮询等高频调用在间隔内直接返回
+        """
+        self.db_path = db_path
+        self.reap_interval = reap_interval
+        self._reap_lock = threading.Lock()
+        self._next_reap = 0.0
+        os.makedirs(os.path.dirname(db_path), mode=0o755, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.SCHEMA)
+            for table, columns in self.COLUMNS.items():
+                existing = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+                for name, column_type in columns.items():
+                    if name not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+            conn.executescript(self.INDEXES)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def create_job(self, job_id, script, options=None, owner=None, parent_job_id=None):
+        """登记新作业（记录所在主机和进程号，用于判断作业是否因进程退出而中断）"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, script, options, owner, host, pid, status, created_at, parent_job_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, script, json.dumps(options or {}, ensure_ascii=False), owner,
+                 socket.gethostname(), os.getpid(), JOB_RUNNING, time.time(), parent_job_id)
+            )
+
+    def set_pid(self, job_id, pid):
+        """更新作业的执行进程号（作业交给独立的执行进程后调用）"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE jobs SET pid=? WHERE job_id=?", (pid, job_id))
+
+    def save_plan(self, job_id, tasks, reload_list_tasks=None, reload_status_task=None):
+        """
+        保存作业计划检查点：全部任务登记为pending，热更URL按渠道保存
+        :param tasks: 任务列表（OperationTask）
+        :param reload_list_tasks: 热更请求URL {渠道: URL集合}
+        :param reload_status_task: 热更状态检查URL {渠道: URL集合}
+        """
+        now = time.time()
+        plan = {
+            'reload_list_tasks': {c: sorted(urls) for c, urls in (reload_list_tasks or {}).items()},
+            'reload_status_task': {c: sorted(urls) for c, urls in (reload_status_task or {}).items()},
+        }
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE jobs SET plan=? WHERE job_id=?", (json.dumps(plan, ensure_ascii=False), job_id))
+            conn.executemany(
+                "INSERT INTO job_tasks (job_id, task_id, status, updated_at, script, parameter, info, "
+                "game_type, channel, game_ip, http_port) VALUES (?, ?, 'pending', ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (job_id, task_id) DO UPDATE SET script=excluded.script, "
+                "parameter=excluded.parameter, info=excluded.info, game_type=excluded.game_type, "
+                "channel=excluded.channel, game_ip=excluded.game_ip, http_port=excluded.http_port",
+                [(job_id, task.task_id, now, task.script, task.parameter, task.info, task.game_type,
+                  task.channel, task.game_ip, task.http_port) for task in tasks]
+            )
+
+    def get_retry_plan(self, job_id):
+        """
+        获取作业中失败或未完成的任务（返回码非0、执行异常、未开始、执行中断）
+        :return: (任务行列表, 相关渠道的热更URL计划)，作业不存在时返回 (None, None)
+        """
+        with closing(self._connect()) as conn:
+            job = conn.execute("SELECT plan FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+            if job is None:
+                return None, None
+            rows = [dict(r) for r in conn.execute(
+                "SELECT * FROM job_tasks WHERE job_id=? AND status<>'success' AND parameter IS NOT NULL "
+                "ORDER BY rowid", (job_id,))]
+        plan = json.loads(job['plan'] or '{}')
+        channels = {row['channel'] for row in rows}
+        return rows, {
+            key: {c: urls for c, urls in plan.get(key, {}).items() if c in channels}
+            for key in ('reload_list_tasks', 'reload_status_task')
+        }
+
+    def append_events(self, job_id, events):
+        """
+        批量写入输出事件，并同步更新任务状态
+        :param events: [(seq, 事件JSON字符串, 事件dict或None)]
+        """
+        if not events:
+            return
+        now = time.time()
+        task_states = {}
+        for _, _, item in events:
+            if isinstance(item, dict) and item.get('task_id') and item.get('status'):
+                if item['status'] in TASK_FINAL_STATUS or item['status'] == 'start':
+                    task_states[item['task_id']] = (item['status'], item.get('returncode'))
+                elif item['task_id'] not in task_states:
+                    task_states[item['task_id']] = ('running', None)
+
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO job_events (job_id, seq, data, task_id, status) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, seq, data,
+                  item.get('task_id') if isinstance(item, dict) else None,
+                  item.get('status') if isinstance(item, dict) else None) for seq, data, item in events]
+            )
+            for task_id, (status, returncode) in task_states.items():
+                if status == 'running':
+                    # 输出行不覆盖已结束任务的状态
+                    conn.execute(
+                        "INSERT INTO job_tasks (job_id, task_id, status, updated_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (job_id, task_id) DO UPDATE SET status=excluded.status, "
+                        "updated_at=excluded.updated_at WHERE job_tasks.status NOT IN "
+                        f"({', '.join('?' * len(TASK_FINAL_STATUS))})",
+                        (job_id, task_id, status, now) + TASK_FINAL_STATUS
+                    )
+                else:
+                    conn.execute(
+                        "INSERT INTO job_tasks (job_id, task_id, status, updated_at, returncode) "
+                        "VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (job_id, task_id) DO UPDATE SET status=excluded.status, "
+                        "updated_at=excluded.updated_at, returncode=excluded.returncode",
+                        (job_id, task_id, status, now, returncode)
+                    )
+
+    def finish_job(self, job_id, status):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE jobs SET status=?, finished_at=? WHERE job_id=? AND status=?",
+                (status, time.time(), job_id, JOB_RUNNING)
+            )
+
+    def save_sql_stats(self, job_id, statements):
+        """保存作业执行进程的SQL指纹统计（执行进程退出后统计随之丢失，作业结束时保存到作业记录）"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE jobs SET sql_stats=? WHERE job_id=?",
+                         (json.dumps(statements, ensure_ascii=False), job_id))
+
+    def get_sql_stats(self, job_id):
+        """作业保存的SQL指纹统计，没有保存时返回None"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT sql_stats FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+        return json.loads(row['sql_stats']) if row and row['sql_stats'] else None
+
+    def list_sql_stats_jobs(self, limit=20):
+        """最近保存了SQL统计的作业 [{job_id, script, owner, created_at}]"""
+        with closing(self._connect()) as conn:
+            return [dict(r) for r in conn.execute(
+                "SELECT job_id, script, owner, created_at FROM jobs WHERE sql_stats IS NOT NULL "
+                "ORDER BY created_at DESC LIMIT ?", (limit,))]
+
+    def request_cancel(self, job_id):
+        """设置取消标记（作业所在的worker进程轮询该标记后终止任务），作业不在运行中返回False"""
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(
+                "UPDATE jobs SET cancel_requested=1 WHERE job_id=? AND status=?", (job_id, JOB_RUNNING)
+            ).rowcount > 0
+
+    def cancel_requested(self, job_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+        return bool(row and row['cancel_requested'])
+
+    def get_job(self, job_id):
+        """获取作业信息（含任务状态汇总），不存在返回None"""
+        self.mark_interrupted()
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = self._job_dict(row)
+            job['plan'] = json.loads(row['plan'] or '{}')
+            job['tasks'] = {
+                r['task_id']: {'status': r['status'], 'returncode': r['returncode']} for r in conn.execute(
+                    "SELECT task_id, status, returncode FROM job_tasks WHERE job_id=? ORDER BY rowid", (job_id,))
+            }
+            job['last_seq'] = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM job_events WHERE job_id=?", (job_id,)).fetchone()[0]
+        return job
+
+    def list_jobs(self, limit=50):
+        """获取最近的作业列表"""
+        self.mark_interrupted()
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._job_dict(row) for row in rows]
+
+    def read_events(self, job_id, after_seq=0, limit=500):
+        """读取seq大于after_seq的事件 [(seq, 事件JSON字符串)]"""
+        with closing(self._connect()) as conn:
+            return [(r['seq'], r['data']) for r in conn.execute(
+                "SELECT seq, data FROM job_events WHERE job_id=? AND seq>? ORDER BY seq LIMIT ?",
+                (job_id, after_seq, limit)
+            )]
+
+    def read_summary_events(self, job_id, after_seq=0, limit=500):
+        """
+        摘要模式读取事件：只读取非任务消息（提示/统计/完成等）和任务失败结果，跳过任务输出行
+        :return: [(seq, 事件JSON字符串, task_id, status)]
+        """
+        failed = ('failed', 'error', 'timeout', 'cancelled')
+        with closing(self._connect()) as conn:
+            return [(r['seq'], r['data'], r['task_id'], r['status']) for r in conn.execute(
+                f"SELECT seq, data, task_id, status FROM job_events WHERE job_id=? AND seq>? "
+                f"AND (task_id IS NULL OR status IN ({', '.join('?' * len(failed))})) ORDER BY seq LIMIT ?",
+                (job_id, after_seq) + failed + (limit,)
+            )]
+
+    def read_task_events(self, job_id, task_id, until_seq=None):
+        """读取单个任务的全部输出事件 [(seq, 事件JSON字符串)]"""
+        sql = "SELECT seq, data FROM job_events WHERE job_id=? AND task_id=?"
+        params = [job_id, task_id]
+        if until_seq is not None:
+            sql += " AND seq<=?"
+            params.append(until_seq)
+        with closing(self._connect()) as conn:
+            return [(r['seq'], r['data']) for r in conn.execute(sql + " ORDER BY seq", params)]
+
+    def task_progress(self, job_id):
+        """
+        按渠道、区服类型汇总任务进度
+        :return: ({(渠道, 类型): {状态: 数量}}, 作业创建时间)
+        """
+        with closing(self._connect()) as conn:
+            job = conn.execute("SELECT created_at FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+            rows = conn.execute(
+                "SELECT channel, game_type, status, COUNT(*) AS total FROM job_tasks WHERE job_id=? "
+                "GROUP BY channel, game_type, status", (job_id,)).fetchall()
+        progress = {}
+        for row in rows:
+            progress.setdefault((row['channel'], row['game_type']), {})[row['status']] = row['total']
+        return progress, job['created_at'] if job else None
+
+    def get_status(self, job_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT status FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+        return row['status'] if row else None
+
+    def mark_interrupted(self):
+        """
+        将本机上进程已退出但仍为运行中的作业标记为中断，并追加中断事件（结束客户端的SSE流）
+        每个进程每reap_interval秒最多检查一次，SSE轮询等高频调用在间隔内直接返回
+        """
+        with self._reap_lock:
+            now = time.monotonic()
+            if now < self._next_reap:
+                return
+            self._next_reap = now + self.reap_interval
+
+        host = socket.gethostname()
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                "SELECT job_id, pid FROM jobs WHERE status=? AND host=?", (JOB_RUNNING, host)).fetchall()
+            for row in rows:
+                if self._pid_alive(row['pid']):
+                    continue
+                updated = conn.execute(
+                    "UPDATE jobs SET status=?, finished_at=? WHERE job_id=? AND status=?",
+                    (JOB_INTERRUPTED, time.time(), row['job_id'], JOB_RUNNING)
+                ).rowcount
+                if not updated:
+                    continue
+                last_seq = conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM job_events WHERE job_id=?", (row['job_id'],)).fetchone()[0]
+                messages = [
+                    {"status": "error", "message": f"作业执行进程({row['pid']})已退出，作业中断"},
+                    {"status": "completed", "message": "作业已中断"}
+                ]
+                conn.executemany(
+                    "INSERT INTO job_events (job_id, seq, data) VALUES (?, ?, ?)",
+                    [(row['job_id'], last_seq + i, json.dumps(m, ensure_ascii=False))
+                     for i, m in enumerate(messages, start=1)]
+                )
+
+    def purge(self, retention_days):
+        """
+        清理超过保留天数的已结束作业
+        :return: 被清理的作业ID列表
+        """
+        before = time.time() - retention_days * 86400
+        with closing(self._connect()) as conn, conn:
+            job_ids = [r['job_id'] for r in conn.execute(
+                "SELECT job_id FROM jobs WHERE created_at<? AND status<>?", (before, JOB_RUNNING))]
+            for table in ('job_events', 'job_tasks', 'jobs'):
+                conn.executemany(f"DELETE FROM {table} WHERE job_id=?", [(job_id,) for job_id in job_ids])
+        return job_ids
+
+    @staticmethod
+    def _pid_alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    @staticmethod
+    def _job_dict(row):
+        job = dict(row)
+        job['options'] = json.loads(job['options'] or '{}')
+        job.pop('plan', None)
+        job.pop('sql_stats', None)
+        return job
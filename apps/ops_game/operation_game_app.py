@@ -1,32 +1,69 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
-import ast
-import time
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 from collections import defaultdict
 
 from apps.models.execution_stats import stats_manager
+from apps.models.lookup_cache import lookup_cache
 from apps.models.logger_manager import LoggerManager
 from apps.models.executor_shell import ExecutorScript
 from apps.models.query_channel_svn_bin import channel_svn_bin
 from apps.ops_game.svn_operation import svn_update
-from apps.ops_game.filter_game_list import format_game_nu
-from apps.config import OPERATION_PARAMETER, EXECUTOR_SCRIPTS, MAX_WORKERS
+from apps.config import (OPERATION_PARAMETER, EXECUTOR_SCRIPTS, SCHEDULER_LIMITS, HOST_BATCH_CONFIG,
+                         ADAPTIVE_CONCURRENCY, READINESS_PROBE, OPERATION_ORDER, TASK_TIMEOUT_CONFIG,
+                         EXECUTION_ENGINE, OUTPUT_QUEUE_CONFIG)
 
 # 导入工具类
-from apps.ops_game.db_utils import GameDBUtil
+from apps.ops_game.operation_list_store import operation_list_store
 from apps.ops_game.http_utils import HttpUtil
-from apps.ops_game.task_utils import TaskUtil
+from apps.ops_game.task_utils import OperationTask
+from apps.ops_game.task_planner import OperationPlanner
+from apps.ops_game.task_scheduler import TaskScheduler
+from apps.ops_game.task_dag import TaskDAG
+from apps.ops_game.concurrency_controller import AdaptiveConcurrency
+from apps.ops_game.readiness_probe import ReadinessProbe
 
 
 class OperationGameApp:
-    def __init__(self):
+    def __init__(self, batch_mode=None, concurrency_mode=None, checkpoint=None):
+        """
+        :param batch_mode: 执行模式，'host' 为按主机批量执行（同一主机复用一个SSH会话），默认逐区服执行
+        :param concurrency_mode: 并发模式，'adaptive' 为根据任务耗时和失败率自适应调整并发，默认固定并发
+        :param checkpoint: 任务检查点回调 checkpoint(tasks, plan)，任务提交前调用（如作业记录任务参数）
+        """
         self.logger = LoggerManager()
-        self.executor = ExecutorScript()  # 脚本执行器（含线程安全队列）
+        self.batch_mode = batch_mode
+        self.checkpoint = checkpoint
+        # 脚本执行器（含线程安全的有界输出队列）
+        self.executor = ExecutorScript(kill_grace=TASK_TIMEOUT_CONFIG['kill_grace'], queue_config=OUTPUT_QUEUE_CONFIG)
+        self.task_timeout = TASK_TIMEOUT_CONFIG['default']  # 单个任务超时时间（秒），按操作类型设置
         self.all_futures = []  # 汇总所有任务的futures
-        self.task_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)  # 线程池
+        self.concurrency = None  # 自适应并发控制器
+        self.probe = ReadinessProbe(self.logger, **READINESS_PROBE)  # 就绪探测
+        self.readiness_waits = {}  # 各阶段就绪等待耗时（秒）
+        if concurrency_mode == 'adaptive':
+            self.concurrency = AdaptiveConcurrency(
+                initial=SCHEDULER_LIMITS['max_total'],
+                on_change=self._on_concurrency_change,
+                **ADAPTIVE_CONCURRENCY
+            )
+            self.task_pool = TaskScheduler(
+                max_total=ADAPTIVE_CONCURRENCY['max_limit'],
+                max_per_host=SCHEDULER_LIMITS['max_per_host'],
+                max_per_channel=SCHEDULER_LIMITS['max_per_channel'],
+                controller=self.concurrency
+            )
+        else:
+            self.task_pool = TaskScheduler(**SCHEDULER_LIMITS)  # 任务调度器（主机/渠道/全局并发限制）
+
+    def _on_concurrency_change(self, change):
+        """自适应并发调整时记录日志、更新统计并推送到前端"""
+        message = f"并发数调整: {change['from']} -> {change['to']}，原因: {change['reason']}"
+        self.logger.info(message)
+        stats_manager.set_metric('concurrency', self.concurrency.snapshot())
+        self.executor.output_queue.put({"status": "info", "message": message})
 
     # ------------------------------ 任务提交与生命周期管理 ------------------------------
     def _submit_tasks(self, tasks):
@@ -35,17 +72,26 @@ class OperationGameApp:
             self.logger.info("没有需要执行的任务")
             return []
 
-        futures = [
-            self.task_pool.submit(
-                self.executor.executor_shell,
-                logger=self.logger,
-                script=task[1],
-                parameter=task[2],
-                info=task[3],
-                executor_scripts=EXECUTOR_SCRIPTS,
-                task_id=task[0]
-            ) for task in tasks
-        ]
+        # 多路复用引擎下任务启动后即释放工作线程，输出由单个线程统一读取
+        executor_shell = self.executor.executor_shell_async if EXECUTION_ENGINE == 'multiplexed' \
+            else self.executor.executor_shell
+        if self.batch_mode == 'host':
+            futures = self._submit_host_batches(tasks, executor_shell)
+        else:
+            futures = [
+                self.task_pool.submit_task(
+                    task.channel,
+                    task.game_ip,
+                    executor_shell,
+                    logger=self.logger,
+                    script=task[1],
+                    parameter=task[2],
+                    info=task[3],
+                    executor_scripts=EXECUTOR_SCRIPTS,
+                    task_id=task[0],
+                    timeout=self.task_timeout
+                ) for task in tasks
+            ]
 
         # 后台线程：等待任务完成后清理
         threading.Thread(
@@ -55,6 +101,66 @@ class OperationGameApp:
         ).start()
         return futures
 
+    def _submit_host_batches(self, tasks, executor_shell):
+        """
+        按主机批量执行：同一主机上的区服任务复用一个SSH主连接（ControlMaster），
+        每个区服仍作为独立任务提交到调度器（按配置的执行引擎执行，同一主机最多max_per_host个并行），
+        主机上的任务全部结束后关闭主连接
+        同一主机最先并行启动的任务会同时尝试建立主连接，未建立成功的按普通SSH连接执行，之后的任务复用主连接
+        """
+        host_tasks = defaultdict(list)
+        for task in tasks:
+            host_tasks[task.game_ip].append(task)
+
+        self.logger.info(f"按主机批量执行：{len(tasks)}个任务分布在{len(host_tasks)}台主机上")
+        env, control_path = self.executor.host_batch_env(HOST_BATCH_CONFIG)
+        futures = []
+        for game_ip, group_tasks in host_tasks.items():
+            self.logger.info(f"主机[{game_ip}]开始批量执行，共{len(group_tasks)}个任务")
+            host_futures = [
+                self.task_pool.submit_task(
+                    task.channel,
+                    game_ip,
+                    executor_shell,
+                    logger=self.logger,
+                    script=task.script,
+                    parameter=task.parameter,
+                    info=task.info,
+                    executor_scripts=EXECUTOR_SCRIPTS,
+                    task_id=task.task_id,
+                    env=env,
+                    timeout=self.task_timeout
+                ) for task in group_tasks
+            ]
+            self._close_host_master_when_done(game_ip, control_path, host_futures)
+            futures.extend(host_futures)
+        return futures
+
+    def _close_host_master_when_done(self, game_ip, control_path, futures):
+        """主机上的任务全部结束后关闭该主机的SSH主连接"""
+        lock = threading.Lock()
+        remaining = [len(futures)]
+
+        def on_done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            self.executor.close_host_master(self.logger, game_ip, control_path)
+
+        for future in futures:
+            future.add_done_callback(on_done)
+
+    def cancel(self):
+        """取消执行：终止运行中的任务进程组，未开始的任务标记为取消，跳过后续的探测和热更请求"""
+        if self.executor.cancelled.is_set():
+            return
+        killed = self.executor.cancel(self.logger)
+        self.probe.stop()
+        message = f"已取消执行，终止{killed}个运行中的任务，未开始的任务不再执行"
+        self.logger.warning(message)
+        self.executor.output_queue.put({"status": "warning", "message": message})
+
     def _wait_and_cleanup(self, futures_list):
         """等待任务完成并处理异常"""
         for future in as_completed(futures_list):
@@ -67,6 +173,9 @@ class OperationGameApp:
             pass  # 仅等待
 
         # 推送统计和完成信号
+        if self.concurrency is not None:
+            stats_manager.set_metric('concurrency', self.concurrency.snapshot())
+        stats_manager.set_metric('output_queue', self.executor.output_queue.stats())
         stats_data = stats_manager.get_stats()
         self.executor.output_queue.put({
             "status": "statistics",
@@ -80,81 +189,110 @@ class OperationGameApp:
         self.executor.output_queue.put(None)  # 终止信号
         self.task_pool.shutdown(wait=True)
 
-    # ------------------------------ 操作类型处理 ------------------------------
-    def _handle_stop_start(self, script, tasks):
-        """处理启动/停止操作（按顺序执行）"""
-        operation_order = ['Central', 'Play', 'Global', 'Game'] if script == 'stop_game' \
-            else ['Central', 'Game', 'Play', 'Global']
-
-        # 按服务类型分组
-        task_groups = defaultdict(list)
-        for task in tasks:
-            task_groups[task[4]].append(task)  # task[4]是game_type
+    def _report_readiness(self, phase, waited, pending):
+        """记录并推送阶段就绪等待耗时"""
+        self.readiness_waits[phase] = round(waited, 1)
+        stats_manager.set_metric('readiness', dict(self.readiness_waits))
+        message = f"{phase}就绪等待{waited:.1f}秒"
+        if pending:
+            message += f"，超时未就绪: {', '.join(pending)}"
+            self.logger.warning(message)
+        else:
+            self.logger.info(message)
+        self.executor.output_queue.put({"status": "warning" if pending else "info", "message": message})
 
-        def process_groups():
+    # ------------------------------ 操作类型处理 ------------------------------
+    def _run_dag(self, dag):
+        """后台启动任务依赖图，所有节点完成后推送统计和终止信号"""
+        def process_dag():
             try:
-                for type_name in operation_order:
-                    group_tasks = task_groups.get(type_name, [])
-                    if not group_tasks:
-                        self.logger.info(f"无{type_name}类型服务需要处理，跳过...")
-                        continue
-
-                    self.logger.info(f"开始处理{type_name}类型服务，共{len(group_tasks)}个任务")
-                    group_futures = self._submit_tasks(group_tasks)
-                    self.all_futures.extend(group_futures)
-
-                    # 等待当前组所有任务完成
-                    for future in as_completed(group_futures):
-                        if future.exception():
-                            self.logger.error(f"{type_name}类型服务处理异常: {future.exception()}")
-                    self.logger.info(f"{type_name}类型服务已全部处理完成")
-                    time.sleep(5)  # 预留服务状态切换时间
-
-                self.logger.info("所有类型服务处理完成")
+                dag.run()
+                dag.wait()
+                self.logger.info("所有任务节点处理完成")
             except Exception as e:
-                self.logger.error(f"处理服务组时发生异常: {str(e)}")
+                self.logger.error(f"处理任务依赖图时发生异常: {str(e)}")
             finally:
-                # 所有组处理完成后关闭线程池
-                self.task_pool.shutdown(wait=True)
                 self.wait_all_tasks_completion()
 
-        threading.Thread(target=process_groups, daemon=True).start()
-
-    def _handle_reload(self, main_futures, reload_list_tasks, reload_status_task):
-        """处理热更操作（基础任务+HTTP请求）"""
-        def process_reload():
-            # 等待基础任务完成
-            for future in as_completed(main_futures):
-                if future.exception():
-                    self.logger.error(f"基础任务执行异常: {future.exception()}")
-
-            # 等待代码同步到区服里
-            time.sleep(1)
-            # 执行热更请求
-            self.logger.info("开始执行热更接口请求...")
-            for url in reload_list_tasks:
-                HttpUtil.request_with_log(url, self.logger, self.executor.output_queue, "热更请求")
-
-            # 等待热更请求完成
-            time.sleep(5)
-            # 检查热更状态
-            self.logger.info("开始检查热更状态...")
-            for url in reload_status_task:
-                HttpUtil.request_with_log(url, self.logger, self.executor.output_queue, "热更状态检查")
-
-            self.logger.info("热更操作全流程完成")
-            self.executor.output_queue.put({
-                "status": "completed",
-                "message": "热更操作全流程完成"
-            })
-
-        reload_future = self.task_pool.submit(process_reload)
-        self.all_futures.append(reload_future)
-
-    def _handle_rsync(self, unique_ips, rsync_mode):
+        threading.Thread(target=process_dag, daemon=True).start()
+
+    def _handle_stop_start(self, script, tasks):
+        """处理启动/停止操作（每个渠道内按服务类型顺序执行，渠道之间并行）"""
+        operation_order = OPERATION_ORDER[script]
+
+        # 按渠道、服务类型分组
+        task_groups = defaultdict(lambda: defaultdict(list))
+        for task in tasks:
+            task_groups[task.channel][task[4]].append(task)  # task[4]是game_type
+
+        def wait_ready(node):
+            # 探测http_port，起服等待端口可用、停服等待端口关闭（有未配置端口的服务时至少等待min_wait秒），
+            # 再处理本渠道的下一类型
+            targets = {task.task_id: (task.game_ip, task.http_port) for task in node.tasks}
+            waited, pending = self.probe.wait_ports(targets, expect_up=(script == 'start_game'))
+            self._report_readiness(f"{node.key[0]}渠道{node.key[1]}类型服务", waited, pending)
+
+        dag = TaskDAG(self.logger, self._submit_tasks, on_futures=self.all_futures.extend,
+                      cancelled=self.executor.cancelled)
+        for channel, type_groups in task_groups.items():
+            previous = None
+            for type_name in operation_order:
+                group_tasks = type_groups.get(type_name)
+                if not group_tasks:
+                    self.logger.info(f"{channel}渠道无{type_name}类型服务需要处理，跳过...")
+                    continue
+                key = (channel, type_name)
+                dag.add_node(key, group_tasks, after=wait_ready, deps=[previous] if previous else ())
+                previous = key
+
+        self._run_dag(dag)
+
+    def _reload_channel(self, channel, reload_list_tasks, reload_status_task):
+        """单个渠道的热更请求及状态检查"""
+        # 等待代码同步到区服
+        waited, pending = self.probe.wait_sync()
+        self._report_readiness(f"{channel}渠道代码同步", waited, pending)
+        # 执行热更请求
+        self.logger.info(f"开始执行{channel}渠道热更接口请求...")
+        for url in reload_list_tasks:
+            HttpUtil.request_with_log(url, self.logger, self.executor.output_queue, "热更请求")
+
+        # 轮询热更状态接口，直到返回完成标识或超时
+        waited, pending = self.probe.wait_urls(reload_status_task)
+        self._report_readiness(f"{channel}渠道热更状态", waited, pending)
+        # 检查热更状态
+        self.logger.info(f"开始检查{channel}渠道热更状态...")
+        for url in reload_status_task:
+            HttpUtil.request_with_log(url, self.logger, self.executor.output_queue, "热更状态检查")
+
+        message = f"{channel}渠道热更操作全流程完成"
+        self.logger.info(message)
+        self.executor.output_queue.put({"status": "info", "message": message})
+
+    def _handle_reload(self, tasks, reload_list_tasks, reload_status_task):
+        """处理热更操作（每个渠道：基础任务 -> HTTP热更请求，渠道之间并行）"""
+        channel_tasks = defaultdict(list)
+        for task in tasks:
+            channel_tasks[task.channel].append(task)
+
+        dag = TaskDAG(self.logger, self._submit_tasks, on_futures=self.all_futures.extend,
+                      cancelled=self.executor.cancelled)
+        for channel in list(channel_tasks) + [c for c in reload_list_tasks if c not in channel_tasks]:
+            dag.add_node((channel, 'tasks'), channel_tasks.get(channel))
+            if reload_list_tasks.get(channel) or reload_status_task.get(channel):
+                dag.add_node(
+                    (channel, 'reload'),
+                    after=lambda node, c=channel: self._reload_channel(
+                        c, reload_list_tasks.get(c, ()), reload_status_task.get(c, ())),
+                    deps=[(channel, 'tasks')]
+                )
+
+        self._run_dag(dag)
+
+    def _handle_rsync(self, unique_ips, rsync_mode, channels):
         """处理同步代码到服务器操作"""
         # 原SVN更新逻辑
-        svn_result = svn_update(self.logger, self.executor)
+        svn_result = svn_update(self.logger, self.executor, channels)
         if svn_result is not True:
             # 此处去掉yield，改为返回错误信息字符串
             return f"SVN更新失败: {svn_result}"
@@ -167,18 +305,21 @@ class OperationGameApp:
             task_id = f"RSYNC_{channel}_{game_ip}"
             info = f"服务器({game_ip})同步代码包"
             parameter = f"{channel} {game_ip} rsync {package_file}"
-            tasks.append((task_id, 'rsync_game', parameter, info, "RSYNC"))
+            tasks.append(OperationTask(task_id, 'rsync_game', parameter, info, "RSYNC", channel, game_ip))
         return tasks
 
     # ------------------------------ 主流程 ------------------------------
-    def operation_game(self, script='status_game', rsync_mode=None):
-        """主操作入口"""
+    def operation_game(self, script='status_game', rsync_mode=None, resume_plan=None, owner=None, list_id=None):
+        """
+        主操作入口
+        :param resume_plan: 恢复执行的操作计划（OperationPlan），为None时按当前操作列表重新规划
+        :param owner: 发起人（未指定list_id时使用其最近的操作列表）
+        :param list_id: 操作列表ID
+        """
         stats_manager.reset()
         self.all_futures = []
         operation = script.split('_')[0]
-        # svn锁
-        svn_lock = 'lock'
-        lock_status = 0
+        self.task_timeout = TASK_TIMEOUT_CONFIG['timeouts'].get(operation, TASK_TIMEOUT_CONFIG['default'])
 
         # 校验操作参数
         if operation not in OPERATION_PARAMETER:
@@ -187,124 +328,61 @@ class OperationGameApp:
             yield f"data: {{\"status\": \"error\", \"message\": \"{error_msg}\"}}\n\n"
             return
 
-        # 获取游戏列表
-        try:
-            game_list_str = GameDBUtil.query_game_list()
-            game_list = ast.literal_eval(game_list_str)
-        except Exception as e:
-            error_msg = f"获取游戏列表异常: {str(e)}"
-            self.logger.error(error_msg)
-            yield f"data: {{\"status\": \"error\", \"message\": \"{error_msg}\"}}\n\n"
-            return
+        if resume_plan is None:
+            # 获取游戏列表
+            try:
+                if list_id:
+                    operation_list = operation_list_store.load(list_id)
+                else:
+                    operation_list = operation_list_store.load_latest(owner)
+                if operation_list is None or not operation_list.game_list:
+                    raise ValueError(f"没有可操作的游戏列表（发起人：{owner}，列表ID：{list_id}）")
+                game_list = operation_list.game_list
+                message = f"操作列表[{operation_list.list_id}]版本{operation_list.version}"
+                self.logger.info(message)
+                yield f"data: {{\"status\": \"info\", \"message\": \"{message}\"}}\n\n"
+            except Exception as e:
+                error_msg = f"获取游戏列表异常: {str(e)}"
+                self.logger.error(error_msg)
+                yield f"data: {{\"status\": \"error\", \"message\": \"{error_msg}\"}}\n\n"
+                return
 
-        # 初始化任务相关变量
-        tasks = []
-        reload_list_tasks = set()
-        reload_status_task = set()
-        unique_ips = set()
-        operation_desc = OPERATION_PARAMETER[operation]
-
-        # 生成基础任务
-        for channel in game_list:
-            external_switch = GameDBUtil.get_external_switch(channel)
-            for game_type in game_list[channel]:
-                # 处理热更相关任务（Central类型）
-                if script == 'reload_game' or rsync_mode == 'reload':
-                    if game_type == 'Game':
-                        central_servers = GameDBUtil.get_central_server_info(channel, external_switch)
-                        for server in central_servers:
-                            game_ip = server['intranet_ip'] if int(external_switch) != 1 else server['external_ip']
-                            game_dir = server['server_dir']
-                            http_port = server['http_port']
-
-                            # 生成Central基础任务
-                            if 'Central' not in game_list[channel]:
-                                task_id = TaskUtil.generate_task_id(channel, 'Central', 1)
-                                info = TaskUtil.generate_task_info(channel, 'Central', 1, game_ip, operation_desc)
-                                parameter = f"{channel} {game_ip} {game_dir} {operation}"
-                                tasks.append((task_id, script, parameter, info, game_type))
-
-                            # 获取渠道的游戏服初始zone_id
-                            zone_id = int(GameDBUtil.get_channel_initial_id(channel))
-                            # 收集热更URL
-                            reload_url = GameDBUtil.get_reload_url('Game')
-                            reload_list = format_game_nu(game_list[channel][game_type], zone_id)
-                            reload_list_tasks.add(f'http://{game_ip}:{http_port}{reload_url}{reload_list}')
-
-                            status_url = GameDBUtil.get_reload_url('status')
-                            reload_status_task.add(f'http://{game_ip}:{http_port}{status_url}')
-
-                            unique_ips.add(f"{game_ip}__{channel}")
-
-                # 处理录像更新
-                elif script == 'battle_game' or rsync_mode == 'battle':
-                    if game_type != 'Game':
-                        continue
-
-                # 处理普通游戏服任务
-                for game in game_list[channel][game_type]:
-                    try:
-                        game_info = GameDBUtil.get_game_server_info(channel, game_type, game)
-                        if not game_info:
-                            error_msg = f"未找到游戏信息: 渠道={channel}, 类型={game_type}, 区服={game}"
-                            self.logger.error(error_msg)
-                            yield f"data: {{\"status\": \"warning\", \"message\": \"{error_msg}\"}}\n\n"
-                            continue
-
-                        # 处理IP和目录信息
-                        game_dir = game_info[0]['server_dir']
-                        intranet_ip = game_info[0]['intranet_ip']
-                        game_ip = intranet_ip
-
-                        if int(external_switch) == 1:
-                            external_ip = GameDBUtil.get_external_ip(intranet_ip)
-                            if not external_ip:
-                                error_msg = f"未找到服务器信息: 内网IP={intranet_ip}"
-                                self.logger.error(error_msg)
-                                yield f"data: {{\"status\": \"warning\", \"message\": \"{error_msg}\"}}\n\n"
-                                continue
-                            game_ip = external_ip
-
-                        # 热更操作特殊处理（非Game类型）
-                        if script == 'reload_game' and game_type != 'Game':
-                            game_info = GameDBUtil.get_central_server_info(channel, external_switch, game_type, game)
-                            for server in game_info:
-                                reload_url = GameDBUtil.get_reload_url('other')
-                                reload_list_tasks.add(f'http://{game_ip}:{server["http_port"]}{reload_url}')
-
-                        # 收集IP和生成任务，只对同步代码到服务器调用
-                        unique_ips.add(f"{game_ip}__{channel}")
-
-                        # 收集游戏服信息
-                        task_id = TaskUtil.generate_task_id(channel, game_type, game)
-                        info = TaskUtil.generate_task_info(channel, game_type, game, game_ip, operation_desc)
-                        if script == 'initial_game':
-                            # 当第一个区服才不加锁
-                            if svn_lock == 'lock' and lock_status == 0:
-                                lock_status += 1
-                                svn_lock = 'no_lock'
-                            else:
-                                svn_lock = 'lock'
-                            parameter = f"{channel} {game_ip} {game_type} {game_dir} {game} {svn_lock} {operation}"
-                        else:
-                            parameter = f"{channel} {game_ip} {game_dir} {operation}"
-                        tasks.append((task_id, script, parameter, info, game_type))
-
-                    except Exception as e:
-                        error_msg = (f"处理游戏信息异常: 渠道={channel}, 类型={game_type}, "
-                                     f"区服={game}, 错误={str(e)}")
-                        self.logger.error(error_msg)
-                        yield f"data: {{\"status\": \"error\", \"message\": \"{error_msg}\"}}\n\n"
-                        continue
+            # 规划阶段：批量加载拓扑数据，在内存中生成完整任务列表
+            plan = OperationPlanner(self.logger).build(game_list, script, rsync_mode)
+            stats_manager.set_metric('planning_time', round(plan.planning_time, 3))
+            # 未启用共享层时缓存只在本进程内，作业执行进程中的命中统计没有参考意义，不输出
+            if lookup_cache.is_shared():
+                stats_manager.set_metric('lookup_cache', lookup_cache.stats())
+            for status, message in plan.messages:
+                yield f"data: {{\"status\": \"{status}\", \"message\": \"{message}\"}}\n\n"
+        else:
+            # 恢复执行：直接使用之前作业中失败/未完成的任务，不重新规划
+            plan = resume_plan
+            message = f"恢复执行，共{len(plan.tasks)}个失败或未完成的任务"
+            self.logger.info(message)
+            yield f"data: {{\"status\": \"info\", \"message\": \"{message}\"}}\n\n"
+
+        tasks = plan.tasks
+        reload_list_tasks = plan.reload_list_tasks
+        reload_status_task = plan.reload_status_task
+        unique_ips = plan.unique_ips
 
         # 处理不同操作类型
-        if script == 'rsync_game':
-            tasks = self._handle_rsync(unique_ips, rsync_mode)
+        if script == 'rsync_game' and resume_plan is None:
+            tasks = self._handle_rsync(unique_ips, rsync_mode, list(game_list))
             # 检查是否返回错误信息
             if isinstance(tasks, str):
                 yield f"data: {{\"status\": \"error\", \"message\": \"{tasks}\"}}\n\n"
                 return
 
+        # 记录任务检查点
+        if self.checkpoint:
+            try:
+                self.checkpoint(tasks, plan)
+            except Exception as e:
+                self.logger.error(f"记录任务检查点失败: {str(e)}")
+
+        if script == 'rsync_game':
             # 正常处理任务列表
             main_futures = self._submit_tasks(tasks)
             self.all_futures.extend(main_futures)
@@ -313,14 +391,12 @@ class OperationGameApp:
         elif script in ('stop_game', 'start_game'):
             self._handle_stop_start(script, tasks)
 
+        elif script == 'reload_game':
+            self._handle_reload(tasks, reload_list_tasks, reload_status_task)
+
         else:
             main_futures = self._submit_tasks(tasks)
             self.all_futures.extend(main_futures)
-
-            # 处理热更后续任务
-            if script == 'reload_game':
-                self._handle_reload(main_futures, reload_list_tasks, reload_status_task)
-
             threading.Thread(target=self.wait_all_tasks_completion, daemon=False).start()
 
         # 输出流生成器
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import json
+from collections import namedtuple
+
+from apps.config import MYSQL_CONFIG, OPERATION_LIST_CONFIG
+from apps.models.operation_mysql import MysqlConfig
+from apps.models.interval_set import IntervalSet
+from apps.models.logger_manager import LoggerManager
+
+# 操作列表：列表ID、版本号、发起人、游戏服列表 {渠道: {类型: IntervalSet}}
+OperationList = namedtuple('OperationList', ['list_id', 'version', 'owner', 'game_list'])
+
+
+def dump_game_list(game_list):
+    """游戏服列表序列化为JSON（区服区间输出为紧凑字符串，如 {"渠道": {"Game": "1_100,105"}}）"""
+    return json.dumps(game_list, default=str)
+
+
+class OperationListStore:
+    """
+    操作列表存储：每个发起人维护自己的操作列表（按列表ID区分），每次写入生成新版本，
+    区服按 渠道/类型 存为连续区间（operation_list_range），读取时只需扫描区间行
+    """
+    def __init__(self, keep_versions=None):
+        """
+        :param keep_versions: 每个列表保留的历史版本数
+        """
+        self.logger = LoggerManager()
+        self.db_manager = MysqlConfig()
+        self.list_table = MYSQL_CONFIG['operation_list']
+        self.range_table = MYSQL_CONFIG['operation_list_range']
+        self.keep_versions = keep_versions or OPERATION_LIST_CONFIG['keep_versions']
+
+    def latest_list_id(self, owner):
+        """发起人最近更新的列表ID（没有时返回None）"""
+        sql = f"SELECT `id` FROM `{self.list_table}` WHERE `owner` = %s ORDER BY `updated_at` DESC, `id` DESC LIMIT 1"
+        rows = self.db_manager.execute_query(sql, (owner,))
+        return rows[0]['id'] if rows else None
+
+    def _create_list(self, owner):
+        sql = (f"INSERT INTO `{self.list_table}` (`owner`, `version`, `created_at`, `updated_at`) "
+               f"VALUES (%s, 0, NOW(), NOW())")
+        return self.db_manager.insert_get_id(sql, (owner,))
+
+    def save(self, owner, game_list, list_id=None):
+        """
+        写入新版本（版本号比对更新，并发写入同一列表时后写入者失败，不会互相覆盖）
+        :param owner: 发起人
+        :param game_list: 游戏服列表 {渠道: {类型: IntervalSet或区服列表}}
+        :param list_id: 列表ID，None时写入发起人最近的列表（没有则新建）
+        :return: OperationList，失败返回None
+        """
+        if list_id is None:
+            list_id = self.latest_list_id(owner) or self._create_list(owner)
+            if list_id is None:
+                return None
+
+        sql = f"SELECT `owner`, `version` FROM `{self.list_table}` WHERE `id` = %s"
+        rows = self.db_manager.execute_query(sql, (list_id,))
+        if not rows or rows[0]['owner'] != owner:
+            self.logger.error(f"操作列表[{list_id}]不存在或不属于{owner}")
+            return None
+        version = rows[0]['version'] + 1
+
+        game_list = {channel: {game_type: IntervalSet.of(game_nus) for game_type, game_nus in types.items()}
+                     for channel, types in game_list.items()}
+        values = [(list_id, version, channel, game_type, start, end)
+                  for channel, types in game_list.items()
+                  for game_type, game_nus in types.items()
+                  for start, end in game_nus.ranges]
+        statements = [(
+            f"UPDATE `{self.list_table}` SET `version` = %s, `updated_at` = NOW() WHERE `id` = %s AND `version` = %s",
+            (version, list_id, version - 1),
+            1  # 版本号已被其他写入更新时受影响行数为0，整个事务回滚
+        )]
+        if values:
+            placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(values))
+            statements.append((
+                f"INSERT INTO `{self.range_table}` (`list_id`, `version`, `channel_name`, `server_type`, "
+                f"`start_nu`, `end_nu`) VALUES {placeholders}",
+                tuple(value for row in values for value in row)
+            ))
+        # 清理超出保留数量的旧版本
+        statements.append((
+            f"DELETE FROM `{self.range_table}` WHERE `list_id` = %s AND `version` <= %s",
+            (list_id, version - self.keep_versions)
+        ))
+
+        if self.db_manager.execute_transaction(statements) is None:
+            self.logger.error(f"操作列表[{list_id}]写入版本{version}失败")
+            return None
+        self.logger.info(f"操作列表[{list_id}]写入版本{version}，发起人：{owner}，共{len(values)}个区服区间")
+        return OperationList(list_id, version, owner, game_list)
+
+    def load(self, list_id, version=None):
+        """
+        读取操作列表（只读取区间行，按渠道/类型组装为区间集合，不展开区服）
+        :param version: 版本号，None为当前版本
+        :return: OperationList，列表不存在返回None
+        """
+        sql = f"SELECT `owner`, `version` FROM `{self.list_table}` WHERE `id` = %s"
+        rows = self.db_manager.execute_query(sql, (list_id,))
+        if not rows:
+            return None
+        owner = rows[0]['owner']
+        version = version or rows[0]['version']
+
+        sql = (f"SELECT `channel_name`, `server_type`, `start_nu`, `end_nu` FROM `{self.range_table}` "
+               f"WHERE `list_id` = %s AND `version` = %s ORDER BY `channel_name`, `server_type`, `start_nu`")
+        ranges = {}
+        for row in self.db_manager.execute_query(sql, (list_id, version)):
+            ranges.setdefault(row['channel_name'], {}).setdefault(row['server_type'], []).append(
+                (row['start_nu'], row['end_nu']))
+        game_list = {channel: {game_type: IntervalSet(game_ranges) for game_type, game_ranges in types.items()}
+                     for channel, types in ranges.items()}
+        return OperationList(list_id, version, owner, game_list)
+
+    def load_latest(self, owner):
+        """读取发起人最近的操作列表（没有时返回None）"""
+        list_id = self.latest_list_id(owner)
+        return self.load(list_id) if list_id is not None else None
+
+
+# 全局操作列表存储实例
+operation_list_store = OperationListStore()
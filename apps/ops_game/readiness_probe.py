@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import time
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+class ReadinessProbe:
+    """就绪探测：并发探测服务端口/接口，直到全部达到期望状态或超过截止时间"""
+    def __init__(self, logger, mode='tcp', deadline=120, interval=1, connect_timeout=2, min_wait=5, sync_wait=1,
+                 status_marker='', status_wait=5, max_workers=20):
+        """
+        :param mode: 端口探测方式（tcp: 端口可连接即就绪；http: 端口有HTTP响应即就绪）
+        :param deadline: 最长等待时间（秒）
+        :param interval: 轮询间隔（秒）
+        :param connect_timeout: 单次探测超时（秒）
+        :param min_wait: 存在无法探测的目标时的最短等待时间（秒）
+        :param sync_wait: 热更前代码同步等待时间（秒）
+        :param status_marker: 状态接口返回内容中表示完成的标识，为空时不轮询，固定等待status_wait秒
+        :param status_wait: 未配置status_marker时状态接口前的固定等待时间（秒）
+        :param max_workers: 并发探测线程数
+        """
+        self.logger = logger
+        self.mode = mode
+        self.deadline = deadline
+        self.interval = interval
+        self.connect_timeout = connect_timeout
+        self.min_wait = min_wait
+        self.sync_wait = sync_wait
+        self.status_marker = status_marker
+        self.status_wait = status_wait
+        self.max_workers = max_workers
+        self.stopped = threading.Event()  # 置位后立即结束正在进行的探测（如取消执行）
+
+    def _port_up(self, host, port):
+        """探测端口是否就绪"""
+        try:
+            if self.mode == 'http':
+                requests.get(f'http://{host}:{port}/', timeout=self.connect_timeout)
+            else:
+                with socket.create_connection((host, int(port)), timeout=self.connect_timeout):
+                    pass
+            return True
+        except (OSError, requests.exceptions.RequestException):
+            return False
+
+    def _url_ok(self, url):
+        """探测接口是否返回成功状态码，且返回内容包含完成标识（状态接口处理中也返回200，只看状态码不能说明已完成）"""
+        try:
+            response = requests.get(url, timeout=self.connect_timeout)
+            return response.ok and self.status_marker in response.text
+        except requests.exceptions.RequestException:
+            return False
+
+    def _poll(self, targets, check):
+        """
+        并发轮询探测，直到全部目标满足条件或超时
+        :param targets: {名称: 探测参数元组}
+        :param check: 探测函数，check(*参数) -> 是否满足条件
+        :return: (等待秒数, 未满足条件的目标名称列表)
+        """
+        start_time = time.monotonic()
+        pending = dict(targets)
+        if not pending:
+            return 0.0, []
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+            while pending:
+                names = list(pending)
+                results = pool.map(lambda name: check(*pending[name]), names)
+                for name, ready in zip(names, list(results)):
+                    if ready:
+                        del pending[name]
+                if not pending or time.monotonic() - start_time >= self.deadline:
+                    break
+                if self.stopped.wait(self.interval):
+                    break
+
+        return time.monotonic() - start_time, sorted(pending)
+
+    def stop(self):
+        """结束正在进行及后续的探测"""
+        self.stopped.set()
+
+    def hold(self, seconds, waited=0.0):
+        """
+        固定等待（可被stop中断），用于无法探测状态的阶段
+        :param seconds: 至少等待的总时间（秒）
+        :param waited: 已经等待的时间（秒），只补足剩余部分
+        :return: 等待总秒数
+        """
+        if seconds > waited:
+            start_time = time.monotonic()
+            self.stopped.wait(seconds - waited)
+            waited += time.monotonic() - start_time
+        return waited
+
+    def wait_ports(self, targets, expect_up=True):
+        """
+        等待端口就绪（起服）或关闭（停服）
+        :param targets: {名称: (host, port)}，端口为空或0的目标无法探测，存在这类目标时至少等待min_wait秒
+        :param expect_up: True等待端口可用，False等待端口关闭
+        :return: (等待秒数, 未达到期望状态的目标名称列表)
+        """
+        probeable = {name: (host, port) for name, (host, port) in targets.items() if host and port}
+        if expect_up:
+            waited, pending = self._poll(probeable, self._port_up)
+        else:
+            waited, pending = self._poll(probeable, lambda host, port: not self._port_up(host, port))
+        if len(probeable) < len(targets):
+            waited = self.hold(self.min_wait, waited)
+        return waited, pending
+
+    def wait_sync(self):
+        """
+        等待代码同步到区服（热更接口所在服务一直在运行，端口可连接不代表代码已同步，只能固定等待）
+        :return: (等待秒数, 未就绪列表)
+        """
+        return self.hold(self.sync_wait), []
+
+    def wait_urls(self, urls):
+        """
+        等待状态接口返回完成标识，未配置status_marker时固定等待status_wait秒
+        :param urls: URL列表
+        :return: (等待秒数, 未就绪的URL列表)
+        """
+        if not self.status_marker:
+            return self.hold(self.status_wait), []
+        return self._poll({url: (url,) for url in urls}, self._url_ok)
@@ -1,11 +1,9 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
-import ast
 import os
 from apps.config import SVN_CONFIG
 from apps.models.query_channel_svn_bin import channel_svn_bin
-from apps.ops_game.db_utils import GameDBUtil
 
 
 def execute_command(cmd_executor, cmd, logger, output_queue, error_msg_prefix):
@@ -29,11 +27,12 @@ def execute_command(cmd_executor, cmd, logger, output_queue, error_msg_prefix):
     return status_info, True
 
 
-def svn_update(svn_logger, executor):
+def svn_update(svn_logger, executor, channels):
     """
     执行SVN更新/检出，实时输出信息到前端
     :param executor: ExecutorScript实例（用于获取output_queue）
     :param svn_logger: 日志实例
+    :param channels: 要操作的游戏服渠道（只输出这些渠道的代码包信息）
     :return: 成功返回True，失败返回错误信息
     """
     from apps.config import bash_script_dir, month_list
@@ -114,20 +113,11 @@ def svn_update(svn_logger, executor):
     current_svn_version = result["stdout"]  # 成功时result为status_info
     os.chdir(bash_script_dir)
 
-    # 获取游戏列表
-    try:
-        game_list_str = GameDBUtil.query_game_list()
-        game_list = ast.literal_eval(game_list_str)
-    except Exception as e:
-        error_msg = f"获取游戏列表异常: {str(e)}"
-        svn_logger.error(error_msg)
-        return error_msg
-
     # 筛选重复的
     package_list = set()
     # 4. 只打印要操作的游戏服渠道的代码包文件的时间信息
     package_mode = ['update', 'reload', 'battle']
-    for channel in game_list:
+    for channel in channels:
         for rsync_mode in package_mode:
             package_list.add(channel_svn_bin(channel, rsync_mode))
     for package_file in package_list:
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import threading
+from collections import OrderedDict
+
+
+class DAGNode:
+    """依赖图节点：一组任务 + 任务完成后的后续动作（如就绪探测、热更请求）"""
+    def __init__(self, key, tasks=None, after=None, deps=()):
+        """
+        :param key: 节点标识（如 (渠道, 区服类型)）
+        :param tasks: 节点内的脚本任务列表（OperationTask）
+        :param after: 节点任务全部完成后执行的动作 after(node)，执行完毕节点才算完成
+        :param deps: 依赖的节点标识列表
+        """
+        self.key = key
+        self.tasks = list(tasks or [])
+        self.after = after
+        self.deps = list(deps)
+        self.dependents = []
+        self.remaining_deps = 0
+        self.remaining_tasks = 0
+
+
+class TaskDAG:
+    """
+    任务依赖图执行器（线程安全）
+    节点的依赖全部完成后立即提交该节点的任务，不同渠道的节点互不阻塞，慢渠道不会拖慢其他渠道
+    """
+    def __init__(self, logger, submit_tasks, on_futures=None, cancelled=None):
+        """
+        :param submit_tasks: 任务提交函数 submit_tasks(tasks) -> futures
+        :param on_futures: 节点提交任务后的回调 on_futures(futures)，用于汇总所有futures
+        :param cancelled: 取消标记（threading.Event），置位后不再执行节点的后续动作
+        """
+        self.logger = logger
+        self.submit_tasks = submit_tasks
+        self.on_futures = on_futures
+        self.cancelled = cancelled
+        self.nodes = OrderedDict()
+        self.lock = threading.Lock()
+        self.remaining_nodes = 0
+        self.finished = threading.Event()
+
+    def add_node(self, key, tasks=None, after=None, deps=()):
+        """添加节点（依赖的节点需先添加）"""
+        if key in self.nodes:
+            raise ValueError(f"重复的任务节点: {key}")
+        for dep in deps:
+            if dep not in self.nodes:
+                raise ValueError(f"任务节点{key}依赖的节点{dep}不存在")
+        node = DAGNode(key, tasks, after, deps)
+        for dep in deps:
+            self.nodes[dep].dependents.append(node)
+        node.remaining_deps = len(node.deps)
+        self.nodes[key] = node
+        return node
+
+    def run(self):
+        """启动所有无依赖的节点（非阻塞），所有节点完成后 finished 被置位"""
+        self.remaining_nodes = len(self.nodes)
+        if not self.nodes:
+            self.finished.set()
+            return
+        for node in [node for node in self.nodes.values() if not node.deps]:
+            self._start_node(node)
+
+    def wait(self, timeout=None):
+        """等待所有节点完成"""
+        return self.finished.wait(timeout)
+
+    def _start_node(self, node):
+        self.logger.info(f"开始处理任务节点{node.key}，共{len(node.tasks)}个任务")
+        if not node.tasks:
+            self._finish_tasks(node)
+            return
+
+        futures = self.submit_tasks(node.tasks)
+        if self.on_futures:
+            self.on_futures(futures)
+        # 批量模式下一个future可能对应多个任务，按future计数
+        node.remaining_tasks = len(futures)
+        if not futures:
+            self._finish_tasks(node)
+            return
+        for future in futures:
+            future.add_done_callback(lambda f, n=node: self._on_task_done(n, f))
+
+    def _on_task_done(self, node, future):
+        if not future.cancelled() and future.exception():
+            self.logger.error(f"任务节点{node.key}执行异常: {future.exception()}")
+        with self.lock:
+            node.remaining_tasks -= 1
+            tasks_done = node.remaining_tasks == 0
+        if tasks_done:
+            self._finish_tasks(node)
+
+    def _finish_tasks(self, node):
+        """节点任务完成后，在独立线程中执行后续动作，避免占用任务线程"""
+        threading.Thread(target=self._complete_node, args=(node,), daemon=True).start()
+
+    def _complete_node(self, node):
+        try:
+            if node.after and self.cancelled is not None and self.cancelled.is_set():
+                self.logger.info(f"已取消执行，跳过任务节点{node.key}的后续动作")
+            elif node.after:
+                node.after(node)
+        except Exception as e:
+            self.logger.error(f"任务节点{node.key}后续动作异常: {str(e)}")
+
+        self.logger.info(f"任务节点{node.key}处理完成")
+        ready = []
+        with self.lock:
+            for dependent in node.dependents:
+                dependent.remaining_deps -= 1
+                if dependent.remaining_deps == 0:
+                    ready.append(dependent)
+            self.remaining_nodes -= 1
+            all_done = self.remaining_nodes == 0
+
+        for dependent in ready:
+            self._start_node(dependent)
+        if all_done:
+            self.finished.set()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import os
+import re
+import time
+import shutil
+from collections import OrderedDict
+
+
+class TaskLogSpool:
+    """
+    任务输出日志落盘：每个作业一个目录，每个任务一个只追加的日志文件
+    （<base_dir>/<job_id>/<task_id>.log），排查单个区服时直接读取该文件，无需检索共享日志
+    """
+    # 任务ID/作业ID中允许出现在文件名里的字符，其余替换为下划线
+    UNSAFE_CHARS = re.compile(r'[^\w.\-]')
+
+    def __init__(self, base_dir):
+        """
+        :param base_dir: 日志根目录
+        """
+        self.base_dir = base_dir
+
+    def _safe_name(self, name):
+        return self.UNSAFE_CHARS.sub('_', str(name)).lstrip('.') or '_'
+
+    def job_dir(self, job_id):
+        return os.path.join(self.base_dir, self._safe_name(job_id))
+
+    def path(self, job_id, task_id):
+        """任务日志文件路径"""
+        return os.path.join(self.job_dir(job_id), f"{self._safe_name(task_id)}.log")
+
+    @staticmethod
+    def _format(event):
+        """将输出事件转为日志行：脚本输出原样写入，状态消息加时间和状态前缀"""
+        message = event.get('message', '')
+        if event.get('status') == 'running':
+            return f"{message}\n"
+        return f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] [{event.get('status')}] {message}\n"
+
+    def open_writer(self, job_id, max_open=64):
+        """打开作业的逐条写入器（作业执行过程中边输出边落盘）"""
+        return TaskLogWriter(self, job_id, max_open)
+
+    def remove(self, job_ids):
+        """删除作业的日志目录（随过期作业一起清理）"""
+        for job_id in job_ids:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+
+class TaskLogWriter:
+    """
+    单个作业的任务日志逐条写入器（只在作业的输出线程中使用）：缓存最近写入的任务文件句柄（LRU），
+    每条写入后刷新，查看日志末尾时能读到最新输出
+    """
+    def __init__(self, spool, job_id, max_open=64):
+        """
+        :param spool: TaskLogSpool
+        :param max_open: 最多同时打开的文件数，超过后关闭最久未写入的文件
+        """
+        self.spool = spool
+        self.job_id = job_id
+        self.max_open = max_open
+        self.files = OrderedDict()  # {task_id: 文件对象}
+
+    def _file(self, task_id):
+        f = self.files.get(task_id)
+        if f is not None:
+            self.files.move_to_end(task_id)
+            return f
+        if not self.files:
+            os.makedirs(self.spool.job_dir(self.job_id), mode=0o755, exist_ok=True)
+        f = open(self.spool.path(self.job_id, task_id), 'a', encoding='utf-8')
+        self.files[task_id] = f
+        while len(self.files) > self.max_open:
+            self.files.popitem(last=False)[1].close()
+        return f
+
+    def write(self, event):
+        """写入一条输出事件，不含task_id的作业级消息不落盘"""
+        if not (isinstance(event, dict) and event.get('task_id')):
+            return
+        f = self._file(event['task_id'])
+        f.write(self.spool._format(event))
+        f.flush()
+
+    def close(self):
+        while self.files:
+            self.files.popitem()[1].close()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import time
+from collections import defaultdict
+
+from apps.config import OPERATION_PARAMETER
+from apps.ops_game.db_utils import GameDBUtil
+from apps.ops_game.task_utils import TaskUtil, OperationTask
+from apps.ops_game.filter_game_list import format_game_nu
+
+
+class OperationPlan:
+    """操作计划：规划阶段一次性生成的任务列表及热更相关信息"""
+    def __init__(self):
+        self.tasks = []                   # 脚本任务列表（OperationTask）
+        self.reload_list_tasks = defaultdict(set)    # 热更请求URL（按渠道分组）
+        self.reload_status_task = defaultdict(set)   # 热更状态检查URL（按渠道分组）
+        self.unique_ips = set()           # 需要同步代码的服务器（格式: IP__渠道）
+        self.messages = []                # 需要推送到前端的告警/错误信息（status, message）
+        self.planning_time = 0.0          # 规划耗时（秒）
+
+
+class OperationPlanner:
+    """
+    任务规划器：按渠道批量加载 game_server_list / server_list / channel_list / reload_url_list，
+    在内存中生成完整的任务列表，避免每个区服单独查询数据库
+    """
+    def __init__(self, logger):
+        self.logger = logger
+        self.channels_info = {}
+        self.reload_urls = {}
+        # (渠道, 类型, 区服) -> 区服信息列表（按id排序，与原逐条查询的返回顺序一致）
+        self.game_servers = defaultdict(list)
+
+    def _load(self, channels):
+        """用少量集合查询加载所选渠道的全部拓扑数据"""
+        self.channels_info = GameDBUtil.get_channels_info(channels)
+        self.reload_urls = GameDBUtil.get_reload_url_map()
+
+        self.game_servers = defaultdict(list)
+        seen_ids = set()
+        for row in GameDBUtil.get_channels_game_servers(channels):
+            # LEFT JOIN 可能因server_list中同一内网IP存在多条记录而重复，只保留第一条
+            if row['id'] in seen_ids:
+                continue
+            seen_ids.add(row['id'])
+            key = (row['channel_name'], row['server_type'], int(row['game_nu']))
+            self.game_servers[key].append(row)
+
+    def _get_servers(self, channel, game_type, game_nu):
+        return self.game_servers.get((channel, game_type, int(game_nu)), [])
+
+    def build(self, game_list, script, rsync_mode=None):
+        """
+        生成操作计划（任务及参数与原逐区服查询的实现保持一致）
+        :param game_list: 要操作的游戏服列表 {渠道: {类型: IntervalSet}}
+        :param script: 脚本操作参数（如 update_game）
+        :param rsync_mode: 同步模式（update|reload|battle）
+        :return: OperationPlan
+        """
+        start_time = time.perf_counter()
+        plan = OperationPlan()
+        operation = script.split('_')[0]
+        operation_desc = OPERATION_PARAMETER[operation]
+        # svn锁
+        svn_lock = 'lock'
+        lock_status = 0
+
+        self._load(list(game_list))
+
+        for channel in game_list:
+            channel_info = self.channels_info.get(channel, {})
+            external_switch = channel_info.get('external_switch', 0)
+            for game_type in game_list[channel]:
+                # 处理热更相关任务（Central类型）
+                if script == 'reload_game' or rsync_mode == 'reload':
+                    if game_type == 'Game':
+                        # 获取渠道的游戏服初始zone_id，热更区服列表按区间偏移后格式化（每个渠道只计算一次）
+                        zone_id = int(channel_info.get('initial_id', 0))
+                        reload_list = format_game_nu(game_list[channel][game_type], zone_id)
+                        for server in self._get_servers(channel, 'Central', 1):
+                            game_ip = server['intranet_ip'] if int(external_switch) != 1 else server['external_ip']
+                            game_dir = server['server_dir']
+                            http_port = server['http_port']
+
+                            # 生成Central基础任务
+                            if 'Central' not in game_list[channel]:
+                                task_id = TaskUtil.generate_task_id(channel, 'Central', 1)
+                                info = TaskUtil.generate_task_info(channel, 'Central', 1, game_ip, operation_desc)
+                                parameter = f"{channel} {game_ip} {game_dir} {operation}"
+                                plan.tasks.append(OperationTask(task_id, script, parameter, info, game_type,
+                                                                channel, game_ip, http_port))
+
+                            # 收集热更URL
+                            reload_url = self.reload_urls.get('Game', '')
+                            plan.reload_list_tasks[channel].add(f'http://{game_ip}:{http_port}{reload_url}{reload_list}')
+
+                            status_url = self.reload_urls.get('status', '')
+                            plan.reload_status_task[channel].add(f'http://{game_ip}:{http_port}{status_url}')
+
+                            plan.unique_ips.add(f"{game_ip}__{channel}")
+
+                # 处理录像更新
+                elif script == 'battle_game' or rsync_mode == 'battle':
+                    if game_type != 'Game':
+                        continue
+
+                # 处理普通游戏服任务
+                for game in game_list[channel][game_type]:
+                    try:
+                        game_info = self._get_servers(channel, game_type, game)
+                        if not game_info:
+                            error_msg = f"未找到游戏信息: 渠道={channel}, 类型={game_type}, 区服={game}"
+                            self.logger.error(error_msg)
+                            plan.messages.append(('warning', error_msg))
+                            continue
+
+                        # 处理IP和目录信息
+                        game_dir = game_info[0]['server_dir']
+                        intranet_ip = game_info[0]['intranet_ip']
+                        http_port = game_info[0]['http_port']
+                        game_ip = intranet_ip
+
+                        if int(external_switch) == 1:
+                            external_ip = game_info[0]['server_external_ip']
+                            if not external_ip:
+                                error_msg = f"未找到服务器信息: 内网IP={intranet_ip}"
+                                self.logger.error(error_msg)
+                                plan.messages.append(('warning', error_msg))
+                                continue
+                            game_ip = external_ip
+
+                        # 热更操作特殊处理（非Game类型）
+                        if script == 'reload_game' and game_type != 'Game':
+                            for server in game_info:
+                                reload_url = self.reload_urls.get('other', '')
+                                plan.reload_list_tasks[channel].add(f'http://{game_ip}:{server["http_port"]}{reload_url}')
+
+                        # 收集IP和生成任务，只对同步代码到服务器调用
+                        plan.unique_ips.add(f"{game_ip}__{channel}")
+
+                        # 收集游戏服信息
+                        task_id = TaskUtil.generate_task_id(channel, game_type, game)
+                        info = TaskUtil.generate_task_info(channel, game_type, game, game_ip, operation_desc)
+                        if script == 'initial_game':
+                            # 当第一个区服才不加锁
+                            if svn_lock == 'lock' and lock_status == 0:
+                                lock_status += 1
+                                svn_lock = 'no_lock'
+                            else:
+                                svn_lock = 'lock'
+                            parameter = f"{channel} {game_ip} {game_type} {game_dir} {game} {svn_lock} {operation}"
+                        else:
+                            parameter = f"{channel} {game_ip} {game_dir} {operation}"
+                        plan.tasks.append(OperationTask(task_id, script, parameter, info, game_type,
+                                                        channel, game_ip, http_port))
+
+                    except Exception as e:
+                        error_msg = (f"处理游戏信息异常: 渠道={channel}, 类型={game_type}, "
+                                     f"区服={game}, 错误={str(e)}")
+                        self.logger.error(error_msg)
+                        plan.messages.append(('error', error_msg))
+                        continue
+
+        plan.planning_time = time.perf_counter() - start_time
+        self.logger.info(f"任务规划完成，共{len(plan.tasks)}个任务，耗时{plan.planning_time:.3f}秒")
+        return plan
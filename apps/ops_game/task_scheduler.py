@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+import time
+import threading
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, Future
+
+
+class TaskScheduler:
+    """
+    任务调度器（线程安全）
+    在全局并发上限之外，限制单台主机、单个渠道的并发任务数，并在渠道之间轮询调度，
+    避免大渠道占满所有工作线程、同一主机上的区服同时rsync压垮磁盘
+    """
+    def __init__(self, max_total, max_per_host=None, max_per_channel=None, controller=None):
+        """
+        :param max_total: 全局最大并发任务数（线程池大小）
+        :param max_per_host: 单台主机最大并发任务数（None为不限制）
+        :param max_per_channel: 单个渠道最大并发任务数（None为不限制）
+        :param controller: 自适应并发控制器（AdaptiveConcurrency），设置后全局并发以其当前值为准
+        """
+        self.max_total = max_total
+        self.max_per_host = max_per_host
+        self.max_per_channel = max_per_channel
+        self.controller = controller
+        self.pool = ThreadPoolExecutor(max_workers=max_total)
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        # 等待调度的任务：{渠道: deque[(future, host, fn, args, kwargs)]}
+        self.pending = OrderedDict()
+        # 渠道轮询顺序
+        self.channel_order = deque()
+        # 运行中的任务计数
+        self.running_total = 0
+        self.running_hosts = defaultdict(int)
+        self.running_channels = defaultdict(int)
+        self._shutdown = False
+
+    def submit(self, fn, *args, **kwargs):
+        """提交不区分主机/渠道的任务（仅受全局并发限制），接口与ThreadPoolExecutor一致"""
+        return self.submit_task(None, None, fn, *args, **kwargs)
+
+    def submit_task(self, channel, host, fn, *args, **kwargs):
+        """
+        提交任务
+        :param channel: 任务所属渠道（用于渠道并发限制和轮询）
+        :param host: 任务所在主机IP（用于主机并发限制）
+        :return: Future
+        """
+        future = Future()
+        with self.lock:
+            if self._shutdown:
+                raise RuntimeError('调度器已关闭，无法提交新任务')
+            if channel not in self.pending:
+                self.pending[channel] = deque()
+                self.channel_order.append(channel)
+            self.pending[channel].append((future, host, fn, args, kwargs))
+            self._dispatch()
+        return future
+
+    def _host_available(self, host):
+        return host is None or self.max_per_host is None or self.running_hosts[host] < self.max_per_host
+
+    def _channel_available(self, channel):
+        return channel is None or self.max_per_channel is None \
+            or self.running_channels[channel] < self.max_per_channel
+
+    def _capacity(self):
+        """当前全局并发上限"""
+        if self.controller is None:
+            return self.max_total
+        return min(self.max_total, self.controller.limit)
+
+    def _dispatch(self):
+        """在持锁状态下，按渠道轮询启动满足并发限制的任务"""
+        while self.running_total < self._capacity() and self.channel_order:
+            dispatched = False
+            for _ in range(len(self.channel_order)):
+                channel = self.channel_order[0]
+                self.channel_order.rotate(-1)
+                if not self._channel_available(channel):
+                    continue
+
+                channel_queue = self.pending[channel]
+                item = next((item for item in channel_queue if self._host_available(item[1])), None)
+                if item is None:
+                    continue
+
+                channel_queue.remove(item)
+                if not channel_queue:
+                    del self.pending[channel]
+                    self.channel_order.remove(channel)
+                self._start(channel, item)
+                dispatched = True
+                break
+
+            if not dispatched:
+                break
+
+    def _start(self, channel, item):
+        future, host, fn, args, kwargs = item
+        if not future.set_running_or_notify_cancel():
+            return
+        self.running_total += 1
+        if channel is not None:
+            self.running_channels[channel] += 1
+        if host is not None:
+            self.running_hosts[host] += 1
+        self.pool.submit(self._run, channel, host, future, fn, args, kwargs)
+
+    def _run(self, channel, host, future, fn, args, kwargs):
+        start_time = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(channel, host, future, start_time, exception=e)
+            return
+
+        if isinstance(result, Future):
+            # 异步任务（如多路复用执行引擎）：工作线程立即释放，任务结束时再释放调度名额
+            result.add_done_callback(
+                lambda f: self._finish(channel, host, future, start_time,
+                                       result=None if f.exception() else f.result(), exception=f.exception())
+            )
+        else:
+            self._finish(channel, host, future, start_time, result=result)
+
+    def _finish(self, channel, host, future, start_time, result=None, exception=None):
+        """任务结束：设置结果、记录自适应并发统计、释放并发名额并调度后续任务"""
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        finally:
+            # 仅统计区服/主机任务（返回码为0视为成功）
+            if self.controller is not None and (channel is not None or host is not None):
+                self.controller.record(time.perf_counter() - start_time, exception is not None or result != 0)
+            with self.lock:
+                self.running_total -= 1
+                if channel is not None:
+                    self.running_channels[channel] -= 1
+                if host is not None:
+                    self.running_hosts[host] -= 1
+                self._dispatch()
+                if not self.running_total and not self.pending:
+                    self.idle.notify_all()
+
+    def shutdown(self, wait=True):
+        """关闭调度器；wait=True时等待已提交的任务全部执行完毕"""
+        with self.lock:
+            self._shutdown = True
+            if wait:
+                while self.running_total or self.pending:
+                    self.idle.wait()
+        self.pool.shutdown(wait=wait)
@@ -1,6 +1,15 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
+from collections import namedtuple
+
+# 操作任务结构（兼容原有的元组下标访问：task[0]~task[4]）
+OperationTask = namedtuple(
+    'OperationTask',
+    ['task_id', 'script', 'parameter', 'info', 'game_type', 'channel', 'game_ip', 'http_port'],
+    defaults=(None, None, 0)
+)
+
 
 class TaskUtil:
     """任务处理工具类"""
@@ -13,4 +22,4 @@ class TaskUtil:
     def generate_task_info(channel, game_type, game_nu, game_ip, operation_desc):
         """生成任务描述信息"""
         return (f"操作信息: IP={game_ip}, 渠道={channel}, 类型={game_type}, "
-                f"区服={game_nu}, 操作={operation_desc}")
\ No newline at end of file
+                f"区服={game_nu}, 操作={operation_desc}")
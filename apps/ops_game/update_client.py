@@ -6,13 +6,14 @@ import queue
 from concurrent.futures import ThreadPoolExecutor
 from apps.models.logger_manager import LoggerManager
 from apps.models.executor_ssh import SSHExecutor
-from apps.config import CLIENT_INFO, CLIENT_UPDATE_CMD, MAX_WORKERS
+from apps.models.output_queue import BoundedOutputQueue
+from apps.config import CLIENT_INFO, CLIENT_UPDATE_CMD, MAX_WORKERS, OUTPUT_QUEUE_CONFIG
 
 
 class UpdateClientApp:
     def __init__(self):
         self.logger = LoggerManager()
-        self.output_queue = queue.Queue()  # 线程安全的输出队列
+        self.output_queue = BoundedOutputQueue(**OUTPUT_QUEUE_CONFIG)  # 线程安全的有界输出队列
         self.task_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
         # 初始化SSH执行器
         self.ssh_executor = SSHExecutor(
@@ -58,6 +59,10 @@ class UpdateClientApp:
                 item = self.output_queue.get(timeout=30)  # 超时避免无限阻塞
                 if item is None:
                     # 任务完成
+                    queue_stats = self.output_queue.stats()
+                    if queue_stats['elided']:
+                        self.logger.warning(f"前端更新输出读取过慢，省略{queue_stats['elided']}行输出，"
+                                            f"队列最高水位{queue_stats['high_water']}")
                     yield f"data: {json.dumps({'status': 'completed', 'message': f'{channel}渠道前端更新操作全部完成'})}\n\n"
                     break
                 # 推送输出内容（兼容原有SSH执行器的输出格式）
@@ -2,6 +2,7 @@
 # -*- coding: UTF-8 -*-
 
 from apps.config import MYSQL_CONFIG
+from apps.models.lookup_cache import lookup_cache
 from apps.server.asset_manager import create_management_bp
 
 # 使用工厂函数创建蓝图，只传入差异化参数
@@ -13,5 +14,6 @@ channel_bp = create_management_bp(
     modify_template='server/modify_channel.html',
     table_config=MYSQL_CONFIG['channel_list'],
     entity_name='渠道',
-    list_var_name='channels'  # 模板中用channels接收列表数据
+    list_var_name='channels',  # 模板中用channels接收列表数据
+    on_change=lambda: lookup_cache.invalidate(MYSQL_CONFIG['channel_list'])  # 渠道变更后失效渠道查询缓存
 )
\ No newline at end of file
@@ -2,6 +2,7 @@
 # -*- coding: UTF-8 -*-
 
 from apps.config import MYSQL_CONFIG
+from apps.models.topology_cache import invalidate_topology
 from apps.server.asset_manager import create_management_bp
 
 game_bp = create_management_bp(
@@ -12,5 +13,6 @@ game_bp = create_management_bp(
     modify_template='server/modify_game.html',
     table_config=MYSQL_CONFIG['game_list_table'],
     entity_name='游戏服',
-    list_var_name='game_ls'
+    list_var_name='game_ls',
+    on_change=invalidate_topology  # 区服变更后更新拓扑缓存版本
 )
\ No newline at end of file
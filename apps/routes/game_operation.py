@@ -1,19 +1,23 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
+import os
 import json
 
 from flask_login import current_user
 from flask_login import login_required
-from flask import Blueprint, jsonify, request, render_template, Flask, Response
+from flask import Blueprint, jsonify, request, render_template, Flask, Response, send_file
+from werkzeug.wsgi import wrap_file
+from werkzeug.datastructures import ContentRange
 
 from apps.models.decorators import admin_required
 from apps.ops_game.deploy_game_operation import AddGameApp
-from apps.ops_game.operation_game_app import OperationGameApp
+from apps.ops_game.job_engine import get_job_manager
+from apps.config import JOB_STORE_CONFIG
 from apps.ops_game.filter_game_list import GameListFilter
 from apps.models.logger_manager import LoggerManager
 from apps.ops_game.update_client import UpdateClientApp
-from apps.ops_game.db_utils import GameDBUtil
+from apps.ops_game.operation_list_store import operation_list_store, dump_game_list
 
 # 实例化类（创建实例）
 query_game_operation_info = GameListFilter()
@@ -21,8 +25,8 @@ query_game_operation_info = GameListFilter()
 get_games = query_game_operation_info.get_games
 # 查询游戏服有哪些数据，用作选择提交
 query_game_db = query_game_operation_info.query_game_db
-# 查询要操作的区服列表
-query_game_list = GameDBUtil.query_game_list
+# 查询发起人最近的操作列表
+load_operation_list = operation_list_store.load_latest
 # 查询游戏服列表下的渠道列表
 get_distinct_channels = query_game_operation_info.get_distinct_channels
 # 查询游戏服列表下的区服类型
@@ -52,19 +56,147 @@ def game_operation():
     script_alias = request.args.get('script', '')
     # 如果是同步代码就接受 同步模式参数(update|reload)
     rsync_mode = request.args.get('rsync_mode', '')
+    # 执行模式（host: 按主机批量执行）
+    batch_mode = request.args.get('batch_mode', '')
+    # 并发模式（adaptive: 根据任务耗时和失败率自适应调整并发）
+    concurrency_mode = request.args.get('concurrency', '')
+    # 操作列表ID（不传时使用发起人最近的操作列表）
+    list_id = request.args.get('list_id', type=int)
     if rsync_mode:
         # 记录日志信息
         logger.info(f"执行同步操作，模式：{rsync_mode}，脚本参数：{script_alias}")
     else:
         logger.info(f"执行游戏服脚本操作，脚本参数：{script_alias}")
 
-    operation_game = OperationGameApp()
+    # 操作以作业方式在后台运行，浏览器断开不影响执行，可通过作业ID重新接入
+    job_manager = get_job_manager()
+    # 指定retry_job时只重试该作业中失败或未完成的任务
+    retry_job = request.args.get('retry_job', '')
+    if retry_job:
+        logger.info(f"重试作业[{retry_job}]中失败或未完成的任务")
+        job_id, error_msg = job_manager.retry_job(
+            retry_job,
+            owner=current_user.username,
+            batch_mode=batch_mode or None,
+            concurrency_mode=concurrency_mode or None
+        )
+        if error_msg:
+            return Response(
+                f"data: {json.dumps({'status': 'error', 'message': error_msg}, ensure_ascii=False)}\n\n"
+                f"data: {json.dumps({'status': 'completed', 'message': '重试未执行'}, ensure_ascii=False)}\n\n",
+                mimetype='text/event-stream'
+            )
+    else:
+        job_id = job_manager.start_job(
+            script=script_alias,
+            rsync_mode=rsync_mode,
+            batch_mode=batch_mode,
+            concurrency_mode=concurrency_mode,
+            owner=current_user.username,
+            list_id=list_id
+        )
     return ops_game.response_class(
-        operation_game.operation_game(script=script_alias, rsync_mode=rsync_mode),
+        job_manager.stream(job_id, mode=request.args.get('stream', '')),
         mimetype='text/event-stream'
     )
 
 
+@operation_bp.route('/jobs')
+@login_required
+@admin_required
+def list_jobs():
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify(get_job_manager().list_jobs(limit=limit))
+
+
+@operation_bp.route('/jobs/<job_id>')
+@login_required
+@admin_required
+def get_job(job_id):
+    job = get_job_manager().get_job(job_id)
+    if job is None:
+        return jsonify({'error': f'作业不存在: {job_id}'}), 404
+    return jsonify(job)
+
+
+@operation_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+@login_required
+@admin_required
+def cancel_job(job_id):
+    logger.info(f"用户 {current_user.username} 取消作业[{job_id}]")
+    if not get_job_manager().cancel_job(job_id):
+        return jsonify({'status': 'error', 'message': f'作业不存在或已结束: {job_id}'}), 409
+    return jsonify({'status': 'success', 'message': f'已请求取消作业: {job_id}'})
+
+
+@operation_bp.route('/jobs/<job_id>/stream')
+@login_required
+@admin_required
+def stream_job(job_id):
+    # EventSource自动重连时通过Last-Event-ID请求头传递，手动重连时通过last_event_id参数传递
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0
+    try:
+        last_event_id = int(last_event_id)
+    except ValueError:
+        last_event_id = 0
+    return ops_game.response_class(
+        get_job_manager().stream(job_id, last_event_id=last_event_id, mode=request.args.get('stream', '')),
+        mimetype='text/event-stream'
+    )
+
+
+@operation_bp.route('/jobs/<job_id>/tasks/<task_id>/events')
+@login_required
+@admin_required
+def get_task_events(job_id, task_id):
+    return jsonify(get_job_manager().get_task_events(job_id, task_id))
+
+
+@operation_bp.route('/jobs/<job_id>/tasks/<task_id>/log')
+@login_required
+@admin_required
+def get_task_log(job_id, task_id):
+    """
+    读取任务日志文件（支持Range按字节范围读取）
+    ?tail=N 返回末尾N字节（未指定Range时生效，N为空取默认值，N必须为正整数）
+    """
+    path = get_job_manager().get_task_log(job_id, task_id)
+    if path is None:
+        return jsonify({'error': f'任务日志不存在: {job_id}/{task_id}'}), 404
+    if 'tail' in request.args and not request.range:
+        value = request.args['tail']
+        tail = int(value) if value.isdecimal() else (JOB_STORE_CONFIG['tail_bytes'] if not value else 0)
+        if tail <= 0:
+            return jsonify({'error': f'tail必须为正整数: {value}'}), 400
+        response = _send_log_tail(path, tail)
+        if response is not None:
+            return response
+    return send_file(path, mimetype='text/plain; charset=utf-8', conditional=True, max_age=0)
+
+
+def _send_log_tail(path, tail):
+    """
+    以206返回日志末尾tail字节：文件定位到起始偏移后交给WSGI服务器的file_wrapper发送
+    （gunicorn从文件当前位置按Content-Length调用sendfile，不经过Python读取）
+    :return: Response，文件不足tail字节时返回None（由调用方返回整个文件）
+    """
+    log_file = open(path, 'rb')
+    size = os.fstat(log_file.fileno()).st_size
+    if tail >= size:
+        log_file.close()
+        return None
+    offset = size - tail
+    log_file.seek(offset)
+    response = Response(wrap_file(request.environ, log_file), status=206,
+                        content_type='text/plain; charset=utf-8', direct_passthrough=True)
+    response.content_length = tail
+    response.content_range = ContentRange('bytes', offset, size, size)
+    response.accept_ranges = 'bytes'
+    response.cache_control.no_cache = True
+    response.cache_control.max_age = 0
+    return response
+
+
 @operation_bp.route('/generator_list')
 @login_required
 @admin_required
@@ -128,18 +260,25 @@ def submit_selection():
     server_type = data.get('server_type') or None
     game_nu = data.get('game_nu') or None
 
-    # 传递update_mode参数到查询方法
-    rows, filter_list = query_game_db(
+    # 传递update_mode参数到查询方法（查询、生成列表、写入只执行一次选择SQL）
+    results, operation_list, stats = query_game_db(
         channel_name=channel_name,
         server_type=server_type,
         game_nu=game_nu,
-        update_mode=update_mode
+        update_mode=update_mode,
+        owner=current_user.username
     )
-    results = [f"{r['channel_name']} - {r['server_type']} - {r['game_nu']}" for r in rows] or ["未找到匹配的区服"]
-    if '未找到匹配的区服' in results:
-        return jsonify({'results': results})
-    filter_list = query_game_list()
-    return filter_list
+    if not results:
+        return jsonify({'results': ["未找到匹配的区服"]})
+    if operation_list is None:
+        return jsonify({'error': '列表信息写入到操作列表中失败'}), 500
+    # 直接返回本次写入的列表（与写入内容一致），无需再读回
+    response = Response(dump_game_list(operation_list.game_list), mimetype='application/json')
+    response.headers['X-List-Id'] = str(operation_list.list_id)
+    response.headers['X-List-Version'] = str(operation_list.version)
+    response.headers['X-Rows-Scanned'] = str(stats['rows'])
+    response.headers['X-Elapsed-Ms'] = str(int(stats['elapsed'] * 1000))
+    return response
 
 
 @operation_bp.route('/query_list')
@@ -147,7 +286,8 @@ def submit_selection():
 @admin_required
 def query_data():
     try:
-        return query_game_list()
+        operation_list = load_operation_list(current_user.username)
+        return dump_game_list(operation_list.game_list) if operation_list else ""
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -227,11 +367,11 @@ def add_game():
     init_number = data.get('init_number') or None
 
     # 添加区服列表
-    add_game_app = AddGameApp(channel_name, game_type, max_game, init_number)
+    add_game_app = AddGameApp(channel_name, game_type, max_game, init_number, owner=current_user.username)
     add_status, message = add_game_app.add_game_info()
     if add_status != 'success':
         return jsonify({'status': add_status, 'message': message})
 
-    filter_list = query_game_list()
+    filter_list = dump_game_list(add_game_app.operation_list.game_list)
 
     return jsonify({'status': 'success', 'message': filter_list})
\ No newline at end of file
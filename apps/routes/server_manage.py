@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
+from apps.models.topology_cache import invalidate_topology
 from apps.server.asset_manager import create_management_bp
 
 server_bp = create_management_bp(
@@ -11,5 +12,6 @@ server_bp = create_management_bp(
     modify_template='server/modify_server.html',
     table_config=None,  # 服务器模块使用默认表配置
     entity_name='服务器',
-    list_var_name='servers'  # 模板中用servers接收列表数据
+    list_var_name='servers',  # 模板中用servers接收列表数据
+    on_change=invalidate_topology  # 服务器变更后更新拓扑缓存版本（区服拓扑关联服务器外网IP）
 )
\ No newline at end of file
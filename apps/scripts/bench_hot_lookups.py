@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+热点查询索引基准测试：在本地MySQL的测试库中灌入模拟数据，分别在无索引/有索引（迁移 9b382e8533e1）
+两种情况下执行 GameListFilter / GameDBUtil 的查询，对比耗时
+
+用法（测试库需先导入 ops_game.sql，库名必须以 _bench 结尾，避免误清空正式库）：
+    OPS_DB_NAME=ops_game_bench python -m apps.scripts.bench_hot_lookups --seed --channels 20 --zones 3000
+"""
+
+import sys
+import time
+import argparse
+import importlib.util
+from pathlib import Path
+
+from apps.config import MYSQL_CONFIG, db_name
+from apps.models.operation_mysql import MysqlConfig
+from apps.models.lookup_cache import lookup_cache
+from apps.ops_game.db_utils import GameDBUtil
+from apps.ops_game.filter_game_list import GameListFilter
+
+MIGRATION = Path(__file__).resolve().parents[2] / 'migrations' / 'versions' / '9b382e8533e1_hot_lookup_indexes.py'
+# 每条INSERT写入的行数
+INSERT_CHUNK = 1000
+
+
+def load_indexes():
+    """读取迁移中定义的索引，保证测试的索引与迁移一致"""
+    spec = importlib.util.spec_from_file_location('hot_lookup_indexes', MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.INDEXES
+
+
+def insert_rows(db, table, columns, rows):
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    fields = ', '.join(f'`{column}`' for column in columns)
+    statements = []
+    for i in range(0, len(rows), INSERT_CHUNK):
+        chunk = rows[i:i + INSERT_CHUNK]
+        statements.append((f"INSERT INTO `{table}` ({fields}) VALUES {', '.join([placeholders] * len(chunk))}",
+                           tuple(value for row in chunk for value in row)))
+    if db.execute_transaction(statements) is None:
+        raise RuntimeError(f"写入{table}失败")
+
+
+def seed(db, channels, zones, hosts):
+    """清空并灌入模拟数据：每个渠道 hosts 台服务器、zones 个Game区服及Central/Global/Play"""
+    for table in ('game_list_table', 'server_list', 'mysql_list', 'channel_list'):
+        db.execute_update(f"TRUNCATE TABLE `{MYSQL_CONFIG[table]}`")
+
+    channel_rows, server_rows, mysql_rows, game_rows = [], [], [], []
+    for c in range(channels):
+        channel = f'bench{c:03d}'
+        channel_rows.append((channel, channel, channel, c * 100000, c % 2))
+        mysql_rows.append((f'{channel}-db', channel, f'10.{c}.255.1', channel, 'MySQL', 3306, 8, 32, 500, 'centos',
+                           '', 0))
+        for h in range(hosts):
+            server_rows.append((f'{channel}-{h}', channel, f'1.{c}.{h // 250}.{h % 250}',
+                                f'10.{c}.{h // 250}.{h % 250}', channel, 'Game', 22, 8, 32, 500, 'centos'))
+        for game_type, count in (('Central', 1), ('Global', 1), ('Play', 2), ('Game', zones)):
+            for nu in range(1, count + 1):
+                h = nu % hosts
+                game_rows.append((channel, game_type, f'sh_{game_type.lower()}{nu}', nu,
+                                  f'1.{c}.{h // 250}.{h % 250}', f'10.{c}.{h // 250}.{h % 250}',
+                                  f'10.{c}.255.1', f'{channel}_{nu}', 1, 0 if nu % 50 else 2, 9000 + nu))
+
+    insert_rows(db, MYSQL_CONFIG['channel_list'],
+                ['channel_name', 'annotation', 'alias_name', 'initial_id', 'external_switch'], channel_rows)
+    insert_rows(db, MYSQL_CONFIG['mysql_list'],
+                ['host_name', 'alias_name', 'intranet_ip', 'belong_to_channel', 'server_type', 'mysql_port',
+                 'cpu_info', 'men_info', 'hard_disk', 'system_info', 'tunnel_ip', 'tunnel_port'], mysql_rows)
+    insert_rows(db, MYSQL_CONFIG['server_list'],
+                ['host_name', 'alias_name', 'external_ip', 'intranet_ip', 'belong_to_channel', 'server_type',
+                 'ssh_port', 'cpu_info', 'men_info', 'hard_disk', 'system_info'], server_rows)
+    insert_rows(db, MYSQL_CONFIG['game_list_table'],
+                ['channel_name', 'server_type', 'server_dir', 'game_nu', 'external_ip', 'intranet_ip',
+                 'server_db_ip', 'server_db_name', 'open_status', 'game_status', 'http_port'], game_rows)
+    print(f"已灌入 {channels} 个渠道、{len(server_rows)} 台服务器、{len(game_rows)} 个区服")
+
+
+def set_indexes(db, indexes, enabled):
+    """创建或删除迁移中的索引（已是目标状态时跳过）"""
+    for table, name, columns in indexes:
+        exists = bool(db.execute_query(f"SHOW INDEX FROM `{table}` WHERE Key_name = %s", (name,)))
+        if enabled and not exists:
+            db.execute_update(f"ALTER TABLE `{table}` ADD INDEX `{name}` ({', '.join(f'`{c}`' for c in columns)})")
+        elif not enabled and exists:
+            db.execute_update(f"ALTER TABLE `{table}` DROP INDEX `{name}`")
+    for table in sorted({table for table, _, _ in indexes}):
+        db.execute_query(f"ANALYZE TABLE `{table}`")
+
+
+def build_queries(channels, zones):
+    """热点查询：(名称, 执行函数)，配置查询每次先清空进程内缓存，拓扑查询绕过拓扑缓存"""
+    game_filter = GameListFilter()
+    channel = f'bench{channels // 2:03d}'
+    others = [f'bench{c:03d}' for c in range(min(channels, 3))]
+    ip = '10.{}.0.{}'.format(channels // 2, 7)
+    select_sql, select_params = game_filter._build_game_query_sql(
+        channel, 'Game', f'1_{zones // 4},{zones // 2}_{zones // 2 + 100},{zones}', 'reload')
+
+    def uncached(func):
+        def run():
+            lookup_cache.invalidate()
+            return func()
+        return run
+
+    return [
+        ('选服查询', lambda: game_filter.db_manager.execute_query(select_sql, select_params)),
+        ('全部渠道选服', lambda: game_filter.db_manager.execute_query(*game_filter._build_game_query_sql())),
+        ('渠道区服类型', lambda: game_filter.get_distinct_server_type(channel)),
+        ('渠道列表', lambda: game_filter.get_distinct_channels()),
+        ('区服列表', lambda: game_filter.get_games(channel, 'Game')),
+        ('最大区服号', lambda: game_filter.get_max_game(channel, 'Game')),
+        ('中心服信息', lambda: GameDBUtil.get_central_server_info(channel, 0)),
+        ('区服拓扑', lambda: GameDBUtil._query_channels_game_servers(others)),
+        ('内网查外网IP', lambda: GameDBUtil.get_external_ip(ip)),
+        ('渠道服务器', lambda: GameDBUtil.get_server_list(channel, server_type='Game')),
+        ('渠道MySQL', lambda: GameDBUtil.get_mysql_list(channel)),
+        ('渠道配置', uncached(lambda: GameDBUtil.get_channels_info([channel]))),
+    ]
+
+
+def measure(queries, rounds):
+    """每个查询执行rounds次（先预热一次），返回 {名称: (中位数ms, p95 ms)}"""
+    result = {}
+    for name, query in queries:
+        query()
+        times = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            query()
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        result[name] = (times[len(times) // 2], times[min(len(times) - 1, int(len(times) * 0.95))])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='热点查询索引基准测试（无索引 vs 迁移 9b382e8533e1）')
+    parser.add_argument('--seed', action='store_true', help='清空并灌入模拟数据')
+    parser.add_argument('--channels', type=int, default=20, help='渠道数')
+    parser.add_argument('--zones', type=int, default=3000, help='每个渠道的Game区服数')
+    parser.add_argument('--hosts', type=int, default=100, help='每个渠道的服务器数')
+    parser.add_argument('--rounds', type=int, default=50, help='每个查询的执行次数')
+    args = parser.parse_args()
+
+    if not (db_name or '').endswith('_bench'):
+        print(f"当前库 {db_name} 不是测试库（OPS_DB_NAME 需以 _bench 结尾），已退出")
+        return 1
+
+    db = MysqlConfig()
+    if args.seed:
+        seed(db, args.channels, args.zones, args.hosts)
+
+    indexes = load_indexes()
+    queries = build_queries(args.channels, args.zones)
+    set_indexes(db, indexes, False)
+    before = measure(queries, args.rounds)
+    set_indexes(db, indexes, True)
+    after = measure(queries, args.rounds)
+
+    print(f"{'查询':<12}{'无索引中位数':>12}{'有索引中位数':>12}{'无索引p95':>12}{'有索引p95':>12}{'提升':>8}")
+    for name, _ in queries:
+        (before_p50, before_p95), (after_p50, after_p95) = before[name], after[name]
+        print(f"{name:<12}{before_p50:>12.2f}{after_p50:>12.2f}{before_p95:>12.2f}{after_p95:>12.2f}"
+              f"{before_p50 / max(after_p50, 0.001):>7.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
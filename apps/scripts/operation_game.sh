@@ -69,6 +69,10 @@ function error_exit() {
 #ssh变量
 chmod 400 jump_server
 ssh_parameter='-o MACs=umac-64@openssh.com -o StrictHostKeyChecking=no -o GSSAPIAuthentication=no -i jump_server'
+# 按主机批量执行时，复用同一个SSH主连接(ControlMaster)，避免重复握手
+if [[ -n "$SSH_CONTROL_PATH" ]]; then
+    ssh_parameter="$ssh_parameter -o ControlMaster=auto -o ControlPath=$SSH_CONTROL_PATH -o ControlPersist=${SSH_CONTROL_PERSIST:-60}"
+fi
 SSH="ssh $ssh_parameter -p${ssh_port}"
 # scp限速10m传输
 SCP="scp $ssh_parameter -l 100000 -P${ssh_port}"
@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
 from flask_login import login_required
 from apps.models.decorators import admin_required
 from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
 
 from apps.models.operation_mysql import MysqlConfig
+from apps.models.topology_cache import get_table_count, adjust_table_count
 from apps.models.logger_manager import LoggerManager
 from apps.config import MYSQL_CONFIG
 
@@ -28,7 +29,8 @@ def create_management_bp(
         modify_template,
         table_config,
         entity_name,  # 如"渠道"、"MySQL"、"服务器"
-        list_var_name  # 模板中列表变量名，如"channels"、"mysql_s"、"servers"
+        list_var_name,  # 模板中列表变量名，如"channels"、"mysql_s"、"servers"
+        on_change=None
 ):
     """
     生成通用管理蓝图的工厂函数
@@ -40,26 +42,33 @@ def create_management_bp(
     :param table_config: 数据库表配置（MYSQL_CONFIG中的对应项）
     :param entity_name: 实体名称（用于提示信息）
     :param list_var_name: 模板中列表变量的名称
+    :param on_change: 添加/修改/删除成功后的回调（如失效该表的查询缓存）
     """
     bp = Blueprint(bp_name, __name__, url_prefix=url_prefix)
 
-    # 列表页面
+    # 列表页面（按id游标翻页：after=上一页最后一条的id，before=下一页第一条的id，last=1为末页）
     @bp.route('/list')
     @login_required
     @admin_required
     def entity_list():
         manager = ServerManager(table_list=table_config, server_info=entity_name) if table_config else ServerManager()
-        page = request.args.get('page', 1, type=int)
         per_page = 10
-        page = max(1, page)
+        after = request.args.get('after', type=int)
+        before = request.args.get('before', type=int)
+        last = request.args.get('last', 0, type=int) == 1
 
-        entities = manager.get_all_servers(page=page, per_page=per_page)
+        entities, prev_cursor, next_cursor = manager.get_servers_page(
+            per_page=per_page, after=after, before=before, last=last)
         total_count = manager.get_server_count()
         total_pages = (total_count + per_page - 1) // per_page if total_count > 0 else 1
 
-        if page > total_pages:
+        # 页码只用于展示（随翻页链接传递），实际定位使用游标
+        if last:
             page = total_pages
-            entities = manager.get_all_servers(page=page, per_page=per_page)
+        elif prev_cursor is None:
+            page = 1
+        else:
+            page = min(max(2, request.args.get('page', 2, type=int)), total_pages)
 
         # 构建模板参数（动态使用列表变量名）
         template_kwargs = {
@@ -68,7 +77,9 @@ def create_management_bp(
             'current_page': page,
             'total_pages': total_pages,
             'total_count': total_count,
-            'per_page': per_page
+            'per_page': per_page,
+            'prev_cursor': prev_cursor,
+            'next_cursor': next_cursor
         }
         return render_template(list_template, **template_kwargs)
 
@@ -95,6 +106,8 @@ def create_management_bp(
             })
 
             result = manager.add_server(converted_data)
+            if result and on_change:
+                on_change()
             if result:
                 flash(f'{entity_name}添加成功', 'success')
                 return redirect(url_for(f'{bp_name}.entity_list'))
@@ -131,6 +144,8 @@ def create_management_bp(
             })
 
             result = manager.update_server(entity_id, converted_data)
+            if result and on_change:
+                on_change()
             if result:
                 flash(f'{entity_name}更新成功', 'success')
                 return redirect(url_for(f'{bp_name}.entity_list'))
@@ -154,6 +169,8 @@ def create_management_bp(
     def delete_entity(entity_id):
         manager = ServerManager(table_list=table_config, server_info=entity_name) if table_config else ServerManager()
         result = manager.delete_server(entity_id)
+        if result and on_change:
+            on_change()
 
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return jsonify({
@@ -203,33 +220,76 @@ class ServerManager:
     def __init__(self, table_list=MYSQL_CONFIG['server_list'], server_info='服务器'):
         self.logger = LoggerManager()
         self.db_manager = MysqlConfig()
-        self.db_manager.connect_pool()
         # 默认为服务器数据库表
         self.server_table = table_list
         self.server_info = server_info
 
     def get_server_count(self) -> int:
-        """获取服务器总记录数（用于分页计算）"""
+        """获取服务器总记录数（用于分页计算，结果缓存，新增/删除时调整，过期后重新统计）"""
         try:
             sql = f"SELECT COUNT(*) as count FROM {self.server_table}"
-            result = self.db_manager.execute_query(sql)
-            return result[0]['count'] if result else 0
+            result = get_table_count(
+                self.server_table, lambda: (self.db_manager.execute_query(sql) or [{'count': 0}])[0]['count'])
+            return result or 0
         except Exception as e:
             self.logger.error(f"查询{self.server_info}总数失败: {str(e)}")
             return 0
 
-    def get_all_servers(self, page: int = 1, per_page: int = 10) -> List[Dict]:
-        """获取分页的服务器列表（新增分页参数）"""
+    def get_servers_page(self, per_page: int = 10, after: Optional[int] = None, before: Optional[int] = None,
+                         last: bool = False) -> Tuple[List[Dict], Optional[int], Optional[int]]:
+        """
+        按id倒序游标分页（WHERE id < 游标 LIMIT，不使用OFFSET，翻页耗时与页码无关，新增/删除不会导致翻页错位）
+        :param after: 游标，返回id小于该值的一页（下一页）
+        :param before: 游标，返回id大于该值的一页（上一页）
+        :param last: 返回最后一页
+        :return: (当前页数据, 上一页游标（没有上一页为None）, 下一页游标（没有下一页为None）)
+        """
         try:
-            # 计算偏移量（避免页码小于1导致的错误）
-            offset = max(0, (page - 1) * per_page)
-            sql = f"SELECT * FROM {self.server_table} ORDER BY id DESC LIMIT %s OFFSET %s"
-            result = self.db_manager.execute_query(sql, (per_page, offset))
-            self.logger.info(f"查询{self.server_info}分页数据成功，页码: {page}, 每页数量: {per_page}")
-            return result
+            # 多查一条用于判断是否还有更多数据
+            if before is not None:
+                sql = f"SELECT * FROM {self.server_table} WHERE id > %s ORDER BY id ASC LIMIT %s"
+                params = (before, per_page + 1)
+            elif last:
+                # 末页条数为 总数除以每页数量的余数，与从第一页往后翻的分页保持对齐
+                total_count = self.get_server_count()
+                sql = f"SELECT * FROM {self.server_table} ORDER BY id ASC LIMIT %s"
+                params = ((total_count - 1) % per_page + 1 if total_count > 0 else per_page,)
+            elif after is not None:
+                sql = f"SELECT * FROM {self.server_table} WHERE id < %s ORDER BY id DESC LIMIT %s"
+                params = (after, per_page + 1)
+            else:
+                sql = f"SELECT * FROM {self.server_table} ORDER BY id DESC LIMIT %s"
+                params = (per_page + 1,)
+            rows = self.db_manager.execute_query(sql, params)
+
+            if before is not None or last:
+                has_more = len(rows) > per_page
+                rows = rows[:per_page][::-1]
+                # 末页只有在总数超过一页时才有上一页
+                has_prev = has_more if before is not None else bool(rows) and self._exists('>', rows[0]['id'])
+                has_next = bool(rows) and (before is not None or self._exists('<', rows[-1]['id']))
+            else:
+                has_next = len(rows) > per_page
+                rows = rows[:per_page]
+                has_prev = after is not None
+
+            # 游标所在位置之后已没有数据（如末尾记录被删除）时回到第一页
+            if not rows and (after is not None or before is not None):
+                return self.get_servers_page(per_page=per_page)
+
+            self.logger.info(f"查询{self.server_info}分页数据成功，游标: after={after}, before={before}, last={last}, "
+                             f"每页数量: {per_page}")
+            prev_cursor = rows[0]['id'] if rows and has_prev else None
+            next_cursor = rows[-1]['id'] if rows and has_next else None
+            return rows, prev_cursor, next_cursor
         except Exception as e:
             self.logger.error(f"查询{self.server_info}分页数据失败: {str(e)}")
-            return []
+            return [], None, None
+
+    def _exists(self, operator, server_id):
+        """是否存在id大于/小于指定值的记录（主键范围查询，只读一行）"""
+        sql = f"SELECT id FROM {self.server_table} WHERE id {operator} %s LIMIT 1"
+        return bool(self.db_manager.execute_query(sql, (server_id,)))
 
     def get_server_by_id(self, server_id: int) -> Optional[Dict]:
         """通过ID获取服务器信息"""
@@ -249,6 +309,8 @@ class ServerManager:
             placeholders = ', '.join(['%s'] * len(server_data))
             sql = f"INSERT INTO {self.server_table} ({fields}) VALUES ({placeholders})"
             affected_rows = self.db_manager.execute_update(sql, tuple(server_data.values()))
+            if affected_rows > 0:
+                adjust_table_count(self.server_table, affected_rows)
             self.logger.info(f"添加{self.server_info}成功，数据: {server_data}")
             return affected_rows > 0
         except Exception as e:
@@ -282,6 +344,7 @@ class ServerManager:
             affected_rows = self.db_manager.execute_update(sql, (server_id,))
 
             if affected_rows > 0:
+                adjust_table_count(self.server_table, -affected_rows)
                 self.logger.info(f"删除{self.server_info}ID: {server_id} 成功")
                 return True
             else:
@@ -20,10 +20,28 @@ function operateGame(type, script, extraParams = {}) {
     if (eventSources[type]) {
         eventSources[type].close();
     }
+    delete operationJobs[type];
 
     // 1. 拼接基础URL
     let url = `/ops_game/operate?script=${encodeURIComponent(script)}`;
 
+    // 按主机批量执行（页面存在该选项且勾选时）
+    const batchModeBox = document.getElementById('batch_mode');
+    if (batchModeBox && batchModeBox.checked) {
+        extraParams = { ...extraParams, batch_mode: 'host' };
+    }
+    // 自适应并发（页面存在该选项且勾选时）
+    const adaptiveBox = document.getElementById('adaptive_concurrency');
+    if (adaptiveBox && adaptiveBox.checked) {
+        extraParams = { ...extraParams, concurrency: 'adaptive' };
+    }
+    // 摘要输出（页面存在该选项且勾选时）：只推送进度汇总和失败任务的完整输出
+    const summaryBox = document.getElementById('summary_mode');
+    streamModes[type] = summaryBox && summaryBox.checked ? 'summary' : '';
+    if (streamModes[type]) {
+        extraParams = { ...extraParams, stream: streamModes[type] };
+    }
+
     // 2. 拼接额外参数（如 rsync_mode，空值不拼接）
     Object.keys(extraParams).forEach(key => {
         // 仅当参数值存在时拼接，避免空参数干扰后端
@@ -32,29 +50,63 @@ function operateGame(type, script, extraParams = {}) {
         }
     });
 
+    connectEventSource(type, url, script);
+}
+
+// 各操作当前作业信息（作业ID、最后收到的事件ID、重连次数），用于断线后续传
+const operationJobs = {};
+// 各操作的输出模式（summary: 摘要输出）
+const streamModes = {};
+const MAX_RECONNECT = 10;
+
+/**
+ * 建立SSE连接并处理作业输出
+ * @param {string} type - 操作类型标识
+ * @param {string} url - SSE地址（新建作业或重新接入已有作业）
+ * @param {string} script - 脚本参数（用于重试失败任务）
+ */
+function connectEventSource(type, url, script) {
+    const operationText = getOperationText(type);
     try {
         eventSources[type] = new EventSource(url);
 
         eventSources[type].onmessage = function (event) {
+            const job = operationJobs[type];
+            if (job && event.lastEventId) {
+                job.lastEventId = event.lastEventId;
+                job.retries = 0;
+            }
+            let data;
             try {
-                const data = JSON.parse(event.data);
-                if (data.status === 'statistics') {
-                    appendStatistics(type, data.data);
-                    return;
-                }
-                if (data.status === 'completed') {
-                    appendCompletedMessage(type, data.message);
-                    eventSources[type].close();
-                    return;
-                }
-                appendOutput(type, data);
-                hideStatus(type);
+                data = JSON.parse(event.data);
             } catch (e) {
                 appendErrorOutput(type, `数据解析错误: ${e.message}\n原始数据: ${event.data}`);
+                return;
+            }
+            // 批量帧：按顺序处理其中的每条消息，处理完后统一滚动一次，减少页面重排
+            const items = data.status === 'batch' ? data.items : [data];
+            for (const item of items) {
+                if (!handleOperationMessage(type, item, event.lastEventId, script)) break;
             }
+            const outputContainer = document.getElementById(`${type}_game`);
+            outputContainer.scrollTop = outputContainer.scrollHeight;
         };
 
         eventSources[type].onerror = function () {
+            const job = operationJobs[type];
+            // 作业在后台继续执行，断线后从最后收到的事件处续传
+            if (job && job.retries < MAX_RECONNECT) {
+                eventSources[type].close();
+                job.retries += 1;
+                showStatus(type, `连接中断，正在重新接入作业${job.id}（第${job.retries}次）...`, 'connecting');
+                let resumeUrl = `/ops_game/jobs/${encodeURIComponent(job.id)}/stream` +
+                    `?last_event_id=${encodeURIComponent(job.lastEventId || 0)}`;
+                if (streamModes[type]) {
+                    resumeUrl += `&stream=${encodeURIComponent(streamModes[type])}`;
+                }
+                setTimeout(() => connectEventSource(type, resumeUrl, job.script), 1000 * job.retries);
+                return;
+            }
             handleEventSourceError(type, eventSources[type]);
         };
     } catch (err) {
@@ -63,6 +115,90 @@ function operateGame(type, script, extraParams = {}) {
     }
 }
 
+/**
+ * 处理一条作业消息
+ * @return {boolean} 是否继续处理后续消息（作业结束后返回false）
+ */
+function handleOperationMessage(type, data, lastEventId, script) {
+    const job = operationJobs[type];
+    if (data.status === 'job') {
+        // 作业已创建，记录作业ID用于断线重连
+        operationJobs[type] = {
+            id: data.job_id, lastEventId: lastEventId, retries: 0, script: script, hasFailure: false
+        };
+        showStatus(type, `${data.message}，正在${getOperationText(type)}游戏服...`, 'connecting');
+        appendCancelButton(type, operationJobs[type]);
+        return true;
+    }
+    if (data.status === 'statistics') {
+        appendStatistics(type, data.data);
+        return true;
+    }
+    if (data.status === 'summary') {
+        renderProgressSummary(type, data.data);
+        hideStatus(type);
+        return true;
+    }
+    if (data.status === 'completed') {
+        appendCompletedMessage(type, data.message);
+        eventSources[type].close();
+        removeCancelButton(type);
+        if (job && job.hasFailure) {
+            appendRetryButton(type, job);
+        }
+        delete operationJobs[type];
+        return false;
+    }
+    if (job && ['failed', 'error', 'timeout', 'cancelled'].includes(data.status)) {
+        job.hasFailure = true;
+    }
+    appendOutput(type, data);
+    hideStatus(type);
+    return true;
+}
+
+/**
+ * 转义HTML特殊字符（渠道名、失败原因等服务端数据拼接到innerHTML前使用）
+ * @param {*} value - 待转义的值
+ * @return {string}
+ */
+function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value ?? '';
+    return div.innerHTML;
+}
+
+/**
+ * 渲染进度汇总（摘要输出模式），每次推送原位更新
+ * @param {string} type - 操作类型标识
+ * @param {Object} summary - 进度汇总（groups/totals/throughput/eta）
+ */
+function renderProgressSummary(type, summary) {
+    const outputContainer = document.getElementById(`${type}_game`);
+    let summaryDiv = outputContainer.querySelector('.progress-summary');
+    if (!summaryDiv) {
+        summaryDiv = document.createElement('div');
+        summaryDiv.className = 'statistics-container progress-summary';
+        const cancelButton = outputContainer.querySelector('.cancel-job');
+        outputContainer.insertBefore(summaryDiv, cancelButton ? cancelButton.nextSibling : outputContainer.firstChild);
+    }
+    const rows = summary.groups.map(g =>
+        `<tr><td>${escapeHtml(g.channel)}</td><td>${escapeHtml(g.game_type)}</td><td>${escapeHtml(g.queued)}</td>` +
+        `<td>${escapeHtml(g.running)}</td><td>${escapeHtml(g.succeeded)}</td><td>${escapeHtml(g.failed)}</td></tr>`
+    ).join('');
+    const t = summary.totals;
+    const eta = summary.eta === null || summary.eta === undefined ? '-' : `${escapeHtml(summary.eta)}秒`;
+    summaryDiv.innerHTML =
+        `<div class="statistics-header">执行进度</div>` +
+        `<table class="statistics-table"><thead><tr><th>渠道</th><th>类型</th><th>排队</th>` +
+        `<th>执行中</th><th>成功</th><th>失败</th></tr></thead><tbody>${rows}` +
+        `<tr><td colspan="2"><strong>合计</strong></td><td>${escapeHtml(t.queued)}</td>` +
+        `<td>${escapeHtml(t.running)}</td><td>${escapeHtml(t.succeeded)}</td><td>${escapeHtml(t.failed)}</td></tr>` +
+        `</tbody></table>` +
+        `<p>已用时：${escapeHtml(summary.elapsed)}秒，吞吐量：${escapeHtml(summary.throughput)}个/分钟，` +
+        `预计剩余：${eta}</p>`;
+}
+
 function appendStatistics(type, stats) {
     // 为可能缺失的字段设置默认值（避免未定义错误）
     stats.total_executions = stats.total_executions ?? 0; // 若不存在则默认为0
@@ -83,11 +219,52 @@ function appendStatistics(type, stats) {
         : '0.00';
     totalStats.innerHTML = `
         <p><strong>总体情况：</strong></p>
-        <p>总执行次数：${stats.total_executions}</p>
-        <p><span class="failure-count">总失败次数：${stats.total_failures}（失败率：${failureRate}%）</p>
+        <p>总执行次数：${escapeHtml(stats.total_executions)}</p>
+        <p><span class="failure-count">总失败次数：${escapeHtml(stats.total_failures)}（失败率：${failureRate}%）</span></p>
     `;
     statsContainer.appendChild(totalStats);
 
+    // 运行指标（如规划耗时）
+    const metrics = stats.metrics || {};
+    if (metrics.planning_time !== undefined) {
+        const metricStats = document.createElement('div');
+        metricStats.className = 'statistics-section';
+        metricStats.innerHTML = `<p>任务规划耗时：${escapeHtml(metrics.planning_time)}秒</p>`;
+        if (metrics.lookup_cache) {
+            metricStats.innerHTML += `<p>配置查询缓存：进程内命中${escapeHtml(metrics.lookup_cache.hits)}次，` +
+                `共享缓存命中${escapeHtml(metrics.lookup_cache.shared_hits)}次，` +
+                `未命中${escapeHtml(metrics.lookup_cache.misses)}次，` +
+                `命中率${(metrics.lookup_cache.hit_rate * 100).toFixed(1)}%</p>`;
+        }
+        statsContainer.appendChild(metricStats);
+    }
+    if (metrics.readiness) {
+        const readinessStats = document.createElement('div');
+        readinessStats.className = 'statistics-section';
+        readinessStats.innerHTML = Object.entries(metrics.readiness)
+            .map(([phase, seconds]) => `<p>${escapeHtml(phase)}就绪等待：${escapeHtml(seconds)}秒</p>`)
+            .join('');
+        statsContainer.appendChild(readinessStats);
+    }
+    if (metrics.concurrency) {
+        const concurrencyStats = document.createElement('div');
+        concurrencyStats.className = 'statistics-section';
+        const changes = (metrics.concurrency.changes || [])
+            .map(c => `<p>[${escapeHtml(c.time)}] ${escapeHtml(c.from)} -> ${escapeHtml(c.to)}：` +
+                `${escapeHtml(c.reason)}</p>`)
+            .join('');
+        concurrencyStats.innerHTML =
+            `<p><strong>当前并发数：</strong>${escapeHtml(metrics.concurrency.current)}</p>${changes}`;
+        statsContainer.appendChild(concurrencyStats);
+    }
+    if (metrics.output_queue) {
+        const queueStats = document.createElement('div');
+        queueStats.className = 'statistics-section';
+        queueStats.innerHTML = `<p>输出队列最高水位：${escapeHtml(metrics.output_queue.high_water)}/` +
+            `${escapeHtml(metrics.output_queue.maxsize)}，省略输出行数：${escapeHtml(metrics.output_queue.elided)}</p>`;
+        statsContainer.appendChild(queueStats);
+    }
+
     outputContainer.appendChild(statsContainer);
     outputContainer.scrollTop = outputContainer.scrollHeight;
 }
@@ -116,6 +293,16 @@ function appendOutput(type, data) {
         const taskHeader = document.createElement('div');
         taskHeader.className = 'task-header';
         taskHeader.textContent = `任务: ${task_id}`;
+        const job = operationJobs[type];
+        if (job && task_id) {
+            // 任务完整日志（末尾部分），排查单个区服时使用
+            const logLink = document.createElement('a');
+            logLink.className = 'task-log-link';
+            logLink.href = `/ops_game/jobs/${encodeURIComponent(job.id)}/tasks/${encodeURIComponent(task_id)}/log?tail=`;
+            logLink.target = '_blank';
+            logLink.textContent = '完整日志';
+            taskHeader.appendChild(logLink);
+        }
         taskGroup.appendChild(taskHeader);
 
         const taskOutput = document.createElement('div');
@@ -132,8 +319,6 @@ function appendOutput(type, data) {
     messageElement.className = `message-${status}`;
     messageElement.textContent = `[${new Date().toLocaleTimeString()}] ${message}`;
     taskOutput.appendChild(messageElement);
-
-    outputContainer.scrollTop = outputContainer.scrollHeight;
 }
 
 function appendCompletedMessage(type, message) {
@@ -145,6 +330,61 @@ function appendCompletedMessage(type, message) {
     outputContainer.scrollTop = outputContainer.scrollHeight;
 }
 
+/**
+ * 显示“取消作业”按钮（终止运行中的任务，未开始的任务不再执行）
+ * @param {string} type - 操作类型标识
+ * @param {Object} job - 作业信息（id）
+ */
+function appendCancelButton(type, job) {
+    removeCancelButton(type);
+    const outputContainer = document.getElementById(`${type}_game`);
+    const cancelButton = document.createElement('button');
+    cancelButton.type = 'button';
+    cancelButton.className = 'cancel-job';
+    cancelButton.textContent = `取消作业${job.id}`;
+    cancelButton.onclick = () => cancelJob(type, job.id, cancelButton);
+    outputContainer.prepend(cancelButton);
+}
+
+function removeCancelButton(type) {
+    const outputContainer = document.getElementById(`${type}_game`);
+    const cancelButton = outputContainer.querySelector('.cancel-job');
+    if (cancelButton) cancelButton.remove();
+}
+
+async function cancelJob(type, jobId, button) {
+    if (!confirm(`确定取消作业${jobId}吗？运行中的任务将被终止`)) return;
+    button.disabled = true;
+    try {
+        const csrfToken = document.querySelector('meta[name="csrf-token"]').content;
+        const response = await fetch(`/ops_game/jobs/${encodeURIComponent(jobId)}/cancel`, {
+            method: 'POST',
+            headers: { 'X-CSRFToken': csrfToken }
+        });
+        const result = await response.json();
+        showStatus(type, result.message, result.status === 'success' ? 'connecting' : 'error');
+    } catch (err) {
+        button.disabled = false;
+        showStatus(type, `取消作业失败: ${err.message}`, 'error');
+    }
+}
+
+/**
+ * 作业存在失败/未完成的任务时，显示“只重试失败任务”按钮
+ * @param {string} type - 操作类型标识
+ * @param {Object} job - 作业信息（id、script）
+ */
+function appendRetryButton(type, job) {
+    const outputContainer = document.getElementById(`${type}_game`);
+    const retryButton = document.createElement('button');
+    retryButton.type = 'button';
+    retryButton.className = 'retry-failed';
+    retryButton.textContent = `只重试失败/未完成的任务（作业${job.id}）`;
+    retryButton.onclick = () => operateGame(type, job.script, { retry_job: job.id });
+    outputContainer.appendChild(retryButton);
+    outputContainer.scrollTop = outputContainer.scrollHeight;
+}
+
 function appendErrorOutput(type, message) {
     const outputContainer = document.getElementById(`${type}_game`);
     const errorDiv = document.createElement('div');
@@ -423,7 +663,13 @@ async function submitSelection() {
         });
 
         if (!response.ok) throw new Error(`HTTP错误: ${response.status}`);
-        document.getElementById('result').textContent = await response.text();
+        const resultElement = document.getElementById('result');
+        resultElement.textContent = await response.text();
+        // 生成列表的扫描行数和耗时
+        const rowsScanned = response.headers.get('X-Rows-Scanned');
+        resultElement.title = rowsScanned === null ? '' :
+            `操作列表${response.headers.get('X-List-Id')}（版本${response.headers.get('X-List-Version')}），` +
+            `扫描${rowsScanned}行，耗时${response.headers.get('X-Elapsed-Ms')}毫秒`;
     } catch (err) {
         console.error('提交选择失败:', err);
         document.getElementById('result').textContent = `提交失败: ${err.message}`;
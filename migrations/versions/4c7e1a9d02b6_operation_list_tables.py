@@ -0,0 +1,107 @@
+"""operation_list / operation_list_range tables replacing operation_game_list
+
+Revision ID: 4c7e1a9d02b6
+Revises: 9b382e8533e1
+Create Date: 2026-10-17 20:10:00.000000
+
+"""
+import os
+import ast
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c7e1a9d02b6'
+down_revision = '9b382e8533e1'
+branch_labels = None
+depends_on = None
+
+# 旧操作列表（operation_game_list 中 id=1 的整体列表）迁移后归属的发起人
+LEGACY_OWNER = os.environ.get('OPS_LEGACY_LIST_OWNER', 'admin')
+
+
+def _has_table(name, offline_default):
+    """表是否已存在（--sql 离线生成脚本时无法查询，返回offline_default）"""
+    if op.get_context().as_sql:
+        return offline_default
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _to_ranges(game_nus):
+    """区服编号列表压缩为连续区间 [(起始, 结束)]"""
+    ranges = []
+    for nu in sorted({int(nu) for nu in game_nus}):
+        if ranges and nu == ranges[-1][1] + 1:
+            ranges[-1][1] = nu
+        else:
+            ranges.append([nu, nu])
+    return ranges
+
+
+def _migrate_legacy_list():
+    """把旧的 operation_game_list 整体列表写为 LEGACY_OWNER 的操作列表（版本1），旧表保留不删除"""
+    if not _has_table('operation_game_list', False):
+        return
+    bind = op.get_bind()
+    row = bind.execute(sa.text("SELECT operation_game_list FROM operation_game_list WHERE id = 1")).first()
+    if not row or not row[0]:
+        return
+    try:
+        # 旧列表以JSON或Python字面量写入，内容只有字符串和整数，两种格式都可以按字面量解析
+        game_list = ast.literal_eval(row[0])
+    except (ValueError, SyntaxError):
+        return
+    if not isinstance(game_list, dict) or not game_list:
+        return
+
+    list_id = bind.execute(sa.text(
+        "INSERT INTO operation_list (owner, version, created_at, updated_at) "
+        "VALUES (:owner, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"), {'owner': LEGACY_OWNER}).lastrowid
+    values = [{'list_id': list_id, 'channel_name': channel, 'server_type': game_type, 'start_nu': start,
+               'end_nu': end}
+              for channel, types in game_list.items()
+              for game_type, game_nus in types.items()
+              for start, end in _to_ranges(game_nus)]
+    if values:
+        bind.execute(sa.text(
+            "INSERT INTO operation_list_range (list_id, version, channel_name, server_type, start_nu, end_nu) "
+            "VALUES (:list_id, 1, :channel_name, :server_type, :start_nu, :end_nu)"), values)
+
+
+def upgrade():
+    # 按 ops_game.sql 新建的库已包含这两张表，已存在时跳过
+    if not _has_table('operation_list', False):
+        op.create_table(
+            'operation_list',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True, comment='操作列表id'),
+            sa.Column('owner', sa.String(64), nullable=False, comment='发起人'),
+            sa.Column('version', sa.Integer(), nullable=False, server_default='0', comment='当前版本号'),
+            sa.Column('created_at', sa.DateTime(), nullable=False, comment='创建时间'),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, comment='更新时间'),
+            mysql_engine='InnoDB', mysql_charset='utf8'
+        )
+        op.create_index('idx_owner_updated', 'operation_list', ['owner', 'updated_at'], unique=False)
+    if not _has_table('operation_list_range', False):
+        op.create_table(
+            'operation_list_range',
+            sa.Column('list_id', sa.Integer(), nullable=False, comment='操作列表id'),
+            sa.Column('version', sa.Integer(), nullable=False, comment='版本号'),
+            sa.Column('channel_name', sa.String(64), nullable=False, comment='渠道'),
+            sa.Column('server_type', sa.String(32), nullable=False, comment='区服类型'),
+            sa.Column('start_nu', sa.Integer(), nullable=False, comment='区服区间起始'),
+            sa.Column('end_nu', sa.Integer(), nullable=False, comment='区服区间结束（含）'),
+            sa.PrimaryKeyConstraint('list_id', 'version', 'channel_name', 'server_type', 'start_nu'),
+            mysql_engine='InnoDB', mysql_charset='utf8'
+        )
+        if not op.get_context().as_sql:
+            _migrate_legacy_list()
+
+
+def downgrade():
+    if _has_table('operation_list_range', True):
+        op.drop_table('operation_list_range')
+    if _has_table('operation_list', True):
+        op.drop_index('idx_owner_updated', table_name='operation_list')
+        op.drop_table('operation_list')
@@ -0,0 +1,51 @@
+"""hot lookup indexes for game_server_list / server_list / mysql_list / channel_list
+
+Revision ID: 9b382e8533e1
+Revises:
+Create Date: 2026-10-17 18:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b382e8533e1'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# 热点查询使用的索引（表名, 索引名, 字段），与 ops_game.sql 中的定义保持一致
+INDEXES = [
+    # 选服查询（game_status过滤 + 渠道/类型/区服条件 + 按渠道/类型/区服排序）、渠道/类型去重、
+    # 最大区服号、单个区服查询，全部只读索引即可完成（覆盖索引，无需回表和filesort）
+    ('game_server_list', 'idx_channel_type_nu_status', ['channel_name', 'server_type', 'game_nu', 'game_status']),
+    # 区服拓扑查询关联 server_list（s.intranet_ip = g.intranet_ip）及按内网IP查外网IP
+    ('server_list', 'idx_intranet_ip', ['intranet_ip', 'external_ip']),
+    # 装服时按渠道和服务器类型查询可用服务器
+    ('server_list', 'idx_channel_type', ['belong_to_channel', 'server_type']),
+    # 装服时查询渠道的MySQL（ORDER BY id DESC LIMIT 1，二级索引中已包含主键）
+    ('mysql_list', 'idx_belong_to_channel', ['belong_to_channel']),
+    # 渠道配置查询（内外网开关、初始id、http端口）
+    ('channel_list', 'idx_channel_name', ['channel_name']),
+]
+
+
+def _has_index(table, name, offline_default):
+    """索引是否已存在（--sql 离线生成脚本时无法查询，返回offline_default）"""
+    if op.get_context().as_sql:
+        return offline_default
+    return name in {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    # 按 ops_game.sql 新建的库已包含这些索引，已存在时跳过
+    for table, name, columns in INDEXES:
+        if not _has_index(table, name, False):
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for table, name, columns in reversed(INDEXES):
+        if _has_index(table, name, True):
+            op.drop_index(name, table_name=table)
@@ -28,7 +28,8 @@ CREATE TABLE `channel_list`  (
   `alias_name` varchar(255) CHARACTER SET utf8 COLLATE utf8_general_ci NOT NULL COMMENT '中文名称',
   `initial_id` int(0) NOT NULL COMMENT '渠道的游戏服初始id',
   `external_switch` int(0) NOT NULL DEFAULT 0 COMMENT '0为内网，1为外网；默认为内网(0)',
-  PRIMARY KEY (`id`) USING BTREE
+  PRIMARY KEY (`id`) USING BTREE,
+  INDEX `idx_channel_name`(`channel_name`) USING BTREE
 ) ENGINE = InnoDB AUTO_INCREMENT = 5 CHARACTER SET = utf8 COLLATE = utf8_general_ci ROW_FORMAT = Dynamic;
 
 -- ----------------------------
@@ -48,7 +49,8 @@ CREATE TABLE `game_server_list`  (
   `open_status` int(0) NOT NULL DEFAULT 0 COMMENT '开服状态:0(未开服)1(已开服)',
   `game_status` int(0) NOT NULL DEFAULT 0 COMMENT '游戏服状态:0(正式服)1(测试服)2(已删除)3(未定义)',
   `http_port` int(0) NOT NULL DEFAULT 0 COMMENT '后台http端口',
-  PRIMARY KEY (`id`) USING BTREE
+  PRIMARY KEY (`id`) USING BTREE,
+  INDEX `idx_channel_type_nu_status`(`channel_name`, `server_type`, `game_nu`, `game_status`) USING BTREE
 ) ENGINE = InnoDB AUTO_INCREMENT = 52 CHARACTER SET = utf8 COLLATE = utf8_general_ci ROW_FORMAT = Dynamic;
 
 -- ----------------------------
@@ -120,7 +122,8 @@ CREATE TABLE `mysql_list`  (
   `external_switch` int(0) NOT NULL DEFAULT 0 COMMENT '0为内网，1为外网；默认为内网(0)；对应jumpserver的连接方式',
   `tunnel_ip` varchar(255) CHARACTER SET utf8 COLLATE utf8_general_ci NOT NULL COMMENT '当MySQL不跟运维机同一局域网是的转发IP地址',
   `tunnel_port` int(0) NOT NULL DEFAULT 0 COMMENT '当MySQL不跟运维机同一局域网是的转发端口',
-  PRIMARY KEY (`id`) USING BTREE
+  PRIMARY KEY (`id`) USING BTREE,
+  INDEX `idx_belong_to_channel`(`belong_to_channel`) USING BTREE
 ) ENGINE = InnoDB AUTO_INCREMENT = 14 CHARACTER SET = utf8 COLLATE = utf8_general_ci ROW_FORMAT = Dynamic;
 
 -- ----------------------------
@@ -135,13 +138,31 @@ CREATE TABLE `number_data`  (
 ) ENGINE = InnoDB AUTO_INCREMENT = 1 CHARACTER SET = utf8 COLLATE = utf8_general_ci ROW_FORMAT = Dynamic;
 
 -- ----------------------------
--- Table structure for operation_game_list
+-- Table structure for operation_list
 -- ----------------------------
-DROP TABLE IF EXISTS `operation_game_list`;
-CREATE TABLE `operation_game_list`  (
-  `id` int(0) NOT NULL COMMENT 'id',
-  `operation_game_list` text CHARACTER SET utf8 COLLATE utf8_general_ci NOT NULL COMMENT '要操作的游戏服列表',
-  PRIMARY KEY (`id`) USING BTREE
+DROP TABLE IF EXISTS `operation_list`;
+CREATE TABLE `operation_list`  (
+  `id` int(0) NOT NULL AUTO_INCREMENT COMMENT '操作列表id',
+  `owner` varchar(64) CHARACTER SET utf8 COLLATE utf8_general_ci NOT NULL COMMENT '发起人',
+  `version` int(0) NOT NULL DEFAULT 0 COMMENT '当前版本号',
+  `created_at` datetime(0) NOT NULL COMMENT '创建时间',
+  `updated_at` datetime(0) NOT NULL COMMENT '更新时间',
+  PRIMARY KEY (`id`) USING BTREE,
+  INDEX `idx_owner_updated`(`owner`, `updated_at`) USING BTREE
+) ENGINE = InnoDB AUTO_INCREMENT = 1 CHARACTER SET = utf8 COLLATE = utf8_general_ci ROW_FORMAT = Dynamic;
+
+-- ----------------------------
+-- Table structure for operation_list_range
+-- ----------------------------
+DROP TABLE IF EXISTS `operation_list_range`;
+CREATE TABLE `operation_list_range`  (
+  `list_id` int(0) NOT NULL COMMENT '操作列表id',
+  `version` int(0) NOT NULL COMMENT '版本号',
+  `channel_name` varchar(64) CHARACTER SET utf8 COLLATE utf8_general_ci NOT NULL COMMENT '渠道',
+  `server_type` varchar(32) CHARACTER SET utf8 COLLATE utf8_general_ci NOT NULL COMMENT '区服类型',
+  `start_nu` int(0) NOT NULL COMMENT '区服区间起始',
+  `end_nu` int(0) NOT NULL COMMENT '区服区间结束（含）',
+  PRIMARY KEY (`list_id`, `version`, `channel_name`, `server_type`, `start_nu`) USING BTREE
 ) ENGINE = InnoDB CHARACTER SET = utf8 COLLATE = utf8_general_ci ROW_FORMAT = Dynamic;
 
 -- ----------------------------
@@ -197,7 +218,9 @@ CREATE TABLE `server_list`  (
   `hard_disk` int(0) NOT NULL COMMENT '硬盘/G',
   `system_info` varchar(255) CHARACTER SET utf8 COLLATE utf8_general_ci NOT NULL COMMENT '服务器系统信息',
   `external_switch` int(0) NOT NULL DEFAULT 0 COMMENT '0为内网，1为外网；默认为内网(0)；对应jumpserver的连接方式',
-  PRIMARY KEY (`id`) USING BTREE
+  PRIMARY KEY (`id`) USING BTREE,
+  INDEX `idx_intranet_ip`(`intranet_ip`, `external_ip`) USING BTREE,
+  INDEX `idx_channel_type`(`belong_to_channel`, `server_type`) USING BTREE
 ) ENGINE = InnoDB AUTO_INCREMENT = 18 CHARACTER SET = utf8 COLLATE = utf8_general_ci ROW_FORMAT = Dynamic;
 
 -- ----------------------------